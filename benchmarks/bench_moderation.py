@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark group moderation: legacy per-message model rebuild and lock chain vs compiled rule sets
+
+Each rule count N sets every lock, N listed members per list and N filtered words.
+
+Usage: python benchmarks/bench_moderation.py [messages] [rule counts, comma separated]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telegram import Message, MessageEntity, Chat, User, PhotoSize, Sticker, Location
+
+from src.models.group import Group, GroupLocks
+from src.services.moderation import ModerationEngine
+
+GROUP_ID = -1001234567890
+CHAT = Chat(GROUP_ID, 'supergroup', title='Bench group')
+
+
+def legacy_check(group_data: dict, message: Message) -> bool:
+    """Previous MainHandlers.handle_group_message and check_group_locks, minus the deletes"""
+    group = Group.from_dict(group_data)
+    user = message.from_user
+    if not group.can_send_message(user.id):
+        return True
+    if group.is_admin(user.id) or group.is_vip(user.id):
+        return False
+    if message.entities:
+        for entity in message.entities:
+            if entity.type == 'url' and group.locks.links:
+                return True
+            if entity.type == 'text_link' and group.locks.hyperlinks:
+                return True
+            if entity.type == 'hashtag' and group.locks.hashtags:
+                return True
+            if entity.type == 'mention' and group.locks.usernames:
+                return True
+    if message.text:
+        for word in group.lists.filtered_words:
+            if word.lower() in message.text.lower():
+                return True
+    for attribute, lock in (('forward_origin', 'forwarded'), ('photo', 'photos'), ('video', 'videos'),
+                            ('audio', 'music'), ('document', 'files'), ('sticker', 'stickers'),
+                            ('animation', 'gifs'), ('location', 'location'), ('voice', 'voice'),
+                            ('video_note', 'video_msg'), ('poll', 'polls')):
+        if getattr(message, attribute) and getattr(group.locks, lock):
+            return True
+    return False
+
+
+def build_group(rules: int, rng: random.Random) -> dict:
+    """Group document with every lock set and rules entries in each list"""
+    locks = {name: name not in ('photos', 'stickers') for name in GroupLocks().to_dict()}
+    members = lambda: [rng.randrange(10 ** 9) for _ in range(rules)]
+    return {
+        'group_id': GROUP_ID,
+        'title': 'Bench group',
+        'settings': {'group_locked': False, 'downloads_enabled': True},
+        'locks': locks,
+        'lists': {
+            'admins': members(),
+            'vip_members': members(),
+            'muted_users': members(),
+            'banned_users': members(),
+            'filtered_words': [f"spamword{i:05d}" for i in range(rules)],
+            'warnings': {}
+        }
+    }
+
+
+def build_messages(count: int, rng: random.Random) -> list:
+    """Mix of plain text, links, photos, stickers and locations from ordinary members"""
+    messages = []
+    for i in range(count):
+        user = User(rng.randrange(10 ** 9, 2 * 10 ** 9), False, 'Member')
+        kind = rng.random()
+        common = {'message_id': i, 'date': datetime.now(), 'chat': CHAT, 'from_user': user}
+        if kind < 0.1:
+            messages.append(Message(text='see https://example.com', entities=(MessageEntity('url', 4, 19),), **common))
+        elif kind < 0.7:
+            text = ' '.join(rng.choice(('hello', 'there', 'group', 'message', 'نسخه', 'سلام', 'friends')) for _ in range(12))
+            messages.append(Message(text=text, **common))
+        elif kind < 0.85:
+            messages.append(Message(photo=(PhotoSize('f', 'u', 90, 90),), caption='look', **common))
+        elif kind < 0.95:
+            messages.append(Message(sticker=Sticker('f', 'u', 512, 512, False, False, 'regular'), **common))
+        else:
+            messages.append(Message(location=Location(51.4, 35.7), **common))
+    return messages
+
+
+def bench(func, messages: list) -> float:
+    for message in messages:
+        func(message)
+    start = time.perf_counter()
+    deleted = sum(1 for message in messages if func(message))
+    elapsed = time.perf_counter() - start
+    return elapsed / len(messages) * 1e6, deleted
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rule_counts = [int(n) for n in sys.argv[2].split(',')] if len(sys.argv) > 2 else [10, 100, 1000, 5000]
+    rng = random.Random(42)
+    messages = build_messages(count, rng)
+
+    print(f"Messages: {count}")
+    print(f"{'rules':>7} {'legacy us/msg':>14} {'compiled us/msg':>16} {'speedup':>8}  deleted")
+    for rules in rule_counts:
+        group_data = build_group(rules, rng)
+        engine = ModerationEngine(max_groups=10)
+        check = lambda message: engine.get_rules(GROUP_ID, group_data).check(message) is not None
+
+        legacy, legacy_deleted = bench(lambda message: legacy_check(group_data, message), messages)
+        compiled, deleted = bench(check, messages)
+        print(f"{rules:>7} {legacy:>14.2f} {compiled:>16.2f} {legacy / compiled:>7.1f}x  {legacy_deleted}/{deleted}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark URL matching: legacy substring scan vs precompiled host-suffix matcher
+
+Usage: python benchmarks/bench_url_matcher.py [corpus_size]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.config import Config
+from src.utils.url_matcher import URLMatcher
+
+
+def legacy_is_supported(url: str) -> bool:
+    """Previous DownloadService.is_supported_url implementation"""
+    try:
+        domain = urlparse(url).netloc.lower()
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        return any(platform in domain for platform in Config.SUPPORTED_PLATFORMS)
+    except Exception:
+        return False
+
+
+def build_corpus(size: int) -> list:
+    """Build a mixed corpus of supported, unsupported and look-alike URLs"""
+    rng = random.Random(42)
+    hosts = Config.SUPPORTED_PLATFORMS + ['www.youtube.com', 'm.facebook.com', 'vm.tiktok.com']
+    fakes = ['notyoutube.com.evil', 'youtube.com.example.org', 'example.com', 'news.ycombinator.com',
+             'github.com', 'x.company.io', 'my-t.me.net']
+    corpus = []
+    for i in range(size):
+        host = rng.choice(hosts if rng.random() < 0.7 else fakes)
+        corpus.append(f"https://{host}/watch?v={i:011d}&utm_source=share&si=abc")
+    return corpus
+
+
+def bench(name: str, func, corpus: list) -> float:
+    start = time.perf_counter()
+    matched = sum(1 for url in corpus if func(url))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {elapsed * 1000:9.1f} ms  {len(corpus) / elapsed:12.0f} urls/s  matched={matched}")
+    return elapsed
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    corpus = build_corpus(size)
+    matcher = URLMatcher(Config.PLATFORM_DOMAINS)
+
+    print(f"Corpus: {size} URLs")
+    legacy = bench('legacy', legacy_is_supported, corpus)
+    compiled = bench('matcher', matcher.match, corpus)
+    bench('canonical', matcher.canonicalize, corpus)
+    print(f"Speedup: {legacy / compiled:.2f}x")
+
+    false_positives = [url for url in corpus if legacy_is_supported(url) and not matcher.match(url)]
+    print(f"Legacy false positives: {len(false_positives)}")
+
+
+if __name__ == '__main__':
+    main()
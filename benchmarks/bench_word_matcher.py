@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark filtered word matching: legacy per-word substring scan, regex alternation and the automaton
+
+Usage: python benchmarks/bench_word_matcher.py [messages] [list sizes, comma separated]
+"""
+
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.word_matcher import WordMatcher
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyzابپتثجچحخدذرزسشصضطظعغفقکگلمنوهی'
+VOCABULARY = ['hello', 'there', 'group', 'message', 'download', 'video', 'سلام', 'دوستان', 'نسخه', 'کتاب', 'خوب']
+
+
+def legacy_search(words: list, text: str) -> bool:
+    """Previous MainHandlers.check_group_locks filtered word loop"""
+    for word in words:
+        if word.lower() in text.lower():
+            return True
+    return False
+
+
+def build_words(size: int, rng: random.Random) -> list:
+    return [''.join(rng.choice(LETTERS) for _ in range(rng.randint(4, 10))) for _ in range(size)]
+
+
+def build_messages(count: int, words: list, rng: random.Random) -> list:
+    """Chat-like messages of 5 to 40 words, one in twenty carrying a filtered word"""
+    messages = []
+    for _ in range(count):
+        parts = [rng.choice(VOCABULARY) for _ in range(rng.randint(5, 40))]
+        if rng.random() < 0.05:
+            parts.insert(rng.randrange(len(parts)), rng.choice(words))
+        messages.append(' '.join(parts))
+    return messages
+
+
+def bench(func, messages: list) -> tuple:
+    start = time.perf_counter()
+    matched = sum(1 for message in messages if func(message))
+    elapsed = time.perf_counter() - start
+    return elapsed / len(messages) * 1e6, matched
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    sizes = [int(n) for n in sys.argv[2].split(',')] if len(sys.argv) > 2 else [10, 100, 1000, 10000]
+    rng = random.Random(42)
+
+    print(f"Messages: {count}")
+    print(f"{'words':>7} {'legacy us/msg':>14} {'regex us/msg':>13} {'automaton us/msg':>17}  matched")
+    for size in sizes:
+        words = build_words(size, rng)
+        messages = build_messages(count, words, rng)
+        pattern = re.compile('|'.join(map(re.escape, sorted(words, key=len, reverse=True))))
+        matcher = WordMatcher(words)
+
+        legacy, legacy_matched = bench(lambda text: legacy_search(words, text), messages)
+        regex, regex_matched = bench(lambda text: pattern.search(text.lower()), messages)
+        automaton, matched = bench(matcher.search, messages)
+        print(f"{size:>7} {legacy:>14.1f} {regex:>13.1f} {automaton:>17.1f}  "
+              f"{legacy_matched}/{regex_matched}/{matched}")
+
+
+if __name__ == '__main__':
+    main()
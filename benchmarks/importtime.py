@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Measure bot start-up import time with `python -X importtime` and track it over time
+
+Each run appends a record to benchmarks/importtime_history.jsonl so regressions
+show up when comparing commits on the same machine. The history is local and
+ignored by git, results from one machine are no baseline for another.
+
+Usage: python benchmarks/importtime.py [--module bot] [--runs 5] [--top 15] [--no-record]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+HISTORY_PATH = Path(__file__).parent / 'importtime_history.jsonl'
+
+# Modules that must stay out of the start-up import graph
+HEAVY_MODULES = ['yt_dlp', 'firebase_admin', 'google.cloud.firestore']
+
+
+def measure(module: str) -> dict:
+    """Import module in a fresh interpreter, return cumulative microseconds per module"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time: self [us] | cumulative | imported package"
+        _self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def git_revision() -> str:
+    """Short commit id, marked when tracked files have uncommitted changes"""
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True
+        ).stdout.strip() or 'unknown'
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD'], cwd=ROOT).returncode != 0
+        return f"{revision}-dirty" if dirty else revision
+    except OSError:
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='bot', help='module to import (default: bot)')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to sample (default: 5)')
+    parser.add_argument('--top', type=int, default=15, help='slowest modules to list (default: 15)')
+    parser.add_argument('--no-record', action='store_true', help='do not append to the history file')
+    args = parser.parse_args()
+
+    samples = [measure(args.module) for _ in range(args.runs)]
+    totals = [sample[args.module] for sample in samples]
+    total_ms = statistics.median(totals) / 1000
+
+    # Median per module across runs, nested packages included
+    names = set().union(*samples)
+    per_module = {
+        name: statistics.median(sample.get(name, 0) for sample in samples) / 1000
+        for name in names if name != args.module
+    }
+    heavy = [name for name in HEAVY_MODULES if name in names]
+
+    print(f"import {args.module}: {total_ms:.1f} ms (median of {args.runs}, min {min(totals) / 1000:.1f} ms)")
+    print("\nSlowest modules (cumulative):")
+    for name, ms in sorted(per_module.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+    print(f"\nHeavy modules at start-up: {', '.join(heavy) if heavy else 'none'}")
+
+    if not HISTORY_PATH.exists() or args.no_record:
+        previous = None
+    else:
+        lines = HISTORY_PATH.read_text(encoding='utf-8').splitlines()
+        previous = json.loads(lines[-1]) if lines else None
+    if previous and previous.get('module') == args.module:
+        change = total_ms - previous['total_ms']
+        print(f"Change since {previous['revision']}: {change:+.1f} ms")
+
+    if not args.no_record:
+        record = {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'module': args.module,
+            'python': sys.version.split()[0],
+            'runs': args.runs,
+            'total_ms': round(total_ms, 1),
+            'heavy_modules': heavy
+        }
+        with open(HISTORY_PATH, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f"Recorded in {HISTORY_PATH.relative_to(ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Load test the webhook endpoint by POSTing synthetic updates and measuring requests/sec
+
+Against a running bot (BOT_MODE=webhook, WEBHOOK_SECRET set):
+    python benchmarks/webhook_load.py --url http://127.0.0.1:8443/telegram
+
+Against an in-process webhook server whose queue is drained without handlers,
+which measures the HTTP path alone:
+    python benchmarks/webhook_load.py --local
+
+Usage: python benchmarks/webhook_load.py [--url URL] [--secret S] [--requests 5000]
+                                         [--concurrency 50] [--chats 200] [--local]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+import aiohttp
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.config import Config
+from src.services.webhook_server import WebhookServer, SECRET_HEADER
+
+
+def build_update(update_id: int, chats: int) -> dict:
+    """Synthetic text message update spread over private chats and groups"""
+    chat_id = update_id % chats + 1
+    is_group = chat_id % 4 == 0
+    chat = {'id': -1000000000000 - chat_id, 'type': 'supergroup', 'title': f'Group {chat_id}'} if is_group \
+        else {'id': chat_id, 'type': 'private', 'first_name': f'User {chat_id}'}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': chat,
+            'from': {'id': chat_id, 'is_bot': False, 'first_name': f'User {chat_id}'},
+            'text': f'load test message {update_id}'
+        }
+    }
+
+
+class LocalApplication:
+    """Just the parts of Application the webhook server touches"""
+
+    def __init__(self):
+        self.bot = None
+        self.running = True
+        self.update_queue = asyncio.Queue()
+
+    async def drain(self):
+        while True:
+            await self.update_queue.get()
+
+
+async def run_load(url: str, secret: str, total: int, concurrency: int, chats: int) -> dict:
+    """POST total updates from concurrency workers, return latencies and status counts"""
+    latencies = []
+    statuses = Counter()
+    next_id = iter(range(1, total + 1))
+    headers = {SECRET_HEADER: secret}
+    connector = aiohttp.TCPConnector(limit=concurrency)
+
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def worker():
+            for update_id in next_id:
+                start = time.perf_counter()
+                try:
+                    async with session.post(url, json=build_update(update_id, chats), headers=headers) as response:
+                        await response.read()
+                        statuses[response.status] += 1
+                except aiohttp.ClientError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {'elapsed': elapsed, 'latencies': latencies, 'statuses': statuses}
+
+
+def report(result: dict, total: int, concurrency: int):
+    latencies = sorted(result['latencies'])
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f"Requests:    {total} with {concurrency} concurrent connections")
+    print(f"Elapsed:     {result['elapsed']:.2f} s")
+    print(f"Throughput:  {total / result['elapsed']:.0f} req/s")
+    print(f"Latency:     p50 {quantiles[49] * 1000:.1f} ms  p95 {quantiles[94] * 1000:.1f} ms  "
+          f"p99 {quantiles[98] * 1000:.1f} ms  max {latencies[-1] * 1000:.1f} ms")
+    print(f"Statuses:    {dict(result['statuses'])}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='webhook endpoint (default: local server on WEBHOOK_PORT and WEBHOOK_PATH)')
+    parser.add_argument('--secret', default=Config.WEBHOOK_SECRET, help='secret token (default: WEBHOOK_SECRET)')
+    parser.add_argument('--requests', type=int, default=5000, help='updates to post (default: 5000)')
+    parser.add_argument('--concurrency', type=int, default=50, help='parallel connections (default: 50)')
+    parser.add_argument('--chats', type=int, default=200, help='distinct chats in the updates (default: 200)')
+    parser.add_argument('--local', action='store_true', help='start an in-process webhook server to test against')
+    args = parser.parse_args()
+
+    server = None
+    secret = args.secret
+    url = args.url or f"http://127.0.0.1:{Config.WEBHOOK_PORT}/{Config.WEBHOOK_PATH.lstrip('/')}"
+    if args.local:
+        application = LocalApplication()
+        server = WebhookServer(application, listen='127.0.0.1', secret_token=secret)
+        secret = server.secret_token
+        await server.start()
+        drain = asyncio.create_task(application.drain())
+    elif not secret:
+        parser.error('--secret or WEBHOOK_SECRET is required against a running bot')
+
+    try:
+        result = await run_load(url, secret, args.requests, args.concurrency, args.chats)
+        report(result, args.requests, args.concurrency)
+        if server:
+            print(f"Server:      {server.get_stats()}")
+    finally:
+        if server:
+            drain.cancel()
+            await server.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
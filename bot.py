@@ -16,15 +16,22 @@ from datetime import datetime
 from pathlib import Path
 
 from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from telegram.ext import Application, ContextTypes, CommandHandler, MessageHandler, CallbackQueryHandler, filters
 from telegram.error import TelegramError
 
 from config.config import Config
 from src.handlers.main_handlers import MainHandlers
 from src.handlers.admin_handlers import AdminHandlers
 from src.handlers.group_handlers import GroupHandlers
+from src.handlers.middleware import BotContext, request_middleware
+from src.handlers.router import CallbackRouter
+from src.handlers.update_processor import update_processor
+from src.services.rate_limiter import rate_limiter
 from src.utils.logger import Logger
 from src.services.firebase import firebase_service
+from src.services.downloader import download_service
+from src.services.broadcast import broadcast_service
+from src.services.scheduler import broadcast_scheduler
 
 class TelegramBot:
     """Main Telegram Bot class"""
@@ -36,6 +43,9 @@ class TelegramBot:
         self.group_handlers = GroupHandlers()
         self.application = None
         self.running = False
+        self.stop_event = None
+        self.callback_router = None
+        self.webhook_server = None
         
         # Validate configuration
         try:
@@ -50,29 +60,34 @@ class TelegramBot:
         if not self.application:
             return
         
+        # Request context is resolved before and recorded after all other handlers
+        for handler, group in request_middleware.get_handlers():
+            self.application.add_handler(handler, group)
+        
         # Main handlers
         self.application.add_handler(CommandHandler("start", self.main_handlers.start_command))
         self.application.add_handler(CommandHandler("help", self.main_handlers.help_command))
         self.application.add_handler(CommandHandler("admin", self.main_handlers.admin_command))
         self.application.add_handler(CommandHandler("statistics", self.main_handlers.statistics_command))
         self.application.add_handler(CommandHandler("language", self.main_handlers.language_command))
+        self.application.add_handler(CommandHandler("audio", self.main_handlers.audio_command))
         
-        # Group handlers
-        for handler in self.group_handlers.get_handlers():
-            self.application.add_handler(handler)
-        
-        # Admin conversation handler
+        # Admin conversation handler, before the group text handler so broadcast input reaches it
         self.application.add_handler(self.admin_handlers.get_conversation_handler())
         
-        # Admin callback handlers
-        for handler in self.admin_handlers.get_callback_handlers():
+        # Group handlers
+        for handler in self.group_handlers.get_handlers():
             self.application.add_handler(handler)
         
         # Message handlers
         self.application.add_handler(MessageHandler(filters.ALL & ~filters.COMMAND, self.main_handlers.handle_message))
         
-        # Callback query handlers
-        self.application.add_handler(CallbackQueryHandler(self.main_handlers.handle_callback_query))
+        # Callback queries outside the admin conversation all go through one router
+        self.callback_router = CallbackRouter()
+        self.main_handlers.register_callbacks(self.callback_router)
+        self.group_handlers.register_callbacks(self.callback_router)
+        self.admin_handlers.register_callbacks(self.callback_router)
+        self.application.add_handler(self.callback_router.get_handler())
         
         # Error handler
         self.application.add_error_handler(self.error_handler)
@@ -91,11 +106,31 @@ class TelegramBot:
             except Exception:
                 pass
     
+    async def initialize_services(self):
+        """Construct services in worker threads so they load side by side"""
+        await asyncio.gather(
+            asyncio.to_thread(firebase_service.resolve),
+            asyncio.to_thread(download_service.resolve)
+        )
+        self.logger.info("Services initialized")
+    
     async def start_bot(self):
         """Start the bot"""
         try:
+            Config.ensure_directories()
+            
             # Create application
-            self.application = Application.builder().token(Config.BOT_TOKEN).build()
+            builder = (
+                Application.builder()
+                .token(Config.BOT_TOKEN)
+                .context_types(ContextTypes(context=BotContext))
+                .concurrent_updates(update_processor)
+                .rate_limiter(rate_limiter)
+            )
+            if Config.use_webhook():
+                # Updates arrive through the webhook server, no polling updater
+                builder = builder.updater(None)
+            self.application = builder.build()
             
             # Setup handlers
             await self.setup_handlers()
@@ -104,13 +139,22 @@ class TelegramBot:
             self.running = True
             self.logger.info("Starting bot...")
             
-            # Start polling
-            await self.application.initialize()
+            # Connect to Telegram while services initialize
+            await asyncio.gather(self.application.initialize(), self.initialize_services())
+            
             await self.application.start()
-            await self.application.updater.start_polling(drop_pending_updates=True)
+            if Config.use_webhook():
+                await self.start_webhook()
+            else:
+                # Chat member updates keep admin rosters current, Telegram only sends them when asked
+                await self.application.updater.start_polling(drop_pending_updates=True, allowed_updates=Update.ALL_TYPES)
             
             self.logger.info("Bot started successfully")
             
+            # Resume downloads interrupted by the last shutdown
+            asyncio.create_task(self.main_handlers.resume_pending_downloads(self.application.bot))
+            asyncio.create_task(self.admin_handlers.start_broadcasts(self.application.bot))
+            
             # Send startup notification to admin (if configured)
             await self.send_startup_notification()
             
@@ -118,6 +162,15 @@ class TelegramBot:
             self.logger.error(f"Error starting bot: {e}")
             raise
     
+    async def start_webhook(self):
+        """Serve updates through the embedded webhook server"""
+        # aiohttp is only imported when webhook mode is used
+        from src.services.webhook_server import WebhookServer
+        
+        self.webhook_server = WebhookServer(self.application)
+        await self.webhook_server.start()
+        await self.webhook_server.set_webhook(drop_pending_updates=True)
+    
     async def send_startup_notification(self):
         """Send startup notification to admin"""
         try:
@@ -150,32 +203,51 @@ Bot is now online and ready to serve! 🚀
             self.logger.info("Stopping bot...")
             self.running = False
             
+            if self.webhook_server:
+                await self.webhook_server.stop()
+            
+            # Broadcasts settle their current chunk while the bot can still send
+            await broadcast_scheduler.shutdown()
+            await broadcast_service.shutdown()
+            
             if self.application:
-                await self.application.updater.stop()
-                await self.application.stop()
+                if self.application.updater and self.application.updater.running:
+                    await self.application.updater.stop()
+                if self.application.running:
+                    await self.application.stop()
                 await self.application.shutdown()
             
+            if download_service.is_initialized:
+                download_service.close()
+            
             self.logger.info("Bot stopped successfully")
             
         except Exception as e:
             self.logger.error(f"Error stopping bot: {e}")
     
+    async def serve(self):
+        """Start the bot and keep it running until a stop signal"""
+        self.stop_event = asyncio.Event()
+        
+        # Setup signal handlers
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop_event.set)
+        
+        try:
+            await self.start_bot()
+            await self.stop_event.wait()
+        finally:
+            await self.stop_bot()
+    
     def run(self):
         """Run the bot"""
         try:
-            # Setup signal handlers
-            signal.signal(signal.SIGINT, self.stop_bot)
-            signal.signal(signal.SIGTERM, self.stop_bot)
-            
-            # Start bot
-            asyncio.run(self.start_bot())
-            
+            asyncio.run(self.serve())
         except KeyboardInterrupt:
             self.logger.info("Received keyboard interrupt")
         except Exception as e:
             self.logger.error(f"Fatal error: {e}")
-        finally:
-            asyncio.run(self.stop_bot())
 
 def main():
     """Main function"""
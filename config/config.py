@@ -1,4 +1,5 @@
 import os
+import socket
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -21,17 +22,89 @@ class Config:
     DOWNLOAD_PATH = os.getenv('DOWNLOAD_PATH', str(BASE_DIR / 'downloads'))
     TEMP_PATH = os.getenv('TEMP_PATH', str(BASE_DIR / 'temp'))
     LOGS_PATH = str(BASE_DIR / 'logs')
-    
-    # Create directories if they don't exist
-    Path(DOWNLOAD_PATH).mkdir(parents=True, exist_ok=True)
-    Path(TEMP_PATH).mkdir(parents=True, exist_ok=True)
-    Path(LOGS_PATH).mkdir(parents=True, exist_ok=True)
+    JOBS_PATH = os.getenv('JOBS_PATH', str(Path(TEMP_PATH) / 'jobs'))
+    MEDIA_STORE_PATH = os.getenv('MEDIA_STORE_PATH', str(Path(DOWNLOAD_PATH) / 'store'))
     
     # Bot Settings
     MAX_DOWNLOAD_SIZE = int(os.getenv('MAX_DOWNLOAD_SIZE', 50000000))  # 50MB
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     MAX_CONCURRENT_DOWNLOADS = int(os.getenv('MAX_CONCURRENT_DOWNLOADS', 5))
+    MAX_CONCURRENT_UPDATES = int(os.getenv('MAX_CONCURRENT_UPDATES', 32))  # chats handled in parallel
+    MAX_PENDING_UPDATES = int(os.getenv('MAX_PENDING_UPDATES', 512))  # updates queued behind their chat
     DOWNLOAD_TIMEOUT = int(os.getenv('DOWNLOAD_TIMEOUT', 300))
+    DOWNLOAD_RETRIES = int(os.getenv('DOWNLOAD_RETRIES', 3))
+    PART_FILE_TTL = int(os.getenv('PART_FILE_TTL', 24))  # hours to keep unfinished partial files
+    TELEGRAM_UPLOAD_LIMIT = int(os.getenv('TELEGRAM_UPLOAD_LIMIT', 50000000))  # Bot API limit
+    SPLIT_OVERSIZED_MEDIA = os.getenv('SPLIT_OVERSIZED_MEDIA', 'False').lower() == 'true'
+    SPLIT_MODE = os.getenv('SPLIT_MODE', 'time')  # 'time' (stream copy) or 'volumes' (byte ranges)
+    MAX_SPLIT_SOURCE_SIZE = int(os.getenv('MAX_SPLIT_SOURCE_SIZE', 2000000000))  # 2GB
+    MEDIA_STORE_MAX_SIZE = int(os.getenv('MEDIA_STORE_MAX_SIZE', 5000000000))  # 5GB, 0 disables the store
+    MEDIA_STORE_POLICY = os.getenv('MEDIA_STORE_POLICY', 'lru')  # 'lru' or 'lfu'
+    
+    # Update Delivery
+    BOT_MODE = os.getenv('BOT_MODE', 'polling')  # 'polling' or 'webhook'
+    WEBHOOK_URL = os.getenv('WEBHOOK_URL')  # public https base URL, e.g. https://bot.example.com
+    WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+    WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+    WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram')
+    WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')  # generated on each start when empty
+    WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', 40))  # 1-100, enforced by Telegram
+    
+    # Outbound Rate Limits (Telegram flood control)
+    RATE_LIMIT_GLOBAL = float(os.getenv('RATE_LIMIT_GLOBAL', 30))  # requests per second
+    RATE_LIMIT_PRIVATE = float(os.getenv('RATE_LIMIT_PRIVATE', 1))  # messages per second per private chat
+    RATE_LIMIT_GROUP = float(os.getenv('RATE_LIMIT_GROUP', 20))  # messages per minute per group
+    RATE_LIMIT_BURST = int(os.getenv('RATE_LIMIT_BURST', 3))  # messages a chat may receive back to back
+    RATE_LIMIT_MAX_RETRIES = int(os.getenv('RATE_LIMIT_MAX_RETRIES', 3))  # retries after a flood wait
+    
+    # Broadcasts
+    BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', 30))  # sends in flight per broadcast
+    BROADCAST_PAGE_SIZE = int(os.getenv('BROADCAST_PAGE_SIZE', 500))  # recipients read per storage query
+    BROADCAST_CHUNK_SIZE = int(os.getenv('BROADCAST_CHUNK_SIZE', 100))  # recipients per checkpoint
+    BROADCAST_PROGRESS_INTERVAL = int(os.getenv('BROADCAST_PROGRESS_INTERVAL', 5))  # seconds between card updates
+    BROADCAST_LEASE = int(os.getenv('BROADCAST_LEASE', 300))  # seconds before a silent instance's broadcast is taken over
+    BROADCAST_SETUP_TIMEOUT = int(os.getenv('BROADCAST_SETUP_TIMEOUT', 900))  # seconds an unfinished broadcast setup is kept
+    STORAGE_RETRIES = int(os.getenv('STORAGE_RETRIES', 4))  # attempts per broadcast storage call
+    STORAGE_RETRY_DELAY = float(os.getenv('STORAGE_RETRY_DELAY', 1))  # seconds before the first retry, doubled after each
+    SCHEDULER_RELOAD_INTERVAL = int(os.getenv('SCHEDULER_RELOAD_INTERVAL', 600))  # seconds between schedule reloads
+    INSTANCE_ID = os.getenv('INSTANCE_ID') or socket.gethostname()  # owner recorded on claimed broadcasts
+    
+    # Moderation
+    MODERATION_CACHE_SIZE = int(os.getenv('MODERATION_CACHE_SIZE', 10000))  # groups with compiled rules kept in memory
+    ADMIN_ROSTER_TTL = int(os.getenv('ADMIN_ROSTER_TTL', 600))  # seconds before a group's admins are read again
+    
+    # Extractor Settings
+    YDL_SOCKET_TIMEOUT = int(os.getenv('YDL_SOCKET_TIMEOUT', 20))
+    YDL_RETRIES = int(os.getenv('YDL_RETRIES', 3))
+    YDL_HTTP_CHUNK_SIZE = int(os.getenv('YDL_HTTP_CHUNK_SIZE', 10485760))  # 10MB
+    YDL_BUFFER_SIZE = int(os.getenv('YDL_BUFFER_SIZE', 65536))
+    YDL_RECYCLE_AFTER = int(os.getenv('YDL_RECYCLE_AFTER', 100))  # jobs per instance
+    
+    # Metadata Prefetch
+    ENABLE_FORMAT_PICKER = os.getenv('ENABLE_FORMAT_PICKER', 'True').lower() == 'true'
+    FORMAT_PICKER_CHOICES = int(os.getenv('FORMAT_PICKER_CHOICES', 5))
+    INFO_CACHE_TTL = int(os.getenv('INFO_CACHE_TTL', 900))  # seconds
+    INFO_CACHE_SIZE = int(os.getenv('INFO_CACHE_SIZE', 256))
+    
+    # Audio Downloads
+    AUDIO_PLATFORMS = os.getenv('AUDIO_PLATFORMS', 'soundcloud').split(',')
+    AUDIO_FORMAT = os.getenv('AUDIO_FORMAT', 'best')  # 'best' keeps the source codec, or m4a/opus/mp3
+    
+    # Playlist and Channel Downloads
+    PLAYLIST_MAX_ITEMS = int(os.getenv('PLAYLIST_MAX_ITEMS', 50))
+    PLAYLIST_CONCURRENCY = int(os.getenv('PLAYLIST_CONCURRENCY', 2))  # parallel items per batch
+    PLAYLIST_SIZE_BUDGET = int(os.getenv('PLAYLIST_SIZE_BUDGET', 500000000))  # 500MB per batch
+    
+    # Segmented (HLS/DASH) Downloads
+    CONCURRENT_FRAGMENT_DOWNLOADS = int(os.getenv('CONCURRENT_FRAGMENT_DOWNLOADS', 4))
+    MIN_FRAGMENT_RATE = int(os.getenv('MIN_FRAGMENT_RATE', 262144))  # 256KB/s per fragment stream
+    EXTERNAL_DOWNLOADER = os.getenv('EXTERNAL_DOWNLOADER', '')  # e.g. aria2c
+    EXTERNAL_DOWNLOADER_ARGS = os.getenv('EXTERNAL_DOWNLOADER_ARGS', '')
+    
+    # Bandwidth (bytes per second, 0 = unlimited)
+    INGRESS_BANDWIDTH_LIMIT = int(os.getenv('INGRESS_BANDWIDTH_LIMIT', 0))
+    EGRESS_BANDWIDTH_LIMIT = int(os.getenv('EGRESS_BANDWIDTH_LIMIT', 0))
+    MIN_JOB_BANDWIDTH = int(os.getenv('MIN_JOB_BANDWIDTH', 131072))  # 128KB/s guaranteed per job
     
     # Group Management
     ENABLE_GROUP_MANAGEMENT = os.getenv('ENABLE_GROUP_MANAGEMENT', 'True').lower() == 'true'
@@ -45,18 +118,37 @@ class Config:
     CURRENCY_API_KEY = os.getenv('CURRENCY_API_KEY')
     WEATHER_API_KEY = os.getenv('WEATHER_API_KEY')
     
-    # Supported Platforms
-    SUPPORTED_PLATFORMS = [
-        'youtube.com', 'youtu.be', 'instagram.com', 'tiktok.com', 
-        'twitter.com', 'x.com', 'facebook.com', 'pinterest.com',
-        'vimeo.com', 'dailymotion.com', 'twitch.tv', 'soundcloud.com',
-        't.me'
-    ]
+    # Supported Platforms (platform id -> host suffixes)
+    PLATFORM_DOMAINS = {
+        'youtube': ['youtube.com', 'youtu.be', 'youtube-nocookie.com'],
+        'instagram': ['instagram.com'],
+        'tiktok': ['tiktok.com'],
+        'twitter': ['twitter.com', 'x.com'],
+        'facebook': ['facebook.com', 'fb.watch'],
+        'pinterest': ['pinterest.com', 'pin.it'],
+        'vimeo': ['vimeo.com'],
+        'dailymotion': ['dailymotion.com', 'dai.ly'],
+        'twitch': ['twitch.tv'],
+        'soundcloud': ['soundcloud.com'],
+        'telegram': ['t.me'],
+    }
+    SUPPORTED_PLATFORMS = [domain for domains in PLATFORM_DOMAINS.values() for domain in domains]
     
     # Languages
     DEFAULT_LANGUAGE = 'en'
     SUPPORTED_LANGUAGES = ['en', 'fa']
     
+    @classmethod
+    def ensure_directories(cls):
+        """Create working directories if they don't exist"""
+        for path in (cls.DOWNLOAD_PATH, cls.TEMP_PATH, cls.LOGS_PATH, cls.JOBS_PATH):
+            Path(path).mkdir(parents=True, exist_ok=True)
+    
+    @classmethod
+    def use_webhook(cls) -> bool:
+        """Check if updates are received through the webhook server"""
+        return cls.BOT_MODE.lower() == 'webhook'
+    
     @classmethod
     def validate(cls):
         """Validate configuration"""
@@ -66,6 +158,9 @@ class Config:
             if not getattr(cls, field):
                 raise ValueError(f"Required field {field} is missing")
         
+        if cls.use_webhook() and not cls.WEBHOOK_URL:
+            raise ValueError("Required field WEBHOOK_URL is missing for webhook mode")
+        
         if not Path(cls.FIREBASE_CREDENTIALS_PATH).exists():
             raise ValueError(f"Firebase credentials file not found at {cls.FIREBASE_CREDENTIALS_PATH}")
         
@@ -1,14 +1,27 @@
 import asyncio
 from datetime import datetime, timedelta
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message
-from telegram.ext import ContextTypes, ConversationHandler, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message, Bot
+from telegram.ext import (
+    ContextTypes, ConversationHandler, CommandHandler, MessageHandler, CallbackQueryHandler, TypeHandler, filters
+)
 from typing import Optional, Dict, Any, List
 
 from config.config import Config
 from src.services.firebase import firebase_service
+from src.handlers.middleware import load_request
+from src.handlers.router import CallbackRouter, encode_callback
+from src.services.broadcast import broadcast_service, BroadcastJob, STATUS_RUNNING, STATUS_PAUSED, ERROR_CLASSES
+from src.services.scheduler import broadcast_scheduler
 from src.utils.logger import Logger
 from src.utils.language import language_manager, _
 
+# Activity windows an admin can target, in days, 0 for everyone
+ACTIVITY_WINDOWS = (0, 7, 30, 90)
+
+# Messages of an album arrive as separate updates, the confirmation waits this long for them
+ALBUM_WAIT = 1.5
+ALBUM_PART = filters.UpdateType.MESSAGE & filters.ATTACHMENT
+
 class AdminHandlers:
     """Admin handlers for the bot"""
     
@@ -22,6 +35,7 @@ class AdminHandlers:
         self.BROADCAST_MESSAGE = 2
         self.BROADCAST_SCHEDULE = 3
         self.BROADCAST_CONFIRM = 4
+        self.BROADCAST_VARIANT = 5
     
     async def broadcast_users(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle broadcast to users only"""
@@ -30,7 +44,7 @@ class AdminHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data or not user_data.get('is_admin', False):
                 await query.answer("❌ Access denied", show_alert=True)
                 return
@@ -41,7 +55,11 @@ class AdminHandlers:
             self.broadcast_states[user.id] = {
                 'type': 'users',
                 'message': None,
-                'scheduled_time': None
+                'scheduled_time': None,
+                'variants': {},  # language -> message for recipients of that language
+                'sources': {},  # 'default' or language -> captured message copied to recipients
+                'audience': {'languages': [], 'active_days': 0},
+                'variant_language': None
             }
             
             # Ask for message
@@ -55,6 +73,7 @@ class AdminHandlers:
             
             # Set conversation state
             self.admin_conversations[user.id] = self.BROADCAST_MESSAGE
+            return self.BROADCAST_MESSAGE
             
         except Exception as e:
             self.logger.error(f"Error in broadcast_users: {e}")
@@ -66,7 +85,7 @@ class AdminHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data or not user_data.get('is_admin', False):
                 await query.answer("❌ Access denied", show_alert=True)
                 return
@@ -77,7 +96,11 @@ class AdminHandlers:
             self.broadcast_states[user.id] = {
                 'type': 'users_and_groups',
                 'message': None,
-                'scheduled_time': None
+                'scheduled_time': None,
+                'variants': {},  # language -> message for recipients of that language
+                'sources': {},  # 'default' or language -> captured message copied to recipients
+                'audience': {'languages': [], 'active_days': 0},
+                'variant_language': None
             }
             
             # Ask for message
@@ -91,6 +114,7 @@ class AdminHandlers:
             
             # Set conversation state
             self.admin_conversations[user.id] = self.BROADCAST_MESSAGE
+            return self.BROADCAST_MESSAGE
             
         except Exception as e:
             self.logger.error(f"Error in broadcast_users_groups: {e}")
@@ -102,7 +126,7 @@ class AdminHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data or not user_data.get('is_admin', False):
                 await query.answer("❌ Access denied", show_alert=True)
                 return
@@ -113,7 +137,11 @@ class AdminHandlers:
             self.broadcast_states[user.id] = {
                 'type': 'scheduled',
                 'message': None,
-                'scheduled_time': None
+                'scheduled_time': None,
+                'variants': {},  # language -> message for recipients of that language
+                'sources': {},  # 'default' or language -> captured message copied to recipients
+                'audience': {'languages': [], 'active_days': 0},
+                'variant_language': None
             }
             
             # Ask for message
@@ -127,6 +155,7 @@ class AdminHandlers:
             
             # Set conversation state
             self.admin_conversations[user.id] = self.BROADCAST_MESSAGE
+            return self.BROADCAST_MESSAGE
             
         except Exception as e:
             self.logger.error(f"Error in broadcast_scheduled: {e}")
@@ -138,7 +167,7 @@ class AdminHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data or not user_data.get('is_admin', False):
                 await query.answer("❌ Access denied", show_alert=True)
                 return
@@ -173,7 +202,7 @@ class AdminHandlers:
                 keyboard.append([
                     InlineKeyboardButton(
                         f"{broadcast_type} - {time_str}",
-                        callback_data=f'delete_broadcast_{broadcast_id}'
+                        callback_data=encode_callback('delete_broadcast', broadcast_id)
                     )
                 ])
             
@@ -188,25 +217,24 @@ class AdminHandlers:
         except Exception as e:
             self.logger.error(f"Error in broadcast_delete: {e}")
     
-    async def delete_broadcast_confirm(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+    async def delete_broadcast_confirm(self, update: Update, context: ContextTypes.DEFAULT_TYPE, broadcast_id: str):
         """Confirm broadcast deletion"""
         try:
             query = update.callback_query
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data or not user_data.get('is_admin', False):
                 await query.answer("❌ Access denied", show_alert=True)
                 return
             
             language = user_data.get('language', 'en')
             
-            # Get broadcast ID from callback data
-            broadcast_id = query.data.split('_')[-1]
-            
             # Delete broadcast
             success = firebase_service.delete_broadcast(broadcast_id)
+            if success:
+                broadcast_scheduler.unschedule(broadcast_id)
             
             if success:
                 await query.edit_message_text(
@@ -242,11 +270,12 @@ class AdminHandlers:
                 return
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en')
             
-            # Store message
-            broadcast_state['message'] = message.text
+            # Any message is delivered as a copy, media included
+            broadcast_state['sources']['default'] = self.get_message_source(message)
+            broadcast_state['message'] = self.get_message_preview(message, language)
             
             # If scheduled broadcast, ask for time
             if broadcast_state['type'] == 'scheduled':
@@ -259,13 +288,47 @@ class AdminHandlers:
                 )
                 
                 self.admin_conversations[user.id] = self.BROADCAST_SCHEDULE
-            else:
-                # Show confirmation
-                await self.show_broadcast_confirmation(update, context)
+                return self.BROADCAST_SCHEDULE
+            
+            # Show confirmation
+            return await self.show_broadcast_confirmation(update, context)
             
         except Exception as e:
             self.logger.error(f"Error handling broadcast message: {e}")
     
+    def get_message_source(self, message: Message) -> Dict[str, Any]:
+        """Reference to a captured message, copied to recipients instead of re-uploaded"""
+        return {
+            'chat_id': message.chat_id,
+            'message_ids': [message.message_id],
+            'media_group_id': message.media_group_id
+        }
+    
+    def get_message_preview(self, message: Message, language: str) -> str:
+        """Text shown for a captured message in confirmations and lists"""
+        text = message.text or message.caption or ''
+        if message.effective_attachment:
+            text = f"{_('BROADCAST_MEDIA', language)} {text}".strip()
+        return text
+    
+    async def handle_broadcast_album_part(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Add later messages of an album to the captured broadcast message"""
+        try:
+            message = update.message
+            broadcast_state = self.broadcast_states.get(message.from_user.id)
+            if not broadcast_state or not message.media_group_id:
+                return
+            
+            for source in broadcast_state['sources'].values():
+                if source['media_group_id'] == message.media_group_id and source['chat_id'] == message.chat_id:
+                    # Copies must list the album in its original order
+                    source['message_ids'].append(message.message_id)
+                    source['message_ids'].sort()
+                    return
+            
+        except Exception as e:
+            self.logger.error(f"Error handling broadcast album part: {e}")
+    
     async def handle_broadcast_schedule(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle broadcast schedule input"""
         try:
@@ -282,7 +345,7 @@ class AdminHandlers:
                 return
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en')
             
             # Parse schedule time
@@ -313,10 +376,11 @@ class AdminHandlers:
                     )
                     return
                 
-                broadcast_state['scheduled_time'] = scheduled_time
+                # Stored as an absolute instant, the admin typed local time
+                broadcast_state['scheduled_time'] = scheduled_time.astimezone()
                 
                 # Show confirmation
-                await self.show_broadcast_confirmation(update, context)
+                return await self.show_broadcast_confirmation(update, context)
                 
             except ValueError:
                 await message.reply_text(
@@ -329,6 +393,48 @@ class AdminHandlers:
         except Exception as e:
             self.logger.error(f"Error handling broadcast schedule: {e}")
     
+    def get_broadcast_confirmation(self, broadcast_state: Dict[str, Any], language: str):
+        """Get confirmation text and audience controls of a broadcast being created"""
+        audience = broadcast_state['audience']
+        languages = ', '.join(audience['languages']) if audience['languages'] else _("AUDIENCE_ALL_LANGUAGES", language)
+        if audience['active_days']:
+            activity = _("AUDIENCE_ACTIVE_DAYS", language, days=audience['active_days'])
+        else:
+            activity = _("AUDIENCE_ANY_ACTIVITY", language)
+        
+        confirmation_text = _("BROADCAST_CONFIRMATION", language)
+        confirmation_text += f"\n\n{_('BROADCAST_TYPE', language)}: {broadcast_state['type']}"
+        confirmation_text += f"\n{_('BROADCAST_AUDIENCE', language)}: {languages}, {activity}"
+        confirmation_text += f"\n{_('BROADCAST_MESSAGE', language)}:\n{broadcast_state['message']}"
+        for variant_language, text in broadcast_state['variants'].items():
+            confirmation_text += f"\n\n{_('BROADCAST_VARIANT', language, language=variant_language)}:\n{text}"
+        
+        if broadcast_state['scheduled_time']:
+            confirmation_text += f"\n{_('SCHEDULED_TIME', language)}: {broadcast_state['scheduled_time'].strftime('%Y-%m-%d %H:%M')}"
+        
+        # Create confirmation keyboard
+        keyboard = [
+            [
+                InlineKeyboardButton(_("BTN_AUDIENCE_LANGUAGE", language, value=languages), callback_data=encode_callback('bc_aud', 'language')),
+                InlineKeyboardButton(_("BTN_AUDIENCE_ACTIVE", language, value=activity), callback_data=encode_callback('bc_aud', 'active'))
+            ],
+            [
+                InlineKeyboardButton(_("BTN_BROADCAST_VARIANT", language, language=code), callback_data=encode_callback('bc_var', code))
+                for code in Config.SUPPORTED_LANGUAGES
+            ],
+            [InlineKeyboardButton(_("BTN_CONFIRM", language), callback_data='confirm_broadcast')],
+            [InlineKeyboardButton(_("BTN_CANCEL", language), callback_data='admin_broadcast')]
+        ]
+        return confirmation_text, InlineKeyboardMarkup(keyboard)
+    
+    async def send_broadcast_confirmation(self, bot: Bot, chat_id: int, broadcast_state: Dict[str, Any],
+                                          language: str, delay: float = 0):
+        """Send the confirmation of a broadcast being created"""
+        if delay:
+            await asyncio.sleep(delay)
+        confirmation_text, reply_markup = self.get_broadcast_confirmation(broadcast_state, language)
+        await bot.send_message(chat_id, confirmation_text, reply_markup=reply_markup)
+    
     async def show_broadcast_confirmation(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show broadcast confirmation"""
         try:
@@ -338,36 +444,107 @@ class AdminHandlers:
             # Get broadcast state
             broadcast_state = self.broadcast_states.get(user.id)
             if not broadcast_state:
-                return
+                return ConversationHandler.END
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en')
             
-            # Create confirmation message
-            confirmation_text = _("BROADCAST_CONFIRMATION", language)
-            confirmation_text += f"\n\n{_('BROADCAST_TYPE', language)}: {broadcast_state['type']}"
-            confirmation_text += f"\n{_('BROADCAST_MESSAGE', language)}:\n{broadcast_state['message']}"
+            if message.media_group_id:
+                # The rest of the album arrives as separate updates, confirm once it is in
+                context.application.create_task(
+                    self.send_broadcast_confirmation(context.bot, message.chat_id, broadcast_state, language, ALBUM_WAIT),
+                    update=update
+                )
+            else:
+                await self.send_broadcast_confirmation(context.bot, message.chat_id, broadcast_state, language)
             
-            if broadcast_state['scheduled_time']:
-                confirmation_text += f"\n{_('SCHEDULED_TIME', language)}: {broadcast_state['scheduled_time'].strftime('%Y-%m-%d %H:%M')}"
+            self.admin_conversations[user.id] = self.BROADCAST_CONFIRM
+            return self.BROADCAST_CONFIRM
             
-            # Create confirmation keyboard
-            keyboard = [
-                [InlineKeyboardButton(_("BTN_CONFIRM", language), callback_data='confirm_broadcast')],
-                [InlineKeyboardButton(_("BTN_CANCEL", language), callback_data='admin_broadcast')]
-            ]
-            reply_markup = InlineKeyboardMarkup(keyboard)
+        except Exception as e:
+            self.logger.error(f"Error showing broadcast confirmation: {e}")
+    
+    async def toggle_broadcast_audience(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Cycle the language or activity filter of a broadcast being created"""
+        try:
+            query = update.callback_query
+            user = query.from_user
             
-            await message.reply_text(
-                confirmation_text,
-                reply_markup=reply_markup
+            broadcast_state = self.broadcast_states.get(user.id)
+            if not broadcast_state:
+                return ConversationHandler.END
+            
+            user_data = load_request(update, context).user_data
+            language = user_data.get('language', 'en')
+            
+            audience = broadcast_state['audience']
+            if query.data.endswith('language'):
+                # All languages, then each supported language alone
+                options = [[]] + [[code] for code in Config.SUPPORTED_LANGUAGES]
+                index = options.index(audience['languages']) if audience['languages'] in options else 0
+                audience['languages'] = options[(index + 1) % len(options)]
+            else:
+                index = ACTIVITY_WINDOWS.index(audience['active_days']) if audience['active_days'] in ACTIVITY_WINDOWS else 0
+                audience['active_days'] = ACTIVITY_WINDOWS[(index + 1) % len(ACTIVITY_WINDOWS)]
+            
+            await query.answer()
+            confirmation_text, reply_markup = self.get_broadcast_confirmation(broadcast_state, language)
+            await query.edit_message_text(confirmation_text, reply_markup=reply_markup)
+            return self.BROADCAST_CONFIRM
+            
+        except Exception as e:
+            self.logger.error(f"Error toggling broadcast audience: {e}")
+    
+    async def request_broadcast_variant(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Ask for the message recipients of one language receive"""
+        try:
+            query = update.callback_query
+            user = query.from_user
+            
+            broadcast_state = self.broadcast_states.get(user.id)
+            if not broadcast_state:
+                return ConversationHandler.END
+            
+            user_data = load_request(update, context).user_data
+            language = user_data.get('language', 'en')
+            
+            broadcast_state['variant_language'] = query.data.split(':', 1)[1]
+            await query.answer()
+            await query.edit_message_text(
+                _("PLEASE_SEND_BROADCAST_VARIANT", language, language=broadcast_state['variant_language']),
+                reply_markup=InlineKeyboardMarkup([[
+                    InlineKeyboardButton(_("BTN_CANCEL", language), callback_data='admin_broadcast')
+                ]])
             )
             
-            self.admin_conversations[user.id] = self.BROADCAST_CONFIRM
+            self.admin_conversations[user.id] = self.BROADCAST_VARIANT
+            return self.BROADCAST_VARIANT
             
         except Exception as e:
-            self.logger.error(f"Error showing broadcast confirmation: {e}")
+            self.logger.error(f"Error requesting broadcast variant: {e}")
+    
+    async def handle_broadcast_variant(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Store the message of one language and return to the confirmation"""
+        try:
+            message = update.message
+            user = message.from_user
+            
+            broadcast_state = self.broadcast_states.get(user.id)
+            if not broadcast_state or not broadcast_state['variant_language']:
+                return ConversationHandler.END
+            
+            user_data = load_request(update, context).user_data
+            language = user_data.get('language', 'en')
+            
+            variant_language = broadcast_state['variant_language']
+            broadcast_state['sources'][variant_language] = self.get_message_source(message)
+            broadcast_state['variants'][variant_language] = self.get_message_preview(message, language)
+            broadcast_state['variant_language'] = None
+            return await self.show_broadcast_confirmation(update, context)
+            
+        except Exception as e:
+            self.logger.error(f"Error handling broadcast variant: {e}")
     
     async def confirm_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Confirm and execute broadcast"""
@@ -378,24 +555,36 @@ class AdminHandlers:
             # Get broadcast state
             broadcast_state = self.broadcast_states.get(user.id)
             if not broadcast_state:
-                return
+                return ConversationHandler.END
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en')
             
+            # This message becomes the live progress card of the broadcast
+            progress = {
+                'chat_id': query.message.chat_id,
+                'message_id': query.message.message_id,
+                'language': language
+            }
+            
             # Create broadcast
             broadcast_id = firebase_service.create_broadcast(
                 message=broadcast_state['message'],
                 target_type=broadcast_state['type'],
-                scheduled_time=broadcast_state['scheduled_time']
+                scheduled_time=broadcast_state['scheduled_time'],
+                progress=progress,
+                variants=broadcast_state['variants'],
+                audience=broadcast_state['audience'],
+                sources=broadcast_state['sources']
             )
             
-            if broadcast_id:
-                # Execute broadcast immediately if not scheduled
-                if not broadcast_state['scheduled_time']:
-                    await self.execute_broadcast(broadcast_id)
-                
+            if broadcast_id and not broadcast_state['scheduled_time']:
+                # Deliver in the background, the card follows progress
+                await query.edit_message_text(_("BROADCAST_STARTING", language))
+                await broadcast_service.claim_and_start(context.bot, broadcast_id, on_progress=self.update_broadcast_card)
+            elif broadcast_id:
+                broadcast_scheduler.schedule(broadcast_id, broadcast_state['scheduled_time'])
                 await query.edit_message_text(
                     _("BROADCAST_CREATED", language),
                     reply_markup=InlineKeyboardMarkup([[
@@ -419,58 +608,123 @@ class AdminHandlers:
             
         except Exception as e:
             self.logger.error(f"Error confirming broadcast: {e}")
+        
+        return ConversationHandler.END
+    
+    def get_broadcast_card(self, job: BroadcastJob, language: str):
+        """Get progress text and controls of a broadcast"""
+        text = _("BROADCAST_PROGRESS", language,
+                 status=_(f"BROADCAST_STATUS_{job.status.upper()}", language),
+                 done=job.done, total=job.total, sent=job.sent, failed=job.failed, skipped=job.skipped)
+        if job.failed:
+            text += _("BROADCAST_ERRORS", language, **{error: job.errors.get(error, 0) for error in ERROR_CLASSES})
+        if job.status == STATUS_RUNNING and job.rate:
+            eta = job.eta
+            text += _("BROADCAST_SPEED", language, rate=f"{job.rate:.1f}",
+                      eta=timedelta(seconds=round(eta)) if eta is not None else '-')
+        
+        keyboard = []
+        if job.status == STATUS_RUNNING:
+            keyboard.append([
+                InlineKeyboardButton(_("BTN_PAUSE", language), callback_data=encode_callback('bc', 'pause', job.broadcast_id)),
+                InlineKeyboardButton(_("BTN_STOP", language), callback_data=encode_callback('bc', 'cancel', job.broadcast_id))
+            ])
+        elif job.status == STATUS_PAUSED:
+            keyboard.append([
+                InlineKeyboardButton(_("BTN_RESUME", language), callback_data=encode_callback('bc', 'resume', job.broadcast_id)),
+                InlineKeyboardButton(_("BTN_STOP", language), callback_data=encode_callback('bc', 'cancel', job.broadcast_id))
+            ])
+        keyboard.append([InlineKeyboardButton(_("BTN_BACK", language), callback_data='admin_broadcast')])
+        return text, InlineKeyboardMarkup(keyboard)
+    
+    async def update_broadcast_card(self, bot: Bot, job: BroadcastJob):
+        """Refresh the live progress card of a broadcast"""
+        if not job.progress:
+            return
+        
+        text, reply_markup = self.get_broadcast_card(job, job.progress.get('language', 'en'))
+        await bot.edit_message_text(
+            text,
+            chat_id=job.progress['chat_id'],
+            message_id=job.progress['message_id'],
+            reply_markup=reply_markup
+        )
     
-    async def execute_broadcast(self, broadcast_id: str):
-        """Execute broadcast to recipients"""
+    async def broadcast_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """List broadcasts being delivered"""
         try:
-            # Get broadcast data
-            broadcast = firebase_service.get_broadcast(broadcast_id)
-            if not broadcast:
+            query = update.callback_query
+            
+            # Get user data
+            user_data = load_request(update, context).user_data
+            if not user_data or not user_data.get('is_admin', False):
+                await query.answer("❌ Access denied", show_alert=True)
                 return
             
-            message = broadcast.get('message', '')
-            target_type = broadcast.get('target_type', 'users')
-            
-            recipients_count = 0
-            sent_count = 0
-            failed_count = 0
-            
-            # Get recipients based on type
-            if target_type == 'users':
-                users = firebase_service.get_all_users()
-                recipients = users
-            elif target_type == 'users_and_groups':
-                users = firebase_service.get_all_users()
-                groups = firebase_service.get_all_groups()
-                recipients = users + groups
-            else:
+            language = user_data.get('language', 'en')
+            
+            keyboard = [
+                [InlineKeyboardButton(
+                    f"{_(f'BROADCAST_STATUS_{job.status.upper()}', language)} - {job.target_type} {job.done}/{job.total}",
+                    callback_data=encode_callback('bc', 'show', job.broadcast_id)
+                )]
+                for job in broadcast_service.get_active()
+            ]
+            keyboard.append([InlineKeyboardButton(_("BTN_BACK", language), callback_data='admin_broadcast')])
+            
+            await query.edit_message_text(
+                _("ACTIVE_BROADCASTS" if len(keyboard) > 1 else "NO_ACTIVE_BROADCASTS", language),
+                reply_markup=InlineKeyboardMarkup(keyboard)
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Error in broadcast_status: {e}")
+    
+    async def control_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE, action: str, broadcast_id: str):
+        """Show, pause, resume or cancel a broadcast from its progress card"""
+        try:
+            query = update.callback_query
+            user = query.from_user
+            
+            # Get user data
+            user_data = load_request(update, context).user_data
+            if not user_data or not user_data.get('is_admin', False):
+                await query.answer("❌ Access denied", show_alert=True)
+                return
+            
+            language = user_data.get('language', 'en')
+            
+            job = broadcast_service.get(broadcast_id)
+            if not job:
+                await query.answer(_("BROADCAST_NOT_RUNNING", language), show_alert=True)
                 return
             
-            recipients_count = len(recipients)
-            
-            # Send message to each recipient
-            for recipient in recipients:
-                try:
-                    chat_id = recipient.get('user_id') or recipient.get('group_id')
-                    if chat_id:
-                        await context.bot.send_message(
-                            chat_id=chat_id,
-                            text=message,
-                            parse_mode='Markdown'
-                        )
-                        sent_count += 1
-                except Exception as e:
-                    self.logger.error(f"Error sending broadcast to {chat_id}: {e}")
-                    failed_count += 1
-            
-            # Update broadcast status
-            # Note: This would require updating the Firebase document
-            # For now, we'll just log the results
-            
-            self.logger.info(f"Broadcast {broadcast_id} completed: {sent_count}/{recipients_count} sent, {failed_count} failed")
+            if action == 'pause':
+                broadcast_service.pause(broadcast_id)
+            elif action == 'resume':
+                broadcast_service.resume(broadcast_id)
+            elif action == 'cancel':
+                broadcast_service.cancel(broadcast_id)
+                await query.answer(_("BROADCAST_STOPPING", language))
             
+            # The card this admin is looking at receives further progress
+            job.progress = {'chat_id': query.message.chat_id, 'message_id': query.message.message_id, 'language': language}
+            firebase_service.update_broadcast(broadcast_id, {'progress': job.progress})
+            self.logger.log_admin_action(user.id, f"Broadcast {action}", f"ID: {broadcast_id}")
+            
+            text, reply_markup = self.get_broadcast_card(job, language)
+            await query.edit_message_text(text, reply_markup=reply_markup)
+            
+        except Exception as e:
+            self.logger.error(f"Error controlling broadcast {broadcast_id}: {e}")
+    
+    async def start_broadcasts(self, bot: Bot):
+        """Continue broadcasts interrupted by the last shutdown and arm scheduled ones"""
+        try:
+            await broadcast_service.resume_interrupted(bot, on_progress=self.update_broadcast_card)
+            await broadcast_scheduler.start(bot, on_progress=self.update_broadcast_card)
         except Exception as e:
-            self.logger.error(f"Error executing broadcast {broadcast_id}: {e}")
+            self.logger.error(f"Error starting broadcasts: {e}")
     
     async def cancel_broadcast(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Cancel broadcast operation"""
@@ -492,6 +746,22 @@ class AdminHandlers:
             
         except Exception as e:
             self.logger.error(f"Error canceling broadcast: {e}")
+        
+        return ConversationHandler.END
+    
+    async def broadcast_timeout(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Drop a broadcast setup left unfinished for BROADCAST_SETUP_TIMEOUT"""
+        try:
+            user = update.effective_user
+            self.broadcast_states.pop(user.id, None)
+            self.admin_conversations.pop(user.id, None)
+            
+            user_data = load_request(update, context).user_data
+            language = user_data.get('language', 'en') if user_data else 'en'
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=_("BROADCAST_SETUP_EXPIRED", language))
+            
+        except Exception as e:
+            self.logger.error(f"Error expiring broadcast setup: {e}")
     
     def get_conversation_handler(self):
         """Get conversation handler for admin operations"""
@@ -503,37 +773,53 @@ class AdminHandlers:
             ],
             states={
                 self.BROADCAST_MESSAGE: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_broadcast_message)
+                    MessageHandler(filters.UpdateType.MESSAGE & ~filters.COMMAND, self.handle_broadcast_message)
                 ],
                 self.BROADCAST_SCHEDULE: [
-                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_broadcast_schedule)
+                    MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_broadcast_schedule),
+                    MessageHandler(ALBUM_PART, self.handle_broadcast_album_part)
                 ],
                 self.BROADCAST_CONFIRM: [
                     CallbackQueryHandler(self.confirm_broadcast, pattern='^confirm_broadcast$'),
-                    CallbackQueryHandler(self.cancel_broadcast, pattern='^admin_broadcast$')
+                    CallbackQueryHandler(self.toggle_broadcast_audience, pattern='^bc_aud:'),
+                    CallbackQueryHandler(self.request_broadcast_variant, pattern='^bc_var:'),
+                    CallbackQueryHandler(self.cancel_broadcast, pattern='^admin_broadcast$'),
+                    MessageHandler(ALBUM_PART, self.handle_broadcast_album_part)
+                ],
+                self.BROADCAST_VARIANT: [
+                    MessageHandler(filters.UpdateType.MESSAGE & ~filters.COMMAND, self.handle_broadcast_variant)
+                ],
+                ConversationHandler.TIMEOUT: [
+                    TypeHandler(Update, self.broadcast_timeout)
                 ]
             },
             fallbacks=[
                 CallbackQueryHandler(self.cancel_broadcast, pattern='^admin_broadcast$')
             ],
-            per_message=False
+            per_message=False,
+            conversation_timeout=Config.BROADCAST_SETUP_TIMEOUT
         )
     
-    def get_callback_handlers(self):
-        """Get callback handlers for admin operations"""
-        return [
-            CallbackQueryHandler(self.broadcast_delete, pattern='^broadcast_delete$'),
-            CallbackQueryHandler(self.delete_broadcast_confirm, pattern='^delete_broadcast_'),
-            CallbackQueryHandler(self.cancel_broadcast, pattern='^admin_broadcast$'),
-        ]
+    def register_callbacks(self, router: CallbackRouter):
+        """Register callback query routes outside the broadcast conversation"""
+        router.route('broadcast_delete', self.broadcast_delete)
+        router.route('delete_broadcast', self.delete_broadcast_confirm)
+        router.route_prefix('delete_broadcast_', self.delete_broadcast_confirm)
+        router.route('admin_broadcast', self.cancel_broadcast)
+        router.route('broadcast_status', self.broadcast_status)
+        router.route('bc', self.control_broadcast)
 
 # Add missing text constants
 def _(key: str, language: str = 'en', **kwargs) -> str:
     """Shorthand function for getting text"""
     texts = {
         'PLEASE_SEND_BROADCAST_MESSAGE': {
-            'en': 'Please send the broadcast message:',
-            'fa': 'لطفاً پیام همگانی را ارسال کنید:'
+            'en': 'Please send the broadcast message, text or any media:',
+            'fa': 'لطفاً پیام همگانی را ارسال کنید، متن یا هر نوع رسانه:'
+        },
+        'BROADCAST_MEDIA': {
+            'en': '[media]',
+            'fa': '[رسانه]'
         },
         'NO_PENDING_BROADCASTS': {
             'en': 'No pending broadcasts found.',
@@ -583,6 +869,114 @@ def _(key: str, language: str = 'en', **kwargs) -> str:
             'en': '✅ Broadcast created successfully!',
             'fa': '✅ پیام همگانی با موفقیت ایجاد شد!'
         },
+        'BROADCAST_STARTING': {
+            'en': '📢 Starting broadcast...',
+            'fa': '📢 در حال شروع پیام همگانی...'
+        },
+        'BROADCAST_PROGRESS': {
+            'en': '📢 Broadcast: {status}\n\n📬 Progress: {done}/{total}\n✅ Sent: {sent}\n❌ Failed: {failed}\n⏭️ Skipped: {skipped}',
+            'fa': '📢 پیام همگانی: {status}\n\n📬 پیشرفت: {done}/{total}\n✅ ارسال شده: {sent}\n❌ ناموفق: {failed}\n⏭️ رد شده: {skipped}'
+        },
+        'BROADCAST_ERRORS': {
+            'en': '\n\n🚫 Blocked: {blocked}\n💤 Deactivated: {deactivated}\n🌊 Flood limited: {flood}\n❓ Other: {other}',
+            'fa': '\n\n🚫 مسدود شده: {blocked}\n💤 غیرفعال: {deactivated}\n🌊 محدودیت ارسال: {flood}\n❓ سایر: {other}'
+        },
+        'BROADCAST_SPEED': {
+            'en': '\n\n⚡ Speed: {rate} msg/s\n⏱️ Remaining: {eta}',
+            'fa': '\n\n⚡ سرعت: {rate} پیام در ثانیه\n⏱️ زمان باقی‌مانده: {eta}'
+        },
+        'BROADCAST_STATUS_PENDING': {
+            'en': 'starting',
+            'fa': 'در حال شروع'
+        },
+        'BROADCAST_STATUS_RUNNING': {
+            'en': 'sending',
+            'fa': 'در حال ارسال'
+        },
+        'BROADCAST_STATUS_PAUSED': {
+            'en': 'paused',
+            'fa': 'متوقف موقت'
+        },
+        'BROADCAST_STATUS_CANCELLED': {
+            'en': 'cancelled',
+            'fa': 'لغو شده'
+        },
+        'BROADCAST_STATUS_SENT': {
+            'en': 'finished',
+            'fa': 'تمام شده'
+        },
+        'BROADCAST_STATUS_FAILED': {
+            'en': 'failed',
+            'fa': 'ناموفق'
+        },
+        'BTN_PAUSE': {
+            'en': '⏸️ Pause',
+            'fa': '⏸️ توقف موقت'
+        },
+        'BTN_RESUME': {
+            'en': '▶️ Resume',
+            'fa': '▶️ ادامه'
+        },
+        'BTN_STOP': {
+            'en': '⏹️ Cancel broadcast',
+            'fa': '⏹️ لغو پیام همگانی'
+        },
+        'BROADCAST_STOPPING': {
+            'en': 'Stopping after the messages being sent now',
+            'fa': 'پس از پیام‌های در حال ارسال متوقف می‌شود'
+        },
+        'BROADCAST_NOT_RUNNING': {
+            'en': 'This broadcast is not running on this bot instance.',
+            'fa': 'این پیام همگانی در این نمونه ربات در حال اجرا نیست.'
+        },
+        'ACTIVE_BROADCASTS': {
+            'en': '📊 Broadcasts being delivered:',
+            'fa': '📊 پیام‌های همگانی در حال ارسال:'
+        },
+        'NO_ACTIVE_BROADCASTS': {
+            'en': 'No broadcast is being delivered.',
+            'fa': 'هیچ پیام همگانی در حال ارسال نیست.'
+        },
+        'BROADCAST_AUDIENCE': {
+            'en': 'Audience',
+            'fa': 'مخاطبان'
+        },
+        'AUDIENCE_ALL_LANGUAGES': {
+            'en': 'all languages',
+            'fa': 'همه زبان‌ها'
+        },
+        'AUDIENCE_ANY_ACTIVITY': {
+            'en': 'any activity',
+            'fa': 'هر زمان فعالیت'
+        },
+        'AUDIENCE_ACTIVE_DAYS': {
+            'en': 'active in the last {days} days',
+            'fa': 'فعال در {days} روز گذشته'
+        },
+        'BTN_AUDIENCE_LANGUAGE': {
+            'en': '🌐 {value}',
+            'fa': '🌐 {value}'
+        },
+        'BTN_AUDIENCE_ACTIVE': {
+            'en': '🕒 {value}',
+            'fa': '🕒 {value}'
+        },
+        'BTN_BROADCAST_VARIANT': {
+            'en': '✏️ {language} text',
+            'fa': '✏️ متن {language}'
+        },
+        'BROADCAST_VARIANT': {
+            'en': 'Message ({language})',
+            'fa': 'پیام ({language})'
+        },
+        'PLEASE_SEND_BROADCAST_VARIANT': {
+            'en': 'Please send the message for {language} recipients:',
+            'fa': 'لطفاً پیام مخاطبان با زبان {language} را ارسال کنید:'
+        },
+        'BROADCAST_SETUP_EXPIRED': {
+            'en': '⌛ Broadcast setup expired, start again from the admin panel.',
+            'fa': '⌛ زمان تنظیم پیام همگانی به پایان رسید، از پنل مدیریت دوباره شروع کنید.'
+        },
         'ERROR_CREATING_BROADCAST': {
             'en': '❌ Error creating broadcast.',
             'fa': '❌ خطا در ایجاد پیام همگانی.'
@@ -1,16 +1,29 @@
 import asyncio
 from datetime import datetime, timedelta
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message, Chat, ChatMemberAdministrator
-from telegram.ext import ContextTypes, CommandHandler, MessageHandler, CallbackQueryHandler, filters
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message, Chat
+from telegram.ext import ContextTypes, CommandHandler, MessageHandler, CallbackQueryHandler, ChatMemberHandler, filters
 from telegram.error import TelegramError
 from typing import Optional, Dict, Any, List
 
 from config.config import Config
 from src.services.firebase import firebase_service
+from src.handlers.middleware import load_request, reload_group
+from src.handlers.router import CallbackRouter, encode_callback
 from src.models.group import Group
+from src.services.admin_roster import admin_roster, ADMIN_STATUSES
 from src.utils.logger import Logger
 from src.utils.language import language_manager, _
 
+class ConversationFilter(filters.MessageFilter):
+    """Messages from members with an open group settings conversation"""
+    
+    def __init__(self, conversations: Dict[tuple, int]):
+        super().__init__(name="ConversationFilter")
+        self.conversations = conversations
+    
+    def filter(self, message: Message) -> bool:
+        return bool(message.from_user) and (message.chat.id, message.from_user.id) in self.conversations
+
 class GroupHandlers:
     """Group management handlers"""
     
@@ -39,14 +52,17 @@ class GroupHandlers:
                 await message.reply_text("❌ This command is only available in groups")
                 return
             
-            # Check if user is admin
-            chat_member = await context.bot.get_chat_member(chat.id, user.id)
-            if not isinstance(chat_member, ChatMemberAdministrator) and not chat_member.status == 'creator':
+            # Check if user is admin, asking for the member alone when the roster can't be loaded
+            is_admin = await admin_roster.is_admin(context.bot, chat.id, user.id)
+            if is_admin is None:
+                chat_member = await context.bot.get_chat_member(chat.id, user.id)
+                is_admin = chat_member.status in ADMIN_STATUSES
+            if not is_admin:
                 await message.reply_text("❌ Only group admins can use this command")
                 return
             
             # Get or create group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 success = firebase_service.create_group(
                     group_id=chat.id,
@@ -56,14 +72,17 @@ class GroupHandlers:
                     await message.reply_text("❌ Error creating group profile")
                     return
                 
-                group_data = firebase_service.get_group(chat.id)
+                group_data = reload_group(update, context).group_data
             
             # Convert to Group model
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
-            # Add user as admin if not already
-            if not group.is_admin(user.id):
-                group.add_admin(user.id)
+            # Keep stored admins in step with Telegram, they back the checks while no roster is loaded
+            admins = admin_roster.get_cached(chat.id)
+            if admins is not None and set(group.lists.admins) != admins:
+                group.lists.admins = sorted(admins)
+                firebase_service.update_group(chat.id, {'lists': group.lists.to_dict()})
+            elif admins is None and group.add_admin(user.id):
                 firebase_service.update_group(chat.id, {'lists': group.lists.to_dict()})
             
             # Show group panel
@@ -73,6 +92,38 @@ class GroupHandlers:
             self.logger.error(f"Error in panel command: {e}")
             await message.reply_text("❌ An error occurred")
     
+    async def get_group(self, context: ContextTypes.DEFAULT_TYPE, chat_id: int, group_data: Dict[str, Any]) -> Group:
+        """Build the group model, checking admins against Telegram's roster"""
+        group = Group.from_dict(group_data)
+        admins = await admin_roster.get_admins(context.bot, chat_id)
+        if admins is not None:
+            group.set_admin_roster(admins)
+        return group
+    
+    async def handle_chat_member(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Follow promotions and demotions in the roster and the stored admins"""
+        try:
+            member_update = update.chat_member or update.my_chat_member
+            chat = member_update.chat
+            admin_roster.apply(member_update)
+            
+            group_data = load_request(update, context).group_data
+            if not group_data:
+                return
+            
+            group = Group.from_dict(group_data)
+            user_id = member_update.new_chat_member.user.id
+            if member_update.new_chat_member.status in ADMIN_STATUSES:
+                changed = group.add_admin(user_id)
+            else:
+                changed = group.remove_admin(user_id)
+            if changed:
+                firebase_service.update_group(chat.id, {'lists': group.lists.to_dict()})
+                self.logger.log_group_action(chat.id, chat.title, "Admins updated", f"{user_id} is {member_update.new_chat_member.status}")
+            
+        except Exception as e:
+            self.logger.error(f"Error handling chat member update: {e}")
+    
     async def show_group_panel(self, update: Update, context: ContextTypes.DEFAULT_TYPE, group: Group):
         """Show group management panel"""
         try:
@@ -80,7 +131,7 @@ class GroupHandlers:
             user = message.from_user
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Create panel keyboard
@@ -118,12 +169,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -131,46 +182,46 @@ class GroupHandlers:
                 return
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Create locks keyboard
             keyboard = [
                 [InlineKeyboardButton(
                     f"{'🔒' if group.locks.links else '🔓'} " + _("BTN_LOCK_LINKS", language),
-                    callback_data='toggle_lock_links'
+                    callback_data=encode_callback('toggle_lock', 'links')
                 )],
                 [InlineKeyboardButton(
                     f"{'🔒' if group.locks.hyperlinks else '🔓'} " + _("BTN_LOCK_HYPERLINKS", language),
-                    callback_data='toggle_lock_hyperlinks'
+                    callback_data=encode_callback('toggle_lock', 'hyperlinks')
                 )],
                 [InlineKeyboardButton(
                     f"{'🔒' if group.locks.hashtags else '🔓'} " + _("BTN_LOCK_HASHTAGS", language),
-                    callback_data='toggle_lock_hashtags'
+                    callback_data=encode_callback('toggle_lock', 'hashtags')
                 )],
                 [InlineKeyboardButton(
                     f"{'🔒' if group.locks.usernames else '🔓'} " + _("BTN_LOCK_USERNAMES", language),
-                    callback_data='toggle_lock_usernames'
+                    callback_data=encode_callback('toggle_lock', 'usernames')
                 )],
                 [InlineKeyboardButton(
                     f"{'🔒' if group.locks.forwarded else '🔓'} " + _("BTN_LOCK_FORWARDED", language),
-                    callback_data='toggle_lock_forwarded'
+                    callback_data=encode_callback('toggle_lock', 'forwarded')
                 )],
                 [InlineKeyboardButton(
                     f"{'🔒' if group.locks.videos else '🔓'} " + _("BTN_LOCK_VIDEOS", language),
-                    callback_data='toggle_lock_videos'
+                    callback_data=encode_callback('toggle_lock', 'videos')
                 )],
                 [InlineKeyboardButton(
                     f"{'🔒' if group.locks.photos else '🔓'} " + _("BTN_LOCK_PHOTOS", language),
-                    callback_data='toggle_lock_photos'
+                    callback_data=encode_callback('toggle_lock', 'photos')
                 )],
                 [InlineKeyboardButton(
                     f"{'🔒' if group.locks.files else '🔓'} " + _("BTN_LOCK_FILES", language),
-                    callback_data='toggle_lock_files'
+                    callback_data=encode_callback('toggle_lock', 'files')
                 )],
                 [InlineKeyboardButton(
                     f"{'🔒' if group.locks.music else '🔓'} " + _("BTN_LOCK_MUSIC", language),
-                    callback_data='toggle_lock_music'
+                    callback_data=encode_callback('toggle_lock', 'music')
                 )],
                 [InlineKeyboardButton(_("BTN_BACK", language), callback_data='group_panel')]
             ]
@@ -193,12 +244,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -233,12 +284,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -246,7 +297,7 @@ class GroupHandlers:
                 return
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Create lists keyboard
@@ -278,12 +329,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -291,7 +342,7 @@ class GroupHandlers:
                 return
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Create settings keyboard
@@ -302,6 +353,10 @@ class GroupHandlers:
                 [InlineKeyboardButton(_("BTN_SET_AUTO_LOCK", language), callback_data='set_auto_lock')],
                 [InlineKeyboardButton(_("BTN_SET_GROUP_LOCK", language), callback_data='set_group_lock')],
                 [InlineKeyboardButton(_("BTN_SET_DOWNLOADS", language), callback_data='set_downloads')],
+                [InlineKeyboardButton(
+                    _("BTN_FILTER_WHOLE_WORDS" if group.settings.filter_whole_words else "BTN_FILTER_ANYWHERE", language),
+                    callback_data='set_filter_mode'
+                )],
                 [InlineKeyboardButton(_("BTN_BACK", language), callback_data='group_panel')]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
@@ -323,12 +378,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -336,7 +391,7 @@ class GroupHandlers:
                 return
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Create entertainment keyboard
@@ -357,64 +412,25 @@ class GroupHandlers:
         except Exception as e:
             self.logger.error(f"Error showing entertainment menu: {e}")
     
-    async def handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle callback queries for group management"""
-        try:
-            query = update.callback_query
-            data = query.data
-            
-            # Handle different callback data
-            if data == 'group_panel':
-                await self.show_group_panel_from_callback(update, context)
-            
-            elif data == 'group_locks':
-                await self.show_locks_menu(update, context)
-            
-            elif data == 'group_lists':
-                await self.show_lists_menu(update, context)
-            
-            elif data == 'group_settings':
-                await self.show_settings_menu(update, context)
-            
-            elif data == 'group_entertainment':
-                await self.show_entertainment_menu(update, context)
-            
-            elif data.startswith('toggle_lock_'):
-                lock_type = data.replace('toggle_lock_', '')
-                await self.toggle_lock(update, context, lock_type)
-            
-            elif data == 'set_force_member':
-                await self.set_force_member(update, context)
-            
-            elif data == 'set_welcome':
-                await self.set_welcome_message(update, context)
-            
-            elif data == 'set_warnings':
-                await self.set_warning_settings(update, context)
-            
-            elif data == 'set_auto_lock':
-                await self.set_auto_lock(update, context)
-            
-            elif data == 'set_group_lock':
-                await self.set_group_lock(update, context)
-            
-            elif data == 'set_downloads':
-                await self.set_downloads_enabled(update, context)
-            
-            elif data == 'fal_hafez':
-                await self.fal_hafez(update, context)
-            
-            elif data == 'currency_rates':
-                await self.currency_rates(update, context)
-            
-            elif data == 'weather_info':
-                await self.weather_info(update, context)
-            
-            # Answer callback query
-            await query.answer()
-            
-        except Exception as e:
-            self.logger.error(f"Error handling callback query: {e}")
+    def register_callbacks(self, router: CallbackRouter):
+        """Register callback query routes"""
+        router.route('group_panel', self.show_group_panel_from_callback)
+        router.route('group_locks', self.show_locks_menu)
+        router.route('group_lists', self.show_lists_menu)
+        router.route('group_settings', self.show_settings_menu)
+        router.route('group_entertainment', self.show_entertainment_menu)
+        router.route('toggle_lock', self.toggle_lock)
+        router.route_prefix('toggle_lock_', self.toggle_lock)
+        router.route('set_force_member', self.set_force_member)
+        router.route('set_welcome', self.set_welcome_message)
+        router.route('set_warnings', self.set_warning_settings)
+        router.route('set_auto_lock', self.set_auto_lock)
+        router.route('set_group_lock', self.set_group_lock)
+        router.route('set_downloads', self.set_downloads_enabled)
+        router.route('set_filter_mode', self.set_filter_mode)
+        router.route('fal_hafez', self.fal_hafez)
+        router.route('currency_rates', self.currency_rates)
+        router.route('weather_info', self.weather_info)
     
     async def show_group_panel_from_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show group panel from callback query"""
@@ -423,12 +439,12 @@ class GroupHandlers:
             chat = query.message.chat
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Show group panel
             await self.show_group_panel(update, context, group)
@@ -444,12 +460,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -457,7 +473,7 @@ class GroupHandlers:
                 return
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Toggle force membership
@@ -496,12 +512,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -509,7 +525,7 @@ class GroupHandlers:
                 return
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Show current welcome message and ask for new one
@@ -537,12 +553,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -550,7 +566,7 @@ class GroupHandlers:
                 return
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Show current warning limit and ask for new one
@@ -578,12 +594,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -591,7 +607,7 @@ class GroupHandlers:
                 return
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Toggle auto lock
@@ -626,12 +642,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -662,12 +678,12 @@ class GroupHandlers:
             user = query.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 await query.answer("❌ Group not found", show_alert=True)
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Check if user is admin
             if not group.is_admin(user.id):
@@ -690,6 +706,42 @@ class GroupHandlers:
         except Exception as e:
             self.logger.error(f"Error setting downloads enabled: {e}")
     
+    async def set_filter_mode(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Switch filtered words between whole word and anywhere in the text matching"""
+        try:
+            query = update.callback_query
+            chat = query.message.chat
+            user = query.from_user
+            
+            # Get group data
+            group_data = load_request(update, context).group_data
+            if not group_data:
+                await query.answer("❌ Group not found", show_alert=True)
+                return
+            
+            group = await self.get_group(context, chat.id, group_data)
+            
+            # Check if user is admin
+            if not group.is_admin(user.id):
+                await query.answer("❌ Access denied", show_alert=True)
+                return
+            
+            # Toggle filter mode
+            group.settings.filter_whole_words = not group.settings.filter_whole_words
+            
+            # Update group
+            firebase_service.update_group(chat.id, {'settings': group.settings.to_dict()})
+            
+            # Show settings menu
+            await self.show_settings_menu(update, context)
+            
+            # Log action
+            action = f"Word filter matches {'whole words' if group.settings.filter_whole_words else 'anywhere'}"
+            self.logger.log_group_action(chat.id, chat.title, action, f"by {user.id}")
+            
+        except Exception as e:
+            self.logger.error(f"Error setting filter mode: {e}")
+    
     async def handle_conversation_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle conversation messages"""
         try:
@@ -705,14 +757,14 @@ class GroupHandlers:
             state = self.group_conversations[conversation_key]
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 return
             
-            group = Group.from_dict(group_data)
+            group = await self.get_group(context, chat.id, group_data)
             
             # Get user language
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Handle different states
@@ -799,7 +851,7 @@ class GroupHandlers:
             chat = query.message.chat
             
             # Get user language
-            user_data = firebase_service.get_user(query.from_user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Get random Fal-e Hafez (placeholder implementation)
@@ -827,7 +879,7 @@ class GroupHandlers:
             chat = query.message.chat
             
             # Get user language
-            user_data = firebase_service.get_user(query.from_user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Get currency rates (placeholder implementation)
@@ -854,7 +906,7 @@ class GroupHandlers:
             chat = query.message.chat
             
             # Get user language
-            user_data = firebase_service.get_user(query.from_user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Get weather info (placeholder implementation)
@@ -878,8 +930,12 @@ class GroupHandlers:
         """Get all handlers for group management"""
         return [
             CommandHandler("panel", self.panel_command),
-            CallbackQueryHandler(self.handle_callback_query),
-            MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_conversation_message)
+            ChatMemberHandler(self.handle_chat_member, ChatMemberHandler.ANY_CHAT_MEMBER),
+            # Only answers of open conversations, other text goes on to the main message handler
+            MessageHandler(
+                filters.TEXT & ~filters.COMMAND & ConversationFilter(self.group_conversations),
+                self.handle_conversation_message
+            )
         ]
 
 # Add missing text constants
@@ -949,6 +1005,14 @@ def _(key: str, language: str = 'en', **kwargs) -> str:
         'INVALID_AUTO_LOCK_DURATION': {
             'en': '❌ Invalid duration. Please enter a number between 1 and 1440 minutes.',
             'fa': '❌ مدت زمان نامعتبر است. لطفاً عددی بین ۱ تا ۱۴۴۰ دقیقه وارد کنید.'
+        },
+        'BTN_FILTER_ANYWHERE': {
+            'en': '🔤 Word Filter: Anywhere in Text',
+            'fa': '🔤 فیلتر کلمات: هر جای متن'
+        },
+        'BTN_FILTER_WHOLE_WORDS': {
+            'en': '🔤 Word Filter: Whole Words',
+            'fa': '🔤 فیلتر کلمات: کلمه کامل'
         }
     }
     
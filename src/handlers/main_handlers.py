@@ -1,14 +1,24 @@
 import asyncio
+import os
+import uuid
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, Message
 from telegram.ext import ContextTypes, CommandHandler, MessageHandler, CallbackQueryHandler, filters
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Set
 
 from config.config import Config
 from src.services.firebase import firebase_service
+from src.handlers.middleware import load_request, reload_user, reload_group, request_middleware
+from src.handlers.router import CallbackRouter, encode_callback
+from src.handlers.update_processor import update_processor
 from src.services.downloader import download_service
+from src.services.bandwidth import bandwidth_governor
+from src.services.splitter import media_splitter
+from src.services.batch import batch_service, BatchJob
+from src.services.rate_limiter import rate_limiter, current_lane, LANE_BULK
+from src.services.moderation import moderation_engine, RuleSet
+from src.services.admin_roster import admin_roster
 from src.models.user import User
-from src.models.group import Group
 from src.utils.logger import Logger
 from src.utils.language import language_manager, _
 
@@ -30,7 +40,7 @@ class MainHandlers:
             self.logger.log_user_action(user.id, user.username, "Started bot")
             
             # Get or create user
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data:
                 # Create new user
                 success = firebase_service.create_user(
@@ -43,10 +53,10 @@ class MainHandlers:
                     await update.message.reply_text("❌ Error creating user profile")
                     return
                 
-                user_data = firebase_service.get_user(user.id)
+                user_data = reload_user(update, context).user_data
             
             # Update user activity
-            firebase_service.update_user(user.id, {'last_activity': datetime.now()})
+            firebase_service.update_user(user.id, {'last_activity': datetime.now(), 'reachable': True})
             
             # Get user language
             language = user_data.get('language', 'en')
@@ -77,7 +87,7 @@ class MainHandlers:
             user = update.effective_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Create help keyboard
@@ -120,7 +130,7 @@ class MainHandlers:
             self.logger.log_admin_action(user.id, "Admin login successful")
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Create admin panel keyboard
@@ -150,7 +160,7 @@ class MainHandlers:
             user = update.effective_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data or not user_data.get('is_admin', False):
                 await update.message.reply_text("❌ Access denied")
                 return
@@ -163,6 +173,10 @@ class MainHandlers:
             
             # Format statistics
             stats_text = _("STATISTICS", language, **stats)
+            stats_text += "\n" + self.format_bandwidth_usage(language)
+            stats_text += "\n" + _("STORAGE_READS", language, **request_middleware.get_stats())
+            stats_text += "\n" + _("UPDATE_QUEUE", language, **update_processor.get_stats())
+            stats_text += "\n" + _("OUTBOUND_REQUESTS", language, **rate_limiter.get_stats())
             
             # Create back button
             keyboard = [[InlineKeyboardButton(_("BTN_BACK", language), callback_data='admin_panel')]]
@@ -184,13 +198,13 @@ class MainHandlers:
             user = update.effective_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en') if user_data else 'en'
             
             # Create language selection keyboard
             keyboard = []
             for lang_code, lang_name in language_manager.get_supported_languages().items():
-                keyboard.append([InlineKeyboardButton(lang_name, callback_data=f'lang_{lang_code}')])
+                keyboard.append([InlineKeyboardButton(lang_name, callback_data=encode_callback('lang', lang_code))])
             
             keyboard.append([InlineKeyboardButton(_("BTN_BACK", language), callback_data='main_menu')])
             reply_markup = InlineKeyboardMarkup(keyboard)
@@ -212,7 +226,7 @@ class MainHandlers:
             chat = message.chat
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data:
                 # Create new user
                 success = firebase_service.create_user(
@@ -225,65 +239,215 @@ class MainHandlers:
                     await message.reply_text("❌ Error creating user profile")
                     return
                 
-                user_data = firebase_service.get_user(user.id)
+                user_data = reload_user(update, context).user_data
             
             # Update user activity
-            firebase_service.update_user(user.id, {'last_activity': datetime.now()})
+            firebase_service.update_user(user.id, {'last_activity': datetime.now(), 'reachable': True})
             
             # Get user language
             language = user_data.get('language', 'en')
             
+            # Group messages pass the group's rules first, links included
+            if chat.type in ['group', 'supergroup']:
+                await self.handle_group_message(update, context)
+                return
+            
             # Check if message contains URL
             if message.entities:
                 for entity in message.entities:
                     if entity.type == 'url':
                         url = message.text[entity.offset:entity.offset + entity.length]
-                        await self.handle_download_request(update, context, url)
+                        await self.show_format_picker(update, context, url)
                         return
             
-            # Handle group messages
-            if chat.type in ['group', 'supergroup']:
-                await self.handle_group_message(update, context)
-            
         except Exception as e:
             self.logger.error(f"Error handling message: {e}")
     
-    async def handle_download_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE, url: str):
-        """Handle download request"""
+    async def audio_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /audio command"""
+        try:
+            user_data = load_request(update, context).user_data
+            language = user_data.get('language', 'en') if user_data else 'en'
+            
+            if not user_data:
+                await update.message.reply_text(_("START_FIRST", language))
+                return
+            
+            if not context.args:
+                await update.message.reply_text(_("SEND_AUDIO_URL", language))
+                return
+            
+            await self.handle_download_request(update, context, context.args[0], audio_only=True)
+            
+        except Exception as e:
+            self.logger.error(f"Error in audio command: {e}")
+            await update.message.reply_text("❌ An error occurred")
+    
+    async def show_format_picker(self, update: Update, context: ContextTypes.DEFAULT_TYPE, url: str):
+        """Show title, duration and format buttons as soon as a link arrives"""
         try:
             message = update.message
             user = message.from_user
             
+            user_data = load_request(update, context).user_data
+            language = user_data.get('language', 'en') if user_data else 'en'
+            
+            # Playlists and music platforms have no formats to pick from
+            canonical_url = download_service.canonicalize_url(url)
+            if (not Config.ENABLE_FORMAT_PICKER
+                    or not download_service.is_supported_url(url)
+                    or download_service.is_playlist_url(canonical_url)
+                    or download_service.is_audio_platform(canonical_url)):
+                await self.handle_download_request(update, context, url)
+                return
+            
+            preview_msg = await message.reply_text(_("FETCHING_INFO", language))
+            info = await download_service.get_cached_info_async(canonical_url)
+            if not info:
+                await preview_msg.edit_text(_("DOWNLOAD_FAILED", language))
+                return
+            
+            # Buttons carry a short token, the choices stay with the user
+            choices = download_service.get_format_choices(info)
+            token = uuid.uuid4().hex[:8]
+            picks = context.user_data.setdefault('format_picks', {})
+            best_audio = download_service.get_best_audio_format(info)
+            picks[token] = {
+                'url': canonical_url,
+                'formats': [choice['format_id'] for choice in choices],
+                'audio_format': best_audio['format_id'] if best_audio else None
+            }
+            while len(picks) > 10:
+                picks.pop(next(iter(picks)))
+            
+            keyboard = [
+                [InlineKeyboardButton(
+                    f"🎬 {choice['height']}p {choice['ext']} · {self.format_size(choice['filesize'])}",
+                    callback_data=encode_callback('fmt', token, index)
+                )]
+                for index, choice in enumerate(choices)
+            ]
+            keyboard.append([
+                InlineKeyboardButton(_("BTN_BEST_QUALITY", language), callback_data=encode_callback('fmt', token, 'b')),
+                InlineKeyboardButton(_("BTN_AUDIO_ONLY", language), callback_data=encode_callback('fmt', token, 'a'))
+            ])
+            reply_markup = InlineKeyboardMarkup(keyboard)
+            
+            duration = int(info.get('duration') or 0)
+            await preview_msg.edit_text(
+                _("MEDIA_PREVIEW", language,
+                  title=info.get('title', 'Unknown'),
+                  uploader=info.get('uploader') or '-',
+                  duration=f"{duration // 60}:{duration % 60:02d}"),
+                reply_markup=reply_markup
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Error showing format picker: {e}")
+            await update.message.reply_text("❌ An error occurred")
+    
+    async def handle_format_pick(self, update: Update, context: ContextTypes.DEFAULT_TYPE, token: str, choice: str):
+        """Handle format picker button"""
+        try:
+            query = update.callback_query
+            user_data = load_request(update, context).user_data
+            language = user_data.get('language', 'en') if user_data else 'en'
+            
+            pick = context.user_data.get('format_picks', {}).pop(token, None)
+            if not pick:
+                await query.answer(_("FORMAT_PICK_EXPIRED", language))
+                return
+            
+            await query.answer()
+            await query.edit_message_reply_markup(None)
+            
+            audio_only = choice == 'a'
+            if audio_only:
+                format_id = pick['audio_format']
+            else:
+                format_id = pick['formats'][int(choice)] if choice.isdigit() else None
+            await self.handle_download_request(update, context, pick['url'], audio_only, format_id)
+            
+        except Exception as e:
+            self.logger.error(f"Error handling format pick: {e}")
+    
+    def format_size(self, size: int) -> str:
+        """Format byte count for buttons"""
+        return f"{size / 1048576:.1f} MB" if size else "?"
+    
+    async def handle_download_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE, url: str,
+                                      audio_only: bool = False, format_id: str = None):
+        """Handle download request"""
+        try:
+            message = update.effective_message
+            user = update.effective_user
+            
+            user_data = load_request(update, context).user_data
+            language = user_data.get('language', 'en')
+            
             # Check if URL is supported
             if not download_service.is_supported_url(url):
-                await message.reply_text(_("UNSUPPORTED_PLATFORM", user_data.get('language', 'en')))
+                await message.reply_text(_("UNSUPPORTED_PLATFORM", language))
                 return
             
-            # Send downloading message
-            user_data = firebase_service.get_user(user.id)
-            language = user_data.get('language', 'en')
+            # Drop tracking parameters and resolve short links
+            url = download_service.canonicalize_url(url)
+            
+            # Music platforms skip the video pipeline entirely
+            audio_only = audio_only or download_service.is_audio_platform(url)
+            
+            # Playlists and channels are streamed item by item as a batch job
+            if download_service.is_playlist_url(url):
+                await self.handle_batch_request(update, context, url, audio_only, language)
+                return
             
+            # Send downloading message
             downloading_msg = await message.reply_text(_("DOWNLOAD_STARTING", language))
             
-            # Download file
-            file_path = await download_service.download_async(url, user.id)
+            # Download and upload run as their own task, so the chat's next updates don't wait for them
+            context.application.create_task(
+                self.run_download(message, user.id, user_data, url, audio_only, format_id, language, downloading_msg),
+                update=update
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Error handling download request: {e}")
+            await message.reply_text(_("ERROR_OCCURRED", language, error=str(e)))
+    
+    async def run_download(self, message: Message, user_id: int, user_data: Dict[str, Any], url: str,
+                           audio_only: bool, format_id: Optional[str], language: str, downloading_msg: Message):
+        """Download a link, send the file and report the outcome"""
+        media = None
+        try:
+            # Download file as a persistent job so it can resume after a restart
+            job_id = download_service.job_store.create(
+                url, user_id, message.chat_id, message.message_id, audio_only=audio_only, format_id=format_id
+            )
+            media = await download_service.download_media_async(
+                url, user_id, job_id, audio_only, format_id=format_id
+            )
+            file_path = media['file_path'] if media else None
             
             # Delete downloading message
             await downloading_msg.delete()
             
             if file_path:
-                # Send file
-                with open(file_path, 'rb') as file:
-                    await message.reply_document(file)
+                try:
+                    await self.send_media(message, media, f"{user_id}:{message.message_id}", language, audio_only)
+                except Exception:
+                    # Only interrupted downloads stay pending, a failed upload is not retried on restart
+                    download_service.job_store.fail(job_id)
+                    raise
+                download_service.job_store.complete(job_id)
                 
                 # Update statistics
                 firebase_service.update_download_statistics(True)
-                firebase_service.update_user(user.id, {
+                firebase_service.update_user(user_id, {
                     'downloads_count': user_data.get('downloads_count', 0) + 1,
                     'successful_downloads': user_data.get('successful_downloads', 0) + 1
                 })
                 
-                self.logger.log_download(user.id, url, success=True)
+                self.logger.log_download(user_id, url, success=True)
                 
                 # Send success message with back button
                 keyboard = [[InlineKeyboardButton(_("BTN_BACK", language), callback_data='main_menu')]]
@@ -294,33 +458,210 @@ class MainHandlers:
                     reply_markup=reply_markup
                 )
             else:
+                download_service.job_store.fail(job_id)
+                
                 # Update statistics
                 firebase_service.update_download_statistics(False)
-                firebase_service.update_user(user.id, {
+                firebase_service.update_user(user_id, {
                     'downloads_count': user_data.get('downloads_count', 0) + 1,
                     'failed_downloads': user_data.get('failed_downloads', 0) + 1
                 })
                 
-                self.logger.log_download(user.id, url, success=False)
+                self.logger.log_download(user_id, url, success=False)
                 
                 await message.reply_text(_("DOWNLOAD_FAILED", language))
             
-            # Clean up temporary files
-            download_service.cleanup_temp_files(user.id)
+        except Exception as e:
+            self.logger.error(f"Error running download {url} for user {user_id}: {e}")
+            await message.reply_text(_("ERROR_OCCURRED", language, error=str(e)))
+        finally:
+            # Other downloads of the user may still be uploading, remove only this one's file
+            if media and os.path.exists(media['file_path']):
+                os.unlink(media['file_path'])
+    
+    async def send_media(self, message: Message, media: Dict[str, Any], upload_id: str, language: str,
+                         audio_only: bool = False):
+        """Send downloaded media once the egress budget admits it"""
+        file_path = media['file_path']
+        with bandwidth_governor.job('egress', upload_id):
+            if Config.SPLIT_OVERSIZED_MEDIA and media_splitter.needs_split(file_path):
+                await self.send_in_parts(message, file_path, upload_id, language)
+                return
+            
+            # Uploads can't be paced mid-stream, a file waits until the budget covers its size
+            await bandwidth_governor.throttle_async('egress', upload_id, os.path.getsize(file_path))
+            with open(file_path, 'rb') as file:
+                if audio_only:
+                    await message.reply_audio(
+                        file,
+                        title=media.get('title'),
+                        performer=media.get('performer'),
+                        duration=media.get('duration') or None
+                    )
+                else:
+                    await message.reply_document(file)
+    
+    async def handle_batch_request(self, update: Update, context: ContextTypes.DEFAULT_TYPE, url: str,
+                                   audio_only: bool, language: str):
+        """Enumerate playlist and start streaming it as a batch job"""
+        message = update.effective_message
+        progress_msg = await message.reply_text(_("DOWNLOAD_STARTING", language))
+        
+        # Enumeration and items run while other updates, such as the cancel button, are handled
+        context.application.create_task(
+            self.start_batch(message, progress_msg, update.effective_user.id, url, audio_only, language),
+            update=update
+        )
+    
+    async def start_batch(self, message: Message, progress_msg: Message, user_id: int, url: str,
+                          audio_only: bool, language: str):
+        """Enumerate playlist and stream it as a batch job"""
+        try:
+            playlist = await download_service.extract_playlist_async(url)
+            if not playlist or not playlist['entries']:
+                await progress_msg.edit_text(_("DOWNLOAD_FAILED", language))
+                return
+            
+            batch = batch_service.create(user_id, playlist, audio_only)
+            self.logger.info(f"Started batch {batch.batch_id} with {batch.total} items for user {batch.user_id}")
             
         except Exception as e:
-            self.logger.error(f"Error handling download request: {e}")
+            self.logger.error(f"Error starting batch for {url}: {e}")
             await message.reply_text(_("ERROR_OCCURRED", language, error=str(e)))
+            return
+        
+        await self.run_batch(message, progress_msg, batch, language)
+    
+    async def run_batch(self, message: Message, progress_msg: Message, batch: BatchJob, language: str):
+        """Send batch items as they complete and keep the progress message current"""
+        # Runs as its own task, so only this batch's requests yield to interactive replies
+        current_lane.set(LANE_BULK)
+        keyboard = [[InlineKeyboardButton(_("BTN_CANCEL_BATCH", language), callback_data=encode_callback('batch_cancel', batch.batch_id))]]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        async def update_progress(markup=reply_markup, key="BATCH_PROGRESS"):
+            try:
+                await progress_msg.edit_text(
+                    _(key, language, title=batch.title, done=batch.done, total=batch.total,
+                      sent=batch.sent, failed=batch.failed, skipped=batch.skipped),
+                    reply_markup=markup
+                )
+            except Exception as e:
+                self.logger.debug(f"Could not update batch progress: {e}")
+        
+        async def on_item(batch: BatchJob, entry: Dict[str, Any], media: Dict[str, Any]) -> bool:
+            await self.send_media(message, media, f"{batch.batch_id}:{entry['url']}", language, batch.audio_only)
+            self.logger.log_download(batch.user_id, entry['url'], success=True)
+            await update_progress()
+            return True
+        
+        try:
+            await update_progress()
+            await batch_service.run(batch, on_item)
+            
+            firebase_service.update_download_statistics(batch.sent > 0)
+            if batch.cancelled:
+                await update_progress(None, "BATCH_CANCELLED")
+            else:
+                await update_progress(None, "BATCH_FINISHED")
+            
+        except Exception as e:
+            self.logger.error(f"Error running batch {batch.batch_id}: {e}")
+            await message.reply_text(_("ERROR_OCCURRED", language, error=str(e)))
+    
+    async def cancel_batch(self, update: Update, context: ContextTypes.DEFAULT_TYPE, batch_id: str):
+        """Handle batch cancel button"""
+        try:
+            query = update.callback_query
+            user_data = load_request(update, context).user_data
+            language = user_data.get('language', 'en') if user_data else 'en'
+            
+            if batch_service.cancel(batch_id, query.from_user.id):
+                await query.answer(_("BATCH_CANCELLING", language))
+            else:
+                await query.answer()
+            
+        except Exception as e:
+            self.logger.error(f"Error cancelling batch: {e}")
+    
+    async def send_in_parts(self, message: Message, file_path: str, upload_id: str, language: str):
+        """Upload oversized file as ordered parts with progress"""
+        progress_msg = None
+        async for part in media_splitter.iter_parts(file_path):
+            progress_text = _("UPLOADING_PART", language, index=part['index'], count=part['count'])
+            if progress_msg:
+                await progress_msg.edit_text(progress_text)
+            else:
+                progress_msg = await message.reply_text(progress_text)
+            
+            await bandwidth_governor.throttle_async('egress', upload_id, os.path.getsize(part['path']))
+            with open(part['path'], 'rb') as file:
+                await message.reply_document(
+                    file,
+                    caption=_("PART_CAPTION", language, index=part['index'], count=part['count'])
+                )
+        
+        if progress_msg:
+            await progress_msg.delete()
+    
+    async def resume_pending_downloads(self, bot):
+        """Resume download jobs interrupted by the last shutdown"""
+        current_lane.set(LANE_BULK)
+        try:
+            download_service.cleanup_stale_parts()
+            
+            pending_jobs = download_service.job_store.get_pending()
+            if pending_jobs:
+                self.logger.info(f"Resuming {len(pending_jobs)} interrupted downloads")
+            
+            for job in pending_jobs:
+                media = None
+                try:
+                    audio_only = job.get('audio_only', False)
+                    media = await download_service.download_media_async(
+                        job['url'], job['user_id'], job['job_id'], audio_only, format_id=job.get('format_id')
+                    )
+                    if not media:
+                        download_service.job_store.fail(job['job_id'])
+                        self.logger.log_download(job['user_id'], job['url'], success=False)
+                        continue
+                    
+                    with open(media['file_path'], 'rb') as file:
+                        if audio_only:
+                            await bot.send_audio(
+                                chat_id=job['chat_id'],
+                                audio=file,
+                                title=media.get('title'),
+                                performer=media.get('performer'),
+                                duration=media.get('duration') or None,
+                                reply_to_message_id=job.get('message_id')
+                            )
+                        else:
+                            await bot.send_document(
+                                chat_id=job['chat_id'],
+                                document=file,
+                                reply_to_message_id=job.get('message_id')
+                            )
+                    download_service.job_store.complete(job['job_id'])
+                    self.logger.log_download(job['user_id'], job['url'], success=True)
+                except Exception as e:
+                    self.logger.error(f"Error resuming download job {job['job_id']}: {e}")
+                    download_service.job_store.fail(job['job_id'])
+                finally:
+                    if media and os.path.exists(media['file_path']):
+                        os.unlink(media['file_path'])
+            
+        except Exception as e:
+            self.logger.error(f"Error resuming pending downloads: {e}")
     
     async def handle_group_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle group messages"""
         try:
             message = update.message
             chat = message.chat
-            user = message.from_user
             
             # Get group data
-            group_data = firebase_service.get_group(chat.id)
+            group_data = load_request(update, context).group_data
             if not group_data:
                 # Create new group
                 success = firebase_service.create_group(
@@ -330,162 +671,58 @@ class MainHandlers:
                 if not success:
                     return
                 
-                group_data = firebase_service.get_group(chat.id)
+                group_data = reload_group(update, context).group_data
             
             # Update group activity
-            firebase_service.update_group(chat.id, {'last_activity': datetime.now()})
+            firebase_service.update_group(chat.id, {'last_activity': datetime.now(), 'reachable': True})
             
-            # Convert to Group model
-            group = Group.from_dict(group_data)
+            # Compiled once per change of the group's settings, locks and lists
+            rules = moderation_engine.get_rules(chat.id, group_data)
             
-            # Check if user can send message
-            if not group.can_send_message(user.id):
-                await message.delete()
+            # Check membership, locks and filtered words, admins by Telegram's roster when it is loaded
+            if await self.check_group_locks(update, context, rules, admin_roster.get_cached(chat.id)):
                 return
             
-            # Check group locks
-            await self.check_group_locks(update, context, group)
-            
             # Check for URLs in group if downloads are enabled
-            if group.settings.downloads_enabled and message.entities:
+            if rules.downloads_enabled and message.entities:
                 for entity in message.entities:
                     if entity.type == 'url':
                         url = message.text[entity.offset:entity.offset + entity.length]
                         if download_service.is_supported_url(url):
-                            await self.handle_download_request(update, context, url)
+                            await self.show_format_picker(update, context, url)
                             return
             
         except Exception as e:
             self.logger.error(f"Error handling group message: {e}")
     
-    async def check_group_locks(self, update: Update, context: ContextTypes.DEFAULT_TYPE, group: Group):
-        """Check group locks and handle accordingly"""
+    async def check_group_locks(self, update: Update, context: ContextTypes.DEFAULT_TYPE, rules: RuleSet,
+                                admins: Optional[Set[int]] = None) -> bool:
+        """Delete a message breaking the group's rules, return whether it was deleted"""
         try:
             message = update.message
-            user = message.from_user
-            
-            # Skip checks for admins and VIP members
-            if group.is_admin(user.id) or group.is_vip(user.id):
-                return
-            
-            # Check various locks
-            if message.entities:
-                for entity in message.entities:
-                    if entity.type == 'url' and group.locks.links:
-                        await message.delete()
-                        return
-                    
-                    if entity.type == 'text_link' and group.locks.hyperlinks:
-                        await message.delete()
-                        return
-                    
-                    if entity.type == 'hashtag' and group.locks.hashtags:
-                        await message.delete()
-                        return
-                    
-                    if entity.type == 'mention' and group.locks.usernames:
-                        await message.delete()
-                        return
-            
-            # Check message content
-            if message.text:
-                # Check for filtered words
-                for word in group.lists.filtered_words:
-                    if word.lower() in message.text.lower():
-                        await message.delete()
-                        return
-            
-            # Check message type locks
-            if message.forward_from and group.locks.forwarded:
+            violation = rules.check(message, admins)
+            if violation:
+                self.logger.debug(f"Deleting message in {message.chat_id}: {violation}")
                 await message.delete()
-                return
-            
-            if message.photo and group.locks.photos:
-                await message.delete()
-                return
-            
-            if message.video and group.locks.videos:
-                await message.delete()
-                return
-            
-            if message.audio and group.locks.music:
-                await message.delete()
-                return
-            
-            if message.document and group.locks.files:
-                await message.delete()
-                return
-            
-            if message.sticker and group.locks.stickers:
-                await message.delete()
-                return
-            
-            if message.animation and group.locks.gifs:
-                await message.delete()
-                return
-            
-            if message.location and group.locks.location:
-                await message.delete()
-                return
-            
-            if message.voice and group.locks.voice:
-                await message.delete()
-                return
-            
-            if message.video_note and group.locks.video_msg:
-                await message.delete()
-                return
-            
-            if message.poll and group.locks.polls:
-                await message.delete()
-                return
+                return True
+            return False
             
         except Exception as e:
             self.logger.error(f"Error checking group locks: {e}")
+            return False
     
-    async def handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle callback queries"""
-        try:
-            query = update.callback_query
-            user = query.from_user
-            
-            # Get user data
-            user_data = firebase_service.get_user(user.id)
-            language = user_data.get('language', 'en') if user_data else 'en'
-            
-            # Handle different callback data
-            data = query.data
-            
-            if data == 'main_menu':
-                await self.show_main_menu(update, context)
-            
-            elif data == 'download':
-                await self.show_download_info(update, context)
-            
-            elif data == 'change_language':
-                await self.show_language_selection(update, context)
-            
-            elif data == 'help':
-                await self.show_help(update, context)
-            
-            elif data.startswith('lang_'):
-                lang_code = data.split('_')[1]
-                await self.change_language(update, context, lang_code)
-            
-            elif data == 'admin_panel':
-                await self.show_admin_panel(update, context)
-            
-            elif data == 'admin_stats':
-                await self.show_admin_statistics(update, context)
-            
-            elif data == 'admin_broadcast':
-                await self.show_broadcast_menu(update, context)
-            
-            # Answer callback query
-            await query.answer()
-            
-        except Exception as e:
-            self.logger.error(f"Error handling callback query: {e}")
+    def register_callbacks(self, router: CallbackRouter):
+        """Register callback query routes"""
+        router.route('main_menu', self.show_main_menu)
+        router.route('download', self.show_download_info)
+        router.route('change_language', self.show_language_selection)
+        router.route('help', self.show_help)
+        router.route('lang', self.change_language, answer=False)
+        router.route_prefix('lang_', self.change_language, answer=False)
+        router.route('admin_panel', self.show_admin_panel)
+        router.route('admin_stats', self.show_admin_statistics)
+        router.route('fmt', self.handle_format_pick, answer=False)
+        router.route('batch_cancel', self.cancel_batch, answer=False)
     
     async def show_main_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show main menu"""
@@ -494,7 +731,7 @@ class MainHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en')
             
             # Create main menu keyboard
@@ -522,7 +759,7 @@ class MainHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en')
             
             # Create keyboard
@@ -546,13 +783,13 @@ class MainHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en')
             
             # Create language selection keyboard
             keyboard = []
             for lang_code, lang_name in language_manager.get_supported_languages().items():
-                keyboard.append([InlineKeyboardButton(lang_name, callback_data=f'lang_{lang_code}')])
+                keyboard.append([InlineKeyboardButton(lang_name, callback_data=encode_callback('lang', lang_code))])
             
             keyboard.append([InlineKeyboardButton(_("BTN_BACK", language), callback_data='main_menu')])
             reply_markup = InlineKeyboardMarkup(keyboard)
@@ -596,7 +833,7 @@ class MainHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             language = user_data.get('language', 'en')
             
             # Create keyboard
@@ -620,7 +857,7 @@ class MainHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data or not user_data.get('is_admin', False):
                 await query.answer("❌ Access denied", show_alert=True)
                 return
@@ -653,7 +890,7 @@ class MainHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data or not user_data.get('is_admin', False):
                 await query.answer("❌ Access denied", show_alert=True)
                 return
@@ -666,6 +903,10 @@ class MainHandlers:
             
             # Format statistics
             stats_text = _("STATISTICS", language, **stats)
+            stats_text += "\n" + self.format_bandwidth_usage(language)
+            stats_text += "\n" + _("STORAGE_READS", language, **request_middleware.get_stats())
+            stats_text += "\n" + _("UPDATE_QUEUE", language, **update_processor.get_stats())
+            stats_text += "\n" + _("OUTBOUND_REQUESTS", language, **rate_limiter.get_stats())
             
             # Create back button
             keyboard = [[InlineKeyboardButton(_("BTN_BACK", language), callback_data='admin_panel')]]
@@ -680,6 +921,19 @@ class MainHandlers:
         except Exception as e:
             self.logger.error(f"Error showing admin statistics: {e}")
     
+    def format_bandwidth_usage(self, language: str) -> str:
+        """Format live bandwidth utilisation"""
+        def rate(value):
+            return f"{value / 1048576:.1f} MB/s" if value else "∞"
+        
+        usage = bandwidth_governor.get_utilisation()
+        return _(
+            "BANDWIDTH_USAGE", language,
+            ingress=rate(usage['ingress']['rate']), ingress_limit=rate(usage['ingress']['limit']),
+            egress=rate(usage['egress']['rate']), egress_limit=rate(usage['egress']['limit']),
+            jobs=usage['ingress']['active_jobs']
+        )
+    
     async def show_broadcast_menu(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Show broadcast menu"""
         try:
@@ -687,7 +941,7 @@ class MainHandlers:
             user = query.from_user
             
             # Get user data
-            user_data = firebase_service.get_user(user.id)
+            user_data = load_request(update, context).user_data
             if not user_data or not user_data.get('is_admin', False):
                 await query.answer("❌ Access denied", show_alert=True)
                 return
@@ -700,6 +954,7 @@ class MainHandlers:
                 [InlineKeyboardButton("👥 " + _("BROADCAST_USERS_GROUPS", language), callback_data='broadcast_users_groups')],
                 [InlineKeyboardButton("⏰ " + _("BROADCAST_SCHEDULED", language), callback_data='broadcast_scheduled')],
                 [InlineKeyboardButton("🗑️ " + _("BROADCAST_DELETE", language), callback_data='broadcast_delete')],
+                [InlineKeyboardButton("📊 " + _("BROADCAST_STATUS", language), callback_data='broadcast_status')],
                 [InlineKeyboardButton(_("BTN_BACK", language), callback_data='admin_panel')]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
@@ -737,6 +992,82 @@ def _(key: str, language: str = 'en', **kwargs) -> str:
         'BROADCAST_DELETE': {
             'en': 'Delete Broadcast',
             'fa': 'حذف پیام همگانی'
+        },
+        'BROADCAST_STATUS': {
+            'en': 'Broadcast Progress',
+            'fa': 'پیشرفت پیام همگانی'
+        },
+        'SEND_AUDIO_URL': {
+            'en': 'Send /audio followed by a link to get its audio track',
+            'fa': 'برای دریافت صدای یک لینک، /audio را همراه با لینک ارسال کنید'
+        },
+        'START_FIRST': {
+            'en': 'Please send /start first to set up your profile',
+            'fa': 'لطفاً ابتدا /start را ارسال کنید تا پروفایل شما ساخته شود'
+        },
+        'FETCHING_INFO': {
+            'en': '🔎 Fetching info...',
+            'fa': '🔎 در حال دریافت اطلاعات...'
+        },
+        'MEDIA_PREVIEW': {
+            'en': '🎞 {title}\n👤 {uploader}\n⏱ {duration}\n\nChoose a format:',
+            'fa': '🎞 {title}\n👤 {uploader}\n⏱ {duration}\n\nیک فرمت انتخاب کنید:'
+        },
+        'BTN_BEST_QUALITY': {
+            'en': '⭐ Best',
+            'fa': '⭐ بهترین'
+        },
+        'BTN_AUDIO_ONLY': {
+            'en': '🎵 Audio',
+            'fa': '🎵 فقط صدا'
+        },
+        'FORMAT_PICK_EXPIRED': {
+            'en': 'This menu has expired, please send the link again',
+            'fa': 'این منو منقضی شده است، لطفاً لینک را دوباره ارسال کنید'
+        },
+        'BTN_CANCEL_BATCH': {
+            'en': '❌ Cancel',
+            'fa': '❌ لغو'
+        },
+        'BATCH_PROGRESS': {
+            'en': '📥 {title}\n{done}/{total} processed, {sent} sent',
+            'fa': '📥 {title}\n{done} از {total} پردازش شد، {sent} ارسال شد'
+        },
+        'BATCH_FINISHED': {
+            'en': '✅ {title}\n{sent} sent, {failed} failed, {skipped} skipped (size limit)',
+            'fa': '✅ {title}\n{sent} ارسال شد، {failed} ناموفق، {skipped} رد شد (محدودیت حجم)'
+        },
+        'BATCH_CANCELLED': {
+            'en': '⛔ {title}\nCancelled after {sent} of {total} items',
+            'fa': '⛔ {title}\nپس از ارسال {sent} از {total} مورد لغو شد'
+        },
+        'BATCH_CANCELLING': {
+            'en': 'Cancelling, downloads in progress will finish first',
+            'fa': 'در حال لغو، دانلودهای در جریان ابتدا تمام می‌شوند'
+        },
+        'UPLOADING_PART': {
+            'en': '📦 Uploading part {index}/{count}...',
+            'fa': '📦 در حال ارسال بخش {index} از {count}...'
+        },
+        'PART_CAPTION': {
+            'en': 'Part {index}/{count}',
+            'fa': 'بخش {index} از {count}'
+        },
+        'OUTBOUND_REQUESTS': {
+            'en': '📨 *Telegram requests:* {sent} sent ({broadcast_sent} broadcast), {queued} waiting, {flood_waits} flood waits, longest wait {max_wait:.1f}s',
+            'fa': '📨 *درخواست‌های تلگرام:* {sent} ارسال ({broadcast_sent} همگانی)، {queued} در انتظار، {flood_waits} محدودیت ارسال، بیشترین انتظار {max_wait:.1f} ثانیه'
+        },
+        'UPDATE_QUEUE': {
+            'en': '⚙️ *Updates:* {running}/{max_concurrent} running, {pending} queued in {active_chats} chats, deepest chat queue {max_queue_depth}',
+            'fa': '⚙️ *درخواست‌ها:* {running} از {max_concurrent} در حال اجرا، {pending} در صف {active_chats} چت، بیشترین صف یک چت {max_queue_depth}'
+        },
+        'STORAGE_READS': {
+            'en': '🗄 *Storage reads per update:* {avg_reads:.2f} avg, {max_reads} max ({updates} updates)',
+            'fa': '🗄 *خواندن از پایگاه داده در هر درخواست:* میانگین {avg_reads:.2f}، حداکثر {max_reads} ({updates} درخواست)'
+        },
+        'BANDWIDTH_USAGE': {
+            'en': '📶 *Bandwidth:* ⬇️ {ingress} / {ingress_limit}, ⬆️ {egress} / {egress_limit}, {jobs} active downloads',
+            'fa': '📶 *پهنای باند:* ⬇️ {ingress} / {ingress_limit}، ⬆️ {egress} / {egress_limit}، {jobs} دانلود فعال'
         }
     }
     
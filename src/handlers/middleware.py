@@ -0,0 +1,110 @@
+import time
+from typing import Optional, Dict, Any, List, Tuple
+
+from telegram import Update
+from telegram.ext import CallbackContext, ContextTypes, BaseHandler, TypeHandler
+
+from src.services.firebase import firebase_service
+from src.utils.logger import Logger
+from src.utils.request_context import RequestContext, current_request
+
+
+class BotContext(CallbackContext):
+    """Callback context carrying the request resolved by the middleware"""
+
+    def __init__(self, application, chat_id: int = None, user_id: int = None):
+        super().__init__(application, chat_id=chat_id, user_id=user_id)
+        self.request: Optional[RequestContext] = None
+
+
+def load_request(update: Update, context: ContextTypes.DEFAULT_TYPE) -> RequestContext:
+    """Get the request of an update, reading user and group on first use"""
+    request = getattr(context, 'request', None)
+    if request is not None:
+        return request
+
+    user = update.effective_user
+    chat = update.effective_chat
+    request = RequestContext(
+        user_id=user.id if user else None,
+        chat_id=chat.id if chat else None,
+        chat_type=chat.type if chat else None
+    )
+    current_request.set(request)
+
+    if request.user_id:
+        request.user_data = firebase_service.get_user(request.user_id)
+        if request.user_data:
+            request.language = request.user_data.get('language', 'en')
+    if request.is_group:
+        request.group_data = firebase_service.get_group(request.chat_id)
+
+    context.request = request
+    return request
+
+
+def reload_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> RequestContext:
+    """Read user again after it was created during this update"""
+    request = load_request(update, context)
+    if request.user_id:
+        request.user_data = firebase_service.get_user(request.user_id)
+        request.language = (request.user_data or {}).get('language', 'en')
+    return request
+
+
+def reload_group(update: Update, context: ContextTypes.DEFAULT_TYPE) -> RequestContext:
+    """Read group again after it was created during this update"""
+    request = load_request(update, context)
+    if request.chat_id:
+        request.group_data = firebase_service.get_group(request.chat_id)
+    return request
+
+
+class RequestMiddleware:
+    """Resolve the request before any handler and record storage reads after all of them"""
+
+    def __init__(self):
+        self.logger = Logger("RequestMiddleware")
+        self.updates = 0
+        self.total_reads = 0
+        self.max_reads = 0
+
+    async def load_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Resolve user, language and group of the update"""
+        try:
+            load_request(update, context)
+        except Exception as e:
+            self.logger.error(f"Error loading request context: {e}")
+
+    async def finish_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Record storage reads of the finished update"""
+        request = getattr(context, 'request', None)
+        if request is None:
+            return
+
+        self.updates += 1
+        self.total_reads += request.storage_reads
+        self.max_reads = max(self.max_reads, request.storage_reads)
+        self.logger.debug(
+            f"Update {update.update_id}: {request.storage_reads} storage reads "
+            f"in {(time.monotonic() - request.started_at) * 1000:.0f} ms"
+        )
+        current_request.set(None)
+
+    def get_handlers(self) -> List[Tuple[BaseHandler, int]]:
+        """Get handlers with the groups they run in, around all other handlers"""
+        return [
+            (TypeHandler(Update, self.load_update), -1),
+            (TypeHandler(Update, self.finish_update), 100)
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get storage reads per update"""
+        return {
+            'updates': self.updates,
+            'avg_reads': (self.total_reads / self.updates) if self.updates else 0.0,
+            'max_reads': self.max_reads
+        }
+
+# Global request middleware instance
+request_middleware = RequestMiddleware()
@@ -0,0 +1,92 @@
+from typing import Optional, Dict, List, Tuple, Callable, Awaitable
+
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes, CallbackQueryHandler
+
+from src.utils.logger import Logger
+
+# Telegram rejects callback data longer than 64 bytes
+MAX_CALLBACK_DATA = 64
+SEPARATOR = ':'
+
+Callback = Callable[..., Awaitable[None]]
+
+
+def encode_callback(action: str, *args) -> str:
+    """Build compact callback data such as 'lang:fa'"""
+    data = SEPARATOR.join([action, *(str(arg) for arg in args)])
+    if len(data.encode('utf-8')) > MAX_CALLBACK_DATA:
+        raise ValueError(f"Callback data for {action} exceeds {MAX_CALLBACK_DATA} bytes")
+    return data
+
+
+def decode_callback(data: str) -> Tuple[str, List[str]]:
+    """Split callback data into action and arguments"""
+    action, _sep, rest = data.partition(SEPARATOR)
+    return action, rest.split(SEPARATOR) if rest else []
+
+
+class CallbackRouter:
+    """Single entry point for callback queries with table lookups instead of if/elif chains"""
+
+    def __init__(self):
+        self.logger = Logger("CallbackRouter")
+        # action -> (callback, answer after callback)
+        self.routes: Dict[str, Tuple[Callback, bool]] = {}
+        # Legacy 'prefix_value' payloads, looked up by each distinct prefix length
+        self.prefixes: Dict[str, Tuple[Callback, bool]] = {}
+        self.prefix_lengths: List[int] = []
+
+    def route(self, action: str, callback: Callback, answer: bool = True):
+        """Register callback for an action, arguments are passed positionally"""
+        if action in self.routes:
+            raise ValueError(f"Callback action {action} is already routed")
+        self.routes[action] = (callback, answer)
+
+    def route_prefix(self, prefix: str, callback: Callback, answer: bool = True):
+        """Register callback for legacy payloads starting with prefix"""
+        if prefix in self.prefixes:
+            raise ValueError(f"Callback prefix {prefix} is already routed")
+        self.prefixes[prefix] = (callback, answer)
+        self.prefix_lengths = sorted({len(p) for p in self.prefixes}, reverse=True)
+
+    def resolve(self, data: str) -> Tuple[Optional[Tuple[Callback, bool]], List[str]]:
+        """Find route and arguments for callback data"""
+        action, args = decode_callback(data)
+        route = self.routes.get(action)
+        if route:
+            return route, args
+
+        for length in self.prefix_lengths:
+            route = self.prefixes.get(data[:length])
+            if route:
+                return route, [data[length:]]
+        return None, []
+
+    async def dispatch(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Run the callback routed for a query"""
+        query = update.callback_query
+        route, args = self.resolve(query.data or '')
+
+        if not route:
+            self.logger.debug(f"No route for callback data {query.data!r}")
+            await query.answer()
+            return
+
+        callback, answer = route
+        try:
+            await callback(update, context, *args)
+        except Exception as e:
+            self.logger.error(f"Error handling callback {query.data!r}: {e}")
+
+        if answer:
+            try:
+                await query.answer()
+            except TelegramError:
+                # The callback already answered the query
+                pass
+
+    def get_handler(self) -> CallbackQueryHandler:
+        """Get the handler that feeds all callback queries to the router"""
+        return CallbackQueryHandler(self.dispatch)
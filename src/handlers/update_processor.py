@@ -0,0 +1,89 @@
+import asyncio
+from typing import Optional, Dict, Any, Awaitable
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from config.config import Config
+from src.utils.logger import Logger
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Process updates of different chats in parallel and updates of one chat in order"""
+
+    def __init__(self, max_concurrent_updates: int = None, max_pending_updates: int = None):
+        self.concurrency = max_concurrent_updates or Config.MAX_CONCURRENT_UPDATES
+        # The base semaphore is held while waiting for the chat lock, so it bounds
+        # pending updates; the running cap is applied once the chat's turn comes
+        super().__init__(max(max_pending_updates or Config.MAX_PENDING_UPDATES, self.concurrency))
+        self.logger = Logger("UpdateProcessor")
+        self.running = asyncio.Semaphore(self.concurrency)
+        self.active = 0
+        self.chat_locks: Dict[int, asyncio.Lock] = {}
+        self.queue_depths: Dict[int, int] = {}
+        self.max_queue_depth = 0
+        self.processed = 0
+
+    @staticmethod
+    def chat_key(update: object) -> Optional[int]:
+        """Get the chat whose updates must stay in order"""
+        if not isinstance(update, Update):
+            return None
+        if update.effective_chat:
+            return update.effective_chat.id
+        # Inline queries have no chat, keep them in order per user
+        if update.effective_user:
+            return update.effective_user.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]):
+        """Wait for earlier updates of the same chat, then for a free slot"""
+        key = self.chat_key(update)
+        if key is None:
+            await self.run(coroutine)
+            return
+
+        lock = self.chat_locks.setdefault(key, asyncio.Lock())
+        self.queue_depths[key] = self.queue_depths.get(key, 0) + 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue_depths[key])
+        try:
+            async with lock:
+                await self.run(coroutine)
+        finally:
+            self.queue_depths[key] -= 1
+            if not self.queue_depths[key]:
+                # No holder or waiter is left, drop the lock with the counter
+                del self.queue_depths[key]
+                self.chat_locks.pop(key, None)
+
+    async def run(self, coroutine: Awaitable[Any]):
+        """Run a handler coroutine in one of the running slots"""
+        async with self.running:
+            self.active += 1
+            try:
+                await coroutine
+            finally:
+                self.active -= 1
+        self.processed += 1
+
+    async def initialize(self):
+        """Nothing to allocate"""
+
+    async def shutdown(self):
+        """Nothing to free"""
+
+    def get_stats(self, top: int = 5) -> Dict[str, Any]:
+        """Get concurrency and per-chat queue depth metrics"""
+        busiest = sorted(self.queue_depths.items(), key=lambda item: item[1], reverse=True)[:top]
+        return {
+            'running': self.active,
+            'max_concurrent': self.concurrency,
+            'pending': sum(self.queue_depths.values()),
+            'active_chats': len(self.queue_depths),
+            'max_queue_depth': self.max_queue_depth,
+            'processed': self.processed,
+            'busiest_chats': busiest
+        }
+
+# Global update processor instance
+update_processor = ChatOrderedUpdateProcessor()
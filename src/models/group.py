@@ -1,6 +1,8 @@
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict, field, fields
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Set
+
+from src.utils.word_matcher import normalize_text
 
 @dataclass
 class GroupSettings:
@@ -13,6 +15,11 @@ class GroupSettings:
     auto_lock: bool = False
     auto_lock_duration: int = 0  # in minutes
     group_locked: bool = False
+    filter_whole_words: bool = False  # filtered words match whole words only, '*' marks open ends
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return asdict(self)
 
 @dataclass
 class GroupLocks:
@@ -37,6 +44,13 @@ class GroupLocks:
     voice: bool = False
     video_msg: bool = False
     polls: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return asdict(self)
+
+# Lists of GroupLists indexed by a set each, for constant time lookups
+INDEXED_LISTS = ('admins', 'vip_members', 'muted_users', 'banned_users', 'filtered_words')
 
 @dataclass
 class GroupLists:
@@ -47,6 +61,38 @@ class GroupLists:
     muted_users: List[int] = field(default_factory=list)
     banned_users: List[int] = field(default_factory=list)
     warnings: Dict[int, int] = field(default_factory=dict)  # user_id -> warning_count
+    
+    def __setattr__(self, name: str, value: Any):
+        super().__setattr__(name, value)
+        if name in INDEXED_LISTS:
+            # Not a field, so to_dict and the stored document only carry the lists
+            self.__dict__.setdefault('_indexes', {})[name] = set(value)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary"""
+        return asdict(self)
+    
+    def contains(self, name: str, value: Any) -> bool:
+        """Check if a value is in a list"""
+        return value in self._indexes[name]
+    
+    def add(self, name: str, value: Any) -> bool:
+        """Add a value to a list"""
+        index: Set[Any] = self._indexes[name]
+        if value in index:
+            return False
+        index.add(value)
+        getattr(self, name).append(value)
+        return True
+    
+    def remove(self, name: str, value: Any) -> bool:
+        """Remove a value from a list"""
+        index: Set[Any] = self._indexes[name]
+        if value not in index:
+            return False
+        index.discard(value)
+        getattr(self, name).remove(value)
+        return True
 
 @dataclass
 class Group:
@@ -60,6 +106,9 @@ class Group:
     locks: GroupLocks = field(default_factory=GroupLocks)
     lists: GroupLists = field(default_factory=GroupLists)
     
+    # Admins as Telegram reports them, when known, not stored with the group
+    _admin_roster = None
+    
     def __post_init__(self):
         if self.created_at is None:
             self.created_at = datetime.now()
@@ -80,84 +129,67 @@ class Group:
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Group':
-        """Create from dictionary"""
-        return cls(**data)
+        """Create from dictionary, skipping stored fields that are not part of the model"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
     
     def update_activity(self):
         """Update last activity timestamp"""
         self.last_activity = datetime.now()
     
+    def set_admin_roster(self, admins: Set[int]):
+        """Check admins against Telegram's roster rather than the stored list"""
+        self._admin_roster = admins
+    
     def is_admin(self, user_id: int) -> bool:
         """Check if user is admin"""
-        return user_id in self.lists.admins
+        if self._admin_roster is not None:
+            return user_id in self._admin_roster
+        return self.lists.contains('admins', user_id)
     
     def is_vip(self, user_id: int) -> bool:
         """Check if user is VIP member"""
-        return user_id in self.lists.vip_members
+        return self.lists.contains('vip_members', user_id)
     
     def is_muted(self, user_id: int) -> bool:
         """Check if user is muted"""
-        return user_id in self.lists.muted_users
+        return self.lists.contains('muted_users', user_id)
     
     def is_banned(self, user_id: int) -> bool:
         """Check if user is banned"""
-        return user_id in self.lists.banned_users
+        return self.lists.contains('banned_users', user_id)
     
     def add_admin(self, user_id: int) -> bool:
         """Add admin"""
-        if user_id not in self.lists.admins:
-            self.lists.admins.append(user_id)
-            return True
-        return False
+        return self.lists.add('admins', user_id)
     
     def remove_admin(self, user_id: int) -> bool:
         """Remove admin"""
-        if user_id in self.lists.admins:
-            self.lists.admins.remove(user_id)
-            return True
-        return False
+        return self.lists.remove('admins', user_id)
     
     def add_vip(self, user_id: int) -> bool:
         """Add VIP member"""
-        if user_id not in self.lists.vip_members:
-            self.lists.vip_members.append(user_id)
-            return True
-        return False
+        return self.lists.add('vip_members', user_id)
     
     def remove_vip(self, user_id: int) -> bool:
         """Remove VIP member"""
-        if user_id in self.lists.vip_members:
-            self.lists.vip_members.remove(user_id)
-            return True
-        return False
+        return self.lists.remove('vip_members', user_id)
     
     def mute_user(self, user_id: int) -> bool:
         """Mute user"""
-        if user_id not in self.lists.muted_users:
-            self.lists.muted_users.append(user_id)
-            return True
-        return False
+        return self.lists.add('muted_users', user_id)
     
     def unmute_user(self, user_id: int) -> bool:
         """Unmute user"""
-        if user_id in self.lists.muted_users:
-            self.lists.muted_users.remove(user_id)
-            return True
-        return False
+        return self.lists.remove('muted_users', user_id)
     
     def ban_user(self, user_id: int) -> bool:
         """Ban user"""
-        if user_id not in self.lists.banned_users:
-            self.lists.banned_users.append(user_id)
-            return True
-        return False
+        return self.lists.add('banned_users', user_id)
     
     def unban_user(self, user_id: int) -> bool:
         """Unban user"""
-        if user_id in self.lists.banned_users:
-            self.lists.banned_users.remove(user_id)
-            return True
-        return False
+        return self.lists.remove('banned_users', user_id)
     
     def add_warning(self, user_id: int) -> int:
         """Add warning to user"""
@@ -186,23 +218,17 @@ class Group:
         return False
     
     def add_filtered_word(self, word: str) -> bool:
-        """Add filtered word"""
-        if word.lower() not in [w.lower() for w in self.lists.filtered_words]:
-            self.lists.filtered_words.append(word.lower())
-            return True
-        return False
+        """Add filtered word, stored in the normalised form the matcher uses"""
+        word = normalize_text(word.strip())
+        return bool(word) and self.lists.add('filtered_words', word)
     
     def remove_filtered_word(self, word: str) -> bool:
         """Remove filtered word"""
-        word_lower = word.lower()
-        if word_lower in [w.lower() for w in self.lists.filtered_words]:
-            self.lists.filtered_words = [w for w in self.lists.filtered_words if w.lower() != word_lower]
-            return True
-        return False
+        return self.lists.remove('filtered_words', normalize_text(word.strip()))
     
     def is_word_filtered(self, word: str) -> bool:
         """Check if word is filtered"""
-        return word.lower() in [w.lower() for w in self.lists.filtered_words]
+        return self.lists.contains('filtered_words', normalize_text(word.strip()))
     
     def lock_feature(self, feature: str) -> bool:
         """Lock a feature"""
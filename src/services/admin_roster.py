@@ -0,0 +1,97 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Set, Tuple
+
+from telegram import Bot, ChatMember, ChatMemberUpdated
+from telegram.error import TelegramError
+
+from config.config import Config
+from src.utils.logger import Logger
+
+# Member statuses with admin rights in a group
+ADMIN_STATUSES = (ChatMember.ADMINISTRATOR, ChatMember.OWNER)
+
+
+class AdminRoster:
+    """Telegram administrators per group, loaded once per TTL and kept current by chat member updates"""
+
+    def __init__(self, ttl: int = None, max_groups: int = None):
+        self.logger = Logger("AdminRoster")
+        self.ttl = ttl or Config.ADMIN_ROSTER_TTL
+        self.max_groups = max_groups or Config.MODERATION_CACHE_SIZE
+        # chat_id -> (loaded at, admin user ids), least recently used first
+        self.rosters: OrderedDict[int, Tuple[float, Set[int]]] = OrderedDict()
+        # Loads in progress, so concurrent updates of one group share a request
+        self.loading: Dict[int, asyncio.Task] = {}
+        self.hits = 0
+        self.fetches = 0
+
+    def get_cached(self, chat_id: int) -> Optional[Set[int]]:
+        """Get the admins of a group if they were loaded within the TTL"""
+        cached = self.rosters.get(chat_id)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            self.rosters.move_to_end(chat_id)
+            return cached[1]
+        return None
+
+    async def get_admins(self, bot: Bot, chat_id: int) -> Optional[Set[int]]:
+        """Get the admins of a group, None when Telegram can't be asked"""
+        admins = self.get_cached(chat_id)
+        if admins is not None:
+            self.hits += 1
+            return admins
+
+        task = self.loading.get(chat_id)
+        if task is None:
+            task = asyncio.create_task(self.load(bot, chat_id))
+            self.loading[chat_id] = task
+            task.add_done_callback(lambda _task: self.loading.pop(chat_id, None))
+        return await asyncio.shield(task)
+
+    async def load(self, bot: Bot, chat_id: int) -> Optional[Set[int]]:
+        """Read the admins of a group from Telegram"""
+        try:
+            self.fetches += 1
+            members = await bot.get_chat_administrators(chat_id)
+        except TelegramError as e:
+            self.logger.warning(f"Could not load admins of {chat_id}: {e}")
+            return None
+
+        admins = {member.user.id for member in members}
+        self.rosters[chat_id] = (time.monotonic(), admins)
+        self.rosters.move_to_end(chat_id)
+        if len(self.rosters) > self.max_groups:
+            self.rosters.popitem(last=False)
+        return admins
+
+    async def is_admin(self, bot: Bot, chat_id: int, user_id: int) -> Optional[bool]:
+        """Check if user is an admin of a group, None when Telegram can't be asked"""
+        admins = await self.get_admins(bot, chat_id)
+        return None if admins is None else user_id in admins
+
+    def apply(self, member_update: ChatMemberUpdated):
+        """Follow a promotion, demotion or departure in a loaded roster"""
+        cached = self.rosters.get(member_update.chat.id)
+        if not cached:
+            return
+        user_id = member_update.new_chat_member.user.id
+        if member_update.new_chat_member.status in ADMIN_STATUSES:
+            cached[1].add(user_id)
+        else:
+            cached[1].discard(user_id)
+
+    def invalidate(self, chat_id: int):
+        """Drop the roster of a group"""
+        self.rosters.pop(chat_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get roster cache counters"""
+        return {
+            'groups': len(self.rosters),
+            'hits': self.hits,
+            'fetches': self.fetches
+        }
+
+# Global admin roster instance
+admin_roster = AdminRoster()
@@ -0,0 +1,191 @@
+import asyncio
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any
+
+from config.config import Config
+from src.utils.logger import Logger
+
+
+class TokenBucket:
+    """Thread-safe token bucket where callers sleep off any deficit"""
+
+    def __init__(self, rate: float, burst_seconds: float = 1.0):
+        self._lock = threading.Lock()
+        self.burst_seconds = burst_seconds
+        self.rate = float(rate)
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+
+    @property
+    def capacity(self) -> float:
+        return self.rate * self.burst_seconds
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def set_rate(self, rate: float):
+        """Change refill rate"""
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+            self.tokens = min(self.tokens, self.capacity)
+
+    def take_available(self, amount: float) -> float:
+        """Take up to amount tokens without waiting, return tokens taken"""
+        with self._lock:
+            self._refill()
+            taken = max(0.0, min(amount, self.tokens))
+            self.tokens -= taken
+            return taken
+
+    def reserve(self, amount: float) -> float:
+        """Take tokens on credit, return seconds to wait before using them"""
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            if self.tokens >= 0 or self.rate <= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+
+class RateMeter:
+    """Exponentially decaying throughput meter"""
+
+    def __init__(self, window: float = 5.0):
+        self._lock = threading.Lock()
+        self.window = window
+        self.total = 0
+        self._value = 0.0
+        self._last = time.monotonic()
+
+    def _decayed(self, now: float) -> float:
+        return self._value * math.exp(-(now - self._last) / self.window)
+
+    def record(self, amount: int):
+        with self._lock:
+            now = time.monotonic()
+            self._value = self._decayed(now) + amount
+            self._last = now
+            self.total += amount
+
+    def rate(self) -> float:
+        """Bytes per second over the recent window"""
+        with self._lock:
+            return self._decayed(time.monotonic()) / self.window
+
+
+class BandwidthBudget:
+    """Bandwidth budget for one direction with per-job minimum guarantees"""
+
+    def __init__(self, limit: int, min_job_rate: int):
+        self.limit = limit
+        self.min_job_rate = min_job_rate
+        self.meter = RateMeter()
+        self.shared = TokenBucket(limit)
+        self.jobs: Dict[Any, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _rebalance(self):
+        """Reserve guaranteed rates for active jobs, share the rest"""
+        if not self.limit:
+            return
+        count = len(self.jobs)
+        # Transfers of unregistered ids are paced by the shared bucket, which keeps at least one job's share
+        guaranteed = min(self.min_job_rate, self.limit / (count + 1))
+        self.shared.set_rate(self.limit - guaranteed * count)
+        for bucket in self.jobs.values():
+            bucket.set_rate(guaranteed)
+
+    def register(self, job_id):
+        with self._lock:
+            self.jobs[job_id] = TokenBucket(0)
+            self._rebalance()
+
+    def unregister(self, job_id):
+        with self._lock:
+            self.jobs.pop(job_id, None)
+            self._rebalance()
+
+    def reserve(self, job_id, amount: int) -> float:
+        """Account amount bytes for a job, return seconds to wait"""
+        self.meter.record(amount)
+        if not self.limit:
+            return 0.0
+
+        bucket = self.jobs.get(job_id)
+        if bucket is None:
+            return self.shared.reserve(amount)
+
+        # Own guarantee first, then whatever the shared bucket holds right now. Any deficit is
+        # owed to the job's own bucket, so no job sleeps off debt another job ran up
+        remaining = amount - bucket.take_available(amount)
+        if remaining > 0:
+            remaining -= self.shared.take_available(remaining)
+        if remaining <= 0:
+            return 0.0
+        return bucket.reserve(remaining)
+
+    def job_share(self) -> int:
+        """Fair share of the budget for one job (0 = unlimited)"""
+        if not self.limit:
+            return 0
+        return int(self.limit / max(len(self.jobs), 1))
+
+    def get_utilisation(self) -> Dict[str, Any]:
+        rate = self.meter.rate()
+        return {
+            'rate': int(rate),
+            'limit': self.limit,
+            'utilisation': (rate / self.limit) if self.limit else 0.0,
+            'active_jobs': len(self.jobs),
+            'total_bytes': self.meter.total
+        }
+
+
+class BandwidthGovernor:
+    """Shared ingress/egress bandwidth governor for all download workers"""
+
+    def __init__(self):
+        self.logger = Logger("BandwidthGovernor")
+        self.budgets = {
+            'ingress': BandwidthBudget(Config.INGRESS_BANDWIDTH_LIMIT, Config.MIN_JOB_BANDWIDTH),
+            'egress': BandwidthBudget(Config.EGRESS_BANDWIDTH_LIMIT, Config.MIN_JOB_BANDWIDTH),
+        }
+
+    @contextmanager
+    def job(self, direction: str, job_id):
+        """Register a job for the duration of a transfer"""
+        budget = self.budgets[direction]
+        budget.register(job_id)
+        try:
+            yield
+        finally:
+            budget.unregister(job_id)
+
+    def throttle(self, direction: str, job_id, amount: int):
+        """Account transferred bytes and block until within budget"""
+        wait = self.budgets[direction].reserve(job_id, amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def throttle_async(self, direction: str, job_id, amount: int):
+        """Account bytes up front and wait without blocking the event loop, the transfer itself is not paced"""
+        wait = self.budgets[direction].reserve(job_id, amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def job_share(self, direction: str) -> int:
+        """Current fair share of one job in bytes per second"""
+        return self.budgets[direction].job_share()
+
+    def get_utilisation(self) -> Dict[str, Dict[str, Any]]:
+        """Get live utilisation for both directions"""
+        return {direction: budget.get_utilisation() for direction, budget in self.budgets.items()}
+
+# Global bandwidth governor instance
+bandwidth_governor = BandwidthGovernor()
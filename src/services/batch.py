@@ -0,0 +1,115 @@
+import asyncio
+import os
+import uuid
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+from config.config import Config
+from src.utils.logger import Logger
+from src.services.downloader import download_service
+
+
+class BatchJob:
+    """Playlist or channel download streamed item by item"""
+
+    def __init__(self, user_id: int, title: str, entries: List[Dict[str, Any]],
+                 audio_only: bool = False, max_bytes: int = None):
+        self.batch_id = uuid.uuid4().hex[:12]
+        self.user_id = user_id
+        self.title = title
+        self.entries = entries
+        self.audio_only = audio_only
+        self.max_bytes = max_bytes if max_bytes is not None else Config.PLAYLIST_SIZE_BUDGET
+        self.bytes_used = 0
+        self.sent = 0
+        self.failed = 0
+        self.skipped = 0
+        self.cancelled = False
+
+    @property
+    def total(self) -> int:
+        return len(self.entries)
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed + self.skipped
+
+    @property
+    def remaining_bytes(self) -> int:
+        return max(self.max_bytes - self.bytes_used, 0)
+
+    @property
+    def budget_exhausted(self) -> bool:
+        return bool(self.max_bytes) and self.bytes_used >= self.max_bytes
+
+
+class BatchService:
+    """Run batch jobs through the shared download workers"""
+
+    def __init__(self):
+        self.logger = Logger("BatchService")
+        self.concurrency = Config.PLAYLIST_CONCURRENCY
+        self.batches: Dict[str, BatchJob] = {}
+
+    def create(self, user_id: int, playlist: Dict[str, Any], audio_only: bool = False) -> BatchJob:
+        """Create batch job for an enumerated playlist"""
+        batch = BatchJob(user_id, playlist['title'], playlist['entries'], audio_only)
+        self.batches[batch.batch_id] = batch
+        return batch
+
+    def get(self, batch_id: str) -> Optional[BatchJob]:
+        """Get running batch job"""
+        return self.batches.get(batch_id)
+
+    def cancel(self, batch_id: str, user_id: int) -> bool:
+        """Cancel batch job, only the user who started it can cancel"""
+        batch = self.batches.get(batch_id)
+        if not batch or batch.user_id != user_id:
+            return False
+        batch.cancelled = True
+        return True
+
+    async def run(self, batch: BatchJob,
+                  on_item: Callable[[BatchJob, Dict[str, Any], Dict[str, Any]], Awaitable[bool]]):
+        """Download entries with a per-batch cap, handing each to on_item as it completes"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def process(entry: Dict[str, Any]):
+            async with semaphore:
+                if batch.cancelled or batch.budget_exhausted:
+                    batch.skipped += 1
+                    return
+
+                # Items larger than what is left of the budget are rejected before downloading
+                media = await download_service.download_media_async(
+                    entry['url'], batch.user_id, audio_only=batch.audio_only,
+                    size_limit=batch.remaining_bytes if batch.max_bytes else None
+                )
+                if not media:
+                    batch.failed += 1
+                    return
+
+                try:
+                    size = os.path.getsize(media['file_path'])
+                    if batch.cancelled or (batch.max_bytes and batch.bytes_used + size > batch.max_bytes):
+                        batch.skipped += 1
+                        return
+
+                    batch.bytes_used += size
+                    if await on_item(batch, entry, media):
+                        batch.sent += 1
+                    else:
+                        batch.failed += 1
+                except Exception as e:
+                    self.logger.error(f"Error sending batch item {entry['url']}: {e}")
+                    batch.failed += 1
+                finally:
+                    if os.path.exists(media['file_path']):
+                        os.unlink(media['file_path'])
+
+        try:
+            await asyncio.gather(*(process(entry) for entry in batch.entries))
+        finally:
+            self.batches.pop(batch.batch_id, None)
+
+# Global batch service instance
+batch_service = BatchService()
@@ -0,0 +1,414 @@
+import asyncio
+import time
+from typing import Optional, Dict, Any, List, Callable, Awaitable, AsyncIterator
+
+from telegram import Bot
+from telegram.error import Forbidden, BadRequest, RetryAfter
+
+from config.config import Config
+from src.utils.logger import Logger
+from src.utils.retry import retry_storage
+from src.services.firebase import firebase_service
+from src.services.rate_limiter import LANE_BROADCAST
+from src.services.recipients import recipient_planner, Recipient
+
+# Statuses of a broadcast document
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_PAUSED = 'paused'
+STATUS_CANCELLED = 'cancelled'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+
+# Classes of failed deliveries counted per broadcast
+ERROR_BLOCKED = 'blocked'  # blocked by the user, or removed from the group
+ERROR_DEACTIVATED = 'deactivated'  # account deleted or chat gone
+ERROR_FLOOD = 'flood'  # still flood limited after the rate limiter's retries
+ERROR_OTHER = 'other'
+ERROR_CLASSES = (ERROR_BLOCKED, ERROR_DEACTIVATED, ERROR_FLOOD, ERROR_OTHER)
+# Chats failing with these are left out of broadcasts until they talk to the bot again
+UNREACHABLE_ERRORS = (ERROR_BLOCKED, ERROR_DEACTIVATED)
+
+
+def classify_error(error: Exception) -> str:
+    """Class of a failed delivery"""
+    description = str(error).lower()
+    if isinstance(error, RetryAfter):
+        return ERROR_FLOOD
+    if isinstance(error, Forbidden):
+        return ERROR_DEACTIVATED if 'deactivated' in description else ERROR_BLOCKED
+    if isinstance(error, BadRequest) and ('chat not found' in description or 'deactivated' in description):
+        return ERROR_DEACTIVATED
+    return ERROR_OTHER
+
+
+class BroadcastJob:
+    """Broadcast delivered by this instance, with counters mirrored in its document"""
+
+    def __init__(self, broadcast_id: str, broadcast: Dict[str, Any]):
+        self.broadcast_id = broadcast_id
+        self.message = broadcast.get('message', '')
+        self.target_type = broadcast.get('target_type', 'users')
+        self.variants: Dict[str, str] = broadcast.get('variants') or {}
+        self.sources: Dict[str, Dict[str, Any]] = broadcast.get('sources') or {}
+        self.audience: Dict[str, Any] = broadcast.get('audience') or {}
+        self.total = broadcast.get('recipients_count', 0)
+        self.sent = broadcast.get('sent_count', 0)
+        self.failed = broadcast.get('failed_count', 0)
+        self.skipped = broadcast.get('skipped_count', 0)
+        self.errors: Dict[str, int] = dict(broadcast.get('error_counts') or {})
+        self.cursor: Dict[str, str] = broadcast.get('cursor') or {}
+        # Recipients claimed by a checkpoint but not settled when the last run stopped
+        self.in_flight = broadcast.get('in_flight', 0)
+        self.progress: Dict[str, Any] = broadcast.get('progress') or {}
+        self.status = broadcast.get('status', STATUS_PENDING)
+        self.running = asyncio.Event()
+        self.cancelled = False
+        self.stopping = False
+        self.task: Optional[asyncio.Task] = None
+        # Checkpoints are written one at a time so an older one never lands last
+        self.lock = asyncio.Lock()
+        self.started_at = time.monotonic()
+        self.paused_for = 0.0
+        self.done_at_start = self.done
+        if self.status != STATUS_PAUSED:
+            self.running.set()
+
+    @property
+    def done(self) -> int:
+        return self.sent + self.failed + self.skipped
+
+    def get_text(self, language: str) -> str:
+        """Message in the recipient's language, the original when there is no variant"""
+        return self.variants.get(language) or self.message
+
+    def get_source(self, language: str) -> Optional[Dict[str, Any]]:
+        """Captured message to copy for a language, None for text-only broadcasts"""
+        if language in self.sources:
+            return self.sources[language]
+        if language in self.variants:
+            return None
+        return self.sources.get('default')
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in (STATUS_PENDING, STATUS_RUNNING, STATUS_PAUSED)
+
+    @property
+    def rate(self) -> float:
+        """Recipients settled per second by this run, paused time left out"""
+        elapsed = time.monotonic() - self.started_at - self.paused_for
+        return (self.done - self.done_at_start) / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Seconds until every planned recipient is settled at the current rate"""
+        rate = self.rate
+        return max(self.total - self.done, 0) / rate if rate else None
+
+    def get_checkpoint(self) -> Dict[str, Any]:
+        """Document fields recording how far delivery got"""
+        return {
+            'status': self.status,
+            'cursor': self.cursor,
+            'in_flight': self.in_flight,
+            'recipients_count': self.total,
+            'sent_count': self.sent,
+            'failed_count': self.failed,
+            'skipped_count': self.skipped,
+            'error_counts': self.errors,
+            # Renews the claim so other instances leave the broadcast alone
+            'heartbeat_at': time.time()
+        }
+
+
+class BroadcastService:
+    """Deliver broadcasts page by page under the rate limiter, resumable from checkpoints"""
+
+    def __init__(self):
+        self.logger = Logger("BroadcastService")
+        self.concurrency = Config.BROADCAST_CONCURRENCY
+        self.chunk_size = Config.BROADCAST_CHUNK_SIZE
+        self.jobs: Dict[str, BroadcastJob] = {}
+
+    def get(self, broadcast_id: str) -> Optional[BroadcastJob]:
+        """Get broadcast delivered by this instance"""
+        return self.jobs.get(broadcast_id)
+
+    def get_active(self) -> List[BroadcastJob]:
+        """Get broadcasts that are running or paused"""
+        return [job for job in self.jobs.values() if job.is_active]
+
+    def start(self, bot: Bot, broadcast_id: str, broadcast: Dict[str, Any],
+              on_progress: Callable[[Bot, BroadcastJob], Awaitable[None]] = None) -> BroadcastJob:
+        """Deliver a claimed broadcast in the background"""
+        if broadcast_id in self.jobs:
+            return self.jobs[broadcast_id]
+
+        job = BroadcastJob(broadcast_id, broadcast)
+        self.jobs[broadcast_id] = job
+        job.task = asyncio.create_task(self.run(bot, job, on_progress))
+        return job
+
+    async def claim_and_start(self, bot: Bot, broadcast_id: str, statuses: List[str] = None,
+                              on_progress: Callable[[Bot, BroadcastJob], Awaitable[None]] = None) -> Optional[BroadcastJob]:
+        """Start a broadcast unless another instance already delivers it"""
+        if broadcast_id in self.jobs:
+            return self.jobs[broadcast_id]
+
+        broadcast = await asyncio.to_thread(
+            firebase_service.claim_broadcast, broadcast_id, Config.INSTANCE_ID,
+            statuses or [STATUS_PENDING], Config.BROADCAST_LEASE
+        )
+        if not broadcast:
+            self.logger.debug(f"Broadcast {broadcast_id} is gone or claimed by another instance")
+            return None
+        return self.start(bot, broadcast_id, broadcast, on_progress)
+
+    def pause(self, broadcast_id: str) -> bool:
+        """Pause after the recipients being sent to now"""
+        job = self.jobs.get(broadcast_id)
+        if not job or job.status != STATUS_RUNNING:
+            return False
+        job.running.clear()
+        job.status = STATUS_PAUSED
+        return True
+
+    def resume(self, broadcast_id: str) -> bool:
+        """Continue a paused broadcast"""
+        job = self.jobs.get(broadcast_id)
+        if not job or job.status != STATUS_PAUSED:
+            return False
+        job.status = STATUS_RUNNING
+        job.running.set()
+        firebase_service.update_broadcast(broadcast_id, {'status': STATUS_RUNNING})
+        return True
+
+    def cancel(self, broadcast_id: str) -> bool:
+        """Stop a broadcast for good after the recipients being sent to now"""
+        job = self.jobs.get(broadcast_id)
+        if not job or not job.is_active:
+            return False
+        job.cancelled = True
+        job.running.set()
+        return True
+
+    async def iter_chunks(self, job: BroadcastJob) -> AsyncIterator[List[Recipient]]:
+        """Group the planned recipients from the job's cursor on into checkpoint chunks"""
+        chunk = []
+        async for recipient in recipient_planner.iter_recipients(job.target_type, job.audience, job.cursor):
+            chunk.append(recipient)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    async def send(self, bot: Bot, job: BroadcastJob, recipient: Recipient) -> Optional[str]:
+        """Deliver the broadcast to one chat, return the error class when it fails"""
+        chat_id = recipient.chat_id
+        source = job.get_source(recipient.language)
+        try:
+            if not source:
+                await bot.send_message(
+                    chat_id=chat_id,
+                    text=job.get_text(recipient.language),
+                    parse_mode='Markdown',
+                    rate_limit_args={'lane': LANE_BROADCAST}
+                )
+            elif len(source['message_ids']) > 1:
+                # Albums go out in one request and stay grouped
+                await bot.copy_messages(
+                    chat_id=chat_id,
+                    from_chat_id=source['chat_id'],
+                    message_ids=source['message_ids'],
+                    rate_limit_args={'lane': LANE_BROADCAST}
+                )
+            else:
+                # Copies reuse the uploaded file, media costs no more than text
+                await bot.copy_message(
+                    chat_id=chat_id,
+                    from_chat_id=source['chat_id'],
+                    message_id=source['message_ids'][0],
+                    rate_limit_args={'lane': LANE_BROADCAST}
+                )
+            return None
+        except Exception as e:
+            self.logger.debug(f"Broadcast {job.broadcast_id} failed for {chat_id}: {e}")
+            return classify_error(e)
+
+    async def send_chunk(self, bot: Bot, job: BroadcastJob, chunk: List[Recipient]) -> Dict[str, List[Recipient]]:
+        """Send a chunk with bounded concurrency, the rate limiter paces the requests"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failures: Dict[str, List[Recipient]] = {}
+
+        async def deliver(recipient: Recipient):
+            async with semaphore:
+                error = await self.send(bot, job, recipient)
+                if error is None:
+                    job.sent += 1
+                else:
+                    job.failed += 1
+                    job.errors[error] = job.errors.get(error, 0) + 1
+                    failures.setdefault(error, []).append(recipient)
+                job.in_flight -= 1
+
+        await asyncio.gather(*(deliver(recipient) for recipient in chunk))
+        return failures
+
+    async def record_failures(self, job: BroadcastJob, failures: Dict[str, List[Recipient]]):
+        """Log the failed chat ids of a chunk and stop broadcasting to unreachable chats"""
+        if not failures:
+            return
+        # The report only loses detail when this fails, delivery goes on
+        try:
+            await retry_storage(
+                firebase_service.add_broadcast_failures, job.broadcast_id,
+                {error: [recipient.chat_id for recipient in recipients] for error, recipients in failures.items()}
+            )
+            unreachable = [recipient.position for error in UNREACHABLE_ERRORS for recipient in failures.get(error, [])]
+            if unreachable:
+                await retry_storage(firebase_service.mark_unreachable, unreachable)
+        except Exception as e:
+            self.logger.error(f"Could not record failures of broadcast {job.broadcast_id}: {e}")
+
+    async def checkpoint(self, job: BroadcastJob, **extra):
+        """Write delivery progress to the broadcast document"""
+        async with job.lock:
+            await retry_storage(firebase_service.update_broadcast, job.broadcast_id, {**job.get_checkpoint(), **extra})
+
+    async def run(self, bot: Bot, job: BroadcastJob,
+                  on_progress: Callable[[Bot, BroadcastJob], Awaitable[None]] = None):
+        """Deliver the job chunk by chunk, claiming each chunk in a checkpoint before sending it"""
+        last_progress = 0.0
+
+        async def report(force: bool = False):
+            nonlocal last_progress
+            if on_progress and (force or time.monotonic() - last_progress >= Config.BROADCAST_PROGRESS_INTERVAL):
+                last_progress = time.monotonic()
+                try:
+                    await on_progress(bot, job)
+                except Exception as e:
+                    self.logger.debug(f"Could not report broadcast progress: {e}")
+
+        finished = asyncio.Event()
+
+        async def flush():
+            # Counters move during long chunks too, e.g. while waiting out flood limits
+            while not finished.is_set():
+                try:
+                    await asyncio.wait_for(finished.wait(), Config.BROADCAST_PROGRESS_INTERVAL)
+                except asyncio.TimeoutError:
+                    if job.running.is_set():
+                        try:
+                            await self.checkpoint(job)
+                        except Exception as e:
+                            self.logger.warning(f"Could not checkpoint broadcast {job.broadcast_id}: {e}")
+                        await report()
+
+        async def stop_flushing():
+            # Let a write in progress land before the final checkpoint
+            finished.set()
+            await flusher
+
+        flusher = asyncio.create_task(flush())
+        try:
+            if job.in_flight:
+                # A chunk claimed before a crash may be partly delivered, skip it rather than send twice
+                self.logger.warning(f"Broadcast {job.broadcast_id}: skipping {job.in_flight} unsettled recipients")
+                job.skipped += job.in_flight
+                job.in_flight = 0
+            if not job.total:
+                job.total = await recipient_planner.count(job.target_type, job.audience)
+            if job.status != STATUS_PAUSED:
+                job.status = STATUS_RUNNING
+            await self.checkpoint(job, **({} if job.cursor else {'started_at': time.time()}))
+            await report(True)
+
+            async for chunk in self.iter_chunks(job):
+                if not job.running.is_set():
+                    await self.checkpoint(job)
+                    await report(True)
+                    paused_at = time.monotonic()
+                    while not job.running.is_set():
+                        try:
+                            await asyncio.wait_for(job.running.wait(), Config.BROADCAST_LEASE / 3)
+                        except asyncio.TimeoutError:
+                            await self.checkpoint(job)
+                    job.paused_for += time.monotonic() - paused_at
+                if job.cancelled or job.stopping:
+                    break
+
+                collection, doc_id = chunk[-1].position
+                job.cursor = {'collection': collection, 'after': doc_id}
+                job.in_flight = len(chunk)
+                await self.checkpoint(job)
+
+                failures = await self.send_chunk(bot, job, chunk)
+                await self.record_failures(job, failures)
+                await report()
+
+            await stop_flushing()
+            if job.cancelled:
+                job.status = STATUS_CANCELLED
+            elif not job.stopping:
+                # The planned count also held duplicates and unreachable chats
+                job.total = job.done
+                job.status = STATUS_SENT
+            await self.checkpoint(job)
+            self.logger.info(
+                f"Broadcast {job.broadcast_id} {job.status}: {job.sent}/{job.total} sent, "
+                f"{job.failed} failed {job.errors}, {job.skipped} skipped"
+            )
+
+        except Exception as e:
+            # Storage stayed unavailable through the retries. The status is kept, so the broadcast
+            # is taken over from its last checkpoint once the lease expires
+            self.logger.error(f"Broadcast {job.broadcast_id} stopped, left for takeover: {e}")
+            try:
+                await stop_flushing()
+                await self.checkpoint(job, error=str(e))
+            except Exception as checkpoint_error:
+                self.logger.error(f"Could not checkpoint broadcast {job.broadcast_id}: {checkpoint_error}")
+        finally:
+            if not flusher.done():
+                flusher.cancel()
+            if not job.stopping:
+                await report(True)
+                self.jobs.pop(job.broadcast_id, None)
+
+    async def resume_interrupted(self, bot: Bot,
+                                 on_progress: Callable[[Bot, BroadcastJob], Awaitable[None]] = None) -> int:
+        """Pick up broadcasts that were running or paused when their instance stopped"""
+        broadcasts = await asyncio.to_thread(
+            firebase_service.get_broadcasts_by_status, [STATUS_RUNNING, STATUS_PAUSED]
+        )
+        resumed = 0
+        for broadcast in broadcasts:
+            if broadcast['id'] in self.jobs:
+                continue
+            # Another instance still renews its lease, no need for a claim transaction
+            holder = broadcast.get('claimed_by')
+            lease_expired = time.time() - (broadcast.get('heartbeat_at') or 0) > Config.BROADCAST_LEASE
+            if holder and holder != Config.INSTANCE_ID and not lease_expired:
+                continue
+            if await self.claim_and_start(bot, broadcast['id'], [STATUS_RUNNING, STATUS_PAUSED], on_progress):
+                resumed += 1
+        if resumed:
+            self.logger.info(f"Resumed {resumed} interrupted broadcasts")
+        return resumed
+
+    async def shutdown(self, timeout: float = 15):
+        """Let running chunks settle so the next start continues without skipping"""
+        jobs = list(self.jobs.values())
+        for job in jobs:
+            job.stopping = True
+            job.running.set()
+        tasks = [job.task for job in jobs if job.task]
+        if tasks:
+            _done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+
+# Global broadcast service instance
+broadcast_service = BroadcastService()
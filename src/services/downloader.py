@@ -1,13 +1,27 @@
-import yt_dlp
 import os
 import asyncio
+import copy
+import shlex
+import shutil
 import subprocess
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from urllib.parse import urlparse
 import re
 from config.config import Config
 from src.utils.logger import Logger
+from src.utils.url_matcher import URLMatcher
+from src.utils.lazy import LazyService
+from src.services.ydl_pool import YDLPool, AUDIO_FORMAT_SELECTOR
+from src.services.bandwidth import bandwidth_governor
+from src.services.job_store import JobStore
+from src.services.media_store import MediaStore
 
 class DownloadService:
     """Service for handling downloads with yt-dlp"""
@@ -16,52 +30,144 @@ class DownloadService:
         self.logger = Logger("DownloadService")
         self.temp_dir = Path(Config.TEMP_PATH)
         self.download_dir = Path(Config.DOWNLOAD_PATH)
+        self.jobs_dir = Path(Config.JOBS_PATH)
         self.max_size = Config.MAX_DOWNLOAD_SIZE
         self.timeout = Config.DOWNLOAD_TIMEOUT
         
         # Create directories if they don't exist
         self.temp_dir.mkdir(parents=True, exist_ok=True)
         self.download_dir.mkdir(parents=True, exist_ok=True)
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Persistent job state for resuming after retries and restarts
+        self.job_store = JobStore()
+        
+        # Finished downloads shared between chats
+        self.media_store = MediaStore()
+        
+        # Recently extracted metadata, shared by previews, format lists and downloads
+        self.info_cache: OrderedDict = OrderedDict()
+        self.info_cache_lock = threading.Lock()
+        
+        # Content key -> [lock, jobs holding or waiting for it]
+        self.content_locks: Dict[str, list] = {}
+        self.content_locks_lock = threading.Lock()
         
         # Supported platforms
-        self.supported_platforms = [
-            'youtube.com', 'youtu.be', 'instagram.com', 'tiktok.com',
-            'twitter.com', 'x.com', 'facebook.com', 'pinterest.com',
-            'vimeo.com', 'dailymotion.com', 'twitch.tv', 'soundcloud.com',
-            't.me'
-        ]
+        self.supported_platforms = Config.SUPPORTED_PLATFORMS
+        self.url_matcher = URLMatcher(Config.PLATFORM_DOMAINS)
+        
+        # Long-lived extractor instances and the workers that use them
+        self.ydl_pool = YDLPool()
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.MAX_CONCURRENT_DOWNLOADS,
+            thread_name_prefix="download"
+        )
     
     def is_supported_url(self, url: str) -> bool:
         """Check if URL is supported"""
+        return self.get_platform(url) is not None
+    
+    def get_platform(self, url: str) -> Optional[str]:
+        """Get platform id for URL (used for routing, limits and cache keys)"""
         try:
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower()
-            
-            # Remove www. prefix if present
-            if domain.startswith('www.'):
-                domain = domain[4:]
-            
-            return any(platform in domain for platform in self.supported_platforms)
+            return self.url_matcher.match(url)
+        except Exception:
+            return None
+    
+    def canonicalize_url(self, url: str) -> str:
+        """Get canonical form of URL without tracking parameters"""
+        try:
+            return self.url_matcher.canonicalize(url)
+        except Exception:
+            return url
+    
+    def is_playlist_url(self, url: str) -> bool:
+        """Check if URL points at a playlist or channel"""
+        try:
+            return self.url_matcher.is_playlist(url)
         except Exception:
             return False
     
-    def extract_info(self, url: str) -> Optional[Dict[str, Any]]:
+    def is_audio_platform(self, url: str) -> bool:
+        """Check if URL belongs to a music platform served as audio"""
+        return self.get_platform(url) in Config.AUDIO_PLATFORMS
+    
+    def extract_info(self, url: str, audio_only: bool = False) -> Optional[Dict[str, Any]]:
         """Extract information from URL"""
         try:
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'skip_download': True,
-                'format': 'best',
-            }
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            options = {'format': AUDIO_FORMAT_SELECTOR} if audio_only else {}
+            with self.ydl_pool.acquire(self.get_platform(url), 'info', **options) as ydl:
                 info = ydl.extract_info(url, download=False)
                 return info
         except Exception as e:
             self.logger.error(f"Error extracting info from {url}: {e}")
             return None
     
+    def get_cached_info(self, url: str, audio_only: bool = False) -> Optional[Dict[str, Any]]:
+        """Get extracted information from cache, extracting on a miss"""
+        key = (self.canonicalize_url(url), audio_only)
+        with self.info_cache_lock:
+            cached = self.info_cache.get(key)
+            if cached and time.time() - cached[0] < Config.INFO_CACHE_TTL:
+                self.info_cache.move_to_end(key)
+                # Callers run format selection on the dict, keep the cached copy pristine
+                return copy.deepcopy(cached[1])
+        
+        info = self.extract_info(url, audio_only)
+        if info:
+            self.cache_info(url, info, audio_only)
+        return info
+    
+    def cache_info(self, url: str, info: Dict[str, Any], audio_only: bool = False):
+        """Store extracted information"""
+        with self.info_cache_lock:
+            self.info_cache[(self.canonicalize_url(url), audio_only)] = (time.time(), copy.deepcopy(info))
+            while len(self.info_cache) > Config.INFO_CACHE_SIZE:
+                self.info_cache.popitem(last=False)
+    
+    async def get_cached_info_async(self, url: str) -> Optional[Dict[str, Any]]:
+        """Get extracted information asynchronously"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self.get_cached_info, url)
+    
+    def extract_playlist(self, url: str) -> Optional[Dict[str, Any]]:
+        """Enumerate playlist entries without resolving each item"""
+        try:
+            options = {
+                'extract_flat': 'in_playlist',
+                'noplaylist': False,
+                'playlistend': Config.PLAYLIST_MAX_ITEMS
+            }
+            with self.ydl_pool.acquire(self.get_platform(url), 'info', **options) as ydl:
+                info = ydl.extract_info(url, download=False)
+            
+            if not info or info.get('_type') != 'playlist':
+                return None
+            
+            entries = []
+            for entry in info.get('entries') or []:
+                # Nested playlists (channel tabs) are not expanded
+                if not entry or entry.get('_type') == 'playlist':
+                    continue
+                entry_url = entry.get('webpage_url') or entry.get('url')
+                if entry_url:
+                    entries.append({
+                        'url': entry_url,
+                        'title': entry.get('title'),
+                        'duration': entry.get('duration')
+                    })
+            
+            return {'title': info.get('title', 'playlist'), 'entries': entries}
+        except Exception as e:
+            self.logger.error(f"Error extracting playlist {url}: {e}")
+            return None
+    
+    async def extract_playlist_async(self, url: str) -> Optional[Dict[str, Any]]:
+        """Enumerate playlist entries asynchronously"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self.extract_playlist, url)
+    
     def get_file_size(self, info: Dict[str, Any]) -> int:
         """Get file size from info"""
         try:
@@ -77,17 +183,142 @@ class DownloadService:
         except Exception:
             return 0
     
-    def download_file(self, url: str, user_id: int) -> Optional[str]:
+    def estimate_format_size(self, fmt: Dict[str, Any], duration: float = None) -> int:
+        """Get size of a single format, estimated from its bitrate when not reported"""
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if not size and fmt.get('tbr') and duration:
+            size = fmt['tbr'] * duration * 125  # kbit/s -> bytes
+        return int(size or 0)
+    
+    def get_format_size(self, info: Dict[str, Any], format_id: str) -> int:
+        """Get size of a format selection such as '137+140'"""
+        formats = {fmt.get('format_id'): fmt for fmt in info.get('formats') or []}
+        return sum(
+            self.estimate_format_size(formats[part], info.get('duration'))
+            for part in format_id.split('+') if part in formats
+        )
+    
+    def get_best_audio_format(self, info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get highest bitrate audio-only format"""
+        audio_formats = [
+            fmt for fmt in info.get('formats') or []
+            if fmt.get('vcodec') == 'none' and fmt.get('acodec') not in (None, 'none')
+        ]
+        return max(audio_formats, key=lambda fmt: fmt.get('abr') or fmt.get('tbr') or 0, default=None)
+    
+    def get_format_choices(self, info: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Get best format per resolution that fits the size limit"""
+        formats = info.get('formats') or []
+        duration = info.get('duration')
+        limit = self.get_size_limit()
+        
+        best_audio = self.get_best_audio_format(info)
+        audio_size = self.estimate_format_size(best_audio, duration) if best_audio else 0
+        
+        by_height = {}
+        for fmt in formats:
+            if fmt.get('vcodec') == 'none' or not fmt.get('height'):
+                continue
+            
+            # Video-only streams are merged with the best audio stream
+            video_only = fmt.get('acodec') == 'none'
+            if video_only and not best_audio:
+                continue
+            format_id = f"{fmt['format_id']}+{best_audio['format_id']}" if video_only else fmt['format_id']
+            size = self.estimate_format_size(fmt, duration) + (audio_size if video_only else 0)
+            if size > limit:
+                continue
+            
+            choice = {
+                'format_id': format_id,
+                'height': fmt['height'],
+                'ext': fmt.get('ext'),
+                'filesize': size,
+                'rank': (fmt.get('ext') == 'mp4', fmt.get('tbr') or 0)
+            }
+            current = by_height.get(fmt['height'])
+            if not current or choice['rank'] > current['rank']:
+                by_height[fmt['height']] = choice
+        
+        choices = sorted(by_height.values(), key=lambda choice: choice['height'], reverse=True)
+        return choices[:Config.FORMAT_PICKER_CHOICES]
+    
+    def get_size_limit(self) -> int:
+        """Get largest source file accepted for download"""
+        if Config.SPLIT_OVERSIZED_MEDIA:
+            return max(self.max_size, Config.MAX_SPLIT_SOURCE_SIZE)
+        return self.max_size
+    
+    def get_content_key(self, info: Dict[str, Any], format_id: str = None) -> str:
+        """Get file-safe identity of extracted media (extractor + id + format)"""
+        parts = [
+            info.get('extractor_key') or info.get('extractor') or 'generic',
+            str(info.get('id') or 'unknown'),
+            str(format_id or info.get('format_id') or 'best')
+        ]
+        return re.sub(r'[^\w-]', '_', '-'.join(parts))
+    
+    def get_store_key(self, info: Dict[str, Any], format_id: str = None) -> str:
+        """Get media store address of extracted media"""
+        return MediaStore.make_key(
+            info.get('extractor_key') or info.get('extractor') or 'generic',
+            str(info.get('id') or info.get('webpage_url')),
+            str(format_id or info.get('format_id') or 'best')
+        )
+    
+    def get_media_meta(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        """Get metadata sent along with the file"""
+        return {
+            'title': info.get('track') or info.get('title', 'download'),
+            'performer': info.get('artist') or info.get('uploader'),
+            'duration': int(info.get('duration') or 0),
+            'thumbnail': info.get('thumbnail')
+        }
+    
+    def download_file(self, url: str, user_id: int, job_id: str = None) -> Optional[str]:
         """Download file from URL"""
+        media = self.download_media(url, user_id, job_id)
+        return media['file_path'] if media else None
+    
+    def download_media(self, url: str, user_id: int, job_id: str = None, audio_only: bool = False,
+                       size_limit: int = None, format_id: str = None) -> Optional[Dict[str, Any]]:
+        """Download media from URL, resuming partial data from earlier attempts"""
         try:
-            # Extract info first
-            info = self.extract_info(url)
+            # Workspace files and bandwidth shares are per job, a user may have several downloads in flight
+            workspace_id = job_id or uuid.uuid4().hex[:12]
+            
+            # Repeat requests for a known link are served without touching the origin
+            canonical_url = self.canonicalize_url(url)
+            if audio_only:
+                lookup_url = f"{canonical_url}#audio"
+            elif format_id:
+                lookup_url = f"{canonical_url}#{format_id}"
+            else:
+                lookup_url = canonical_url
+            store_key = self.media_store.lookup_url(lookup_url)
+            if store_key:
+                cached_path = self.media_store.link(store_key, self.temp_dir, str(user_id), workspace_id)
+                if cached_path:
+                    self.logger.debug(f"Serving {url} from media store")
+                    return dict(self.media_store.get_meta(store_key), file_path=cached_path)
+            
+            # Reuse info from the preview, audio requests without a picked
+            # format extract with an audio-only selection
+            info = self.get_cached_info(url, audio_only and not format_id)
             if not info:
                 return None
+            meta = self.get_media_meta(info)
             
-            # Check file size
-            file_size = self.get_file_size(info)
-            if file_size > self.max_size:
+            # Same media requested through a different link
+            store_key = self.get_store_key(info, format_id)
+            cached_path = self.media_store.link(store_key, self.temp_dir, str(user_id), workspace_id)
+            if cached_path:
+                self.media_store.remember_url(lookup_url, store_key)
+                return dict(meta, file_path=cached_path)
+            
+            # Check file size, oversized media is allowed when it can be split
+            file_size = self.get_format_size(info, format_id) if format_id else self.get_file_size(info)
+            if file_size > min(self.get_size_limit(), size_limit or self.get_size_limit()):
                 self.logger.warning(f"File too large: {file_size} bytes for user {user_id}")
                 return None
             
@@ -96,40 +327,165 @@ class DownloadService:
             title = re.sub(r'[^\w\s-]', '', title)
             title = re.sub(r'[-\s]+', '-', title)
             
-            output_template = str(self.temp_dir / f"{user_id}_{title}.%(ext)s")
-            
-            # Configure yt-dlp options
-            ydl_opts = {
-                'format': 'best',
-                'outtmpl': output_template,
-                'quiet': False,
-                'no_warnings': False,
-                'progress_hooks': [self._progress_hook],
-                'postprocessors': [{
-                    'key': 'FFmpegVideoConvertor',
-                    'preferedformat': 'mp4',
-                }] if info.get('vcodec') != 'none' else [],
-                'writethumbnail': False,
-                'writeinfojson': False,
-                'writesubtitles': False,
-                'writeautomaticsub': False,
-            }
-            
-            # Download the file
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+            # Partial files are keyed by content so any retry can continue them
+            content_key = self.get_content_key(info, format_id)
+            if job_id:
+                self.job_store.update(job_id, content_key=content_key)
             
-            # Find the downloaded file
-            downloaded_files = list(self.temp_dir.glob(f"{user_id}_{title}.*"))
-            if downloaded_files:
-                return str(downloaded_files[0])
-            
-            return None
+            # Jobs for the same media take turns on its partial file
+            with self._content_lock(content_key):
+                # A job for the same media may have finished while this one waited
+                cached_path = self.media_store.link(store_key, self.temp_dir, str(user_id), workspace_id)
+                if cached_path:
+                    self.media_store.remember_url(lookup_url, store_key)
+                    return dict(meta, file_path=cached_path)
+                
+                output_template = str(self.jobs_dir / f"{content_key}.%(ext)s")
+                
+                result = None
+                for attempt in range(1, Config.DOWNLOAD_RETRIES + 1):
+                    try:
+                        result = self._download_info(url, workspace_id, info, output_template, audio_only, format_id)
+                        break
+                    except Exception as e:
+                        if job_id:
+                            self.job_store.update(job_id, attempts=attempt)
+                        if attempt == Config.DOWNLOAD_RETRIES:
+                            raise
+                        self.logger.warning(f"Download attempt {attempt} failed for {url}, resuming: {e}")
+                    
+                        # Media URLs may have expired, refresh them before resuming
+                        fresh_info = self.extract_info(url, audio_only)
+                        if fresh_info:
+                            self.cache_info(url, fresh_info, audio_only)
+                            info = fresh_info
+                
+                file_path = self._finished_file(result, content_key)
+                if not file_path:
+                    return None
+                
+                # The workspace gets its own link before the store takes the file,
+                # so an eviction right after can't leave the user without a copy
+                workspace_path = self.temp_dir / f"{user_id}_{title}_{workspace_id}{file_path.suffix}"
+                try:
+                    os.link(file_path, workspace_path)
+                except OSError:
+                    shutil.copy2(file_path, workspace_path)
+                
+                # Keep a shared copy for later requests
+                if not self.media_store.put(store_key, str(file_path), url=lookup_url, title=title, meta=meta):
+                    os.unlink(file_path)
+                return dict(meta, file_path=str(workspace_path))
             
         except Exception as e:
             self.logger.error(f"Error downloading {url} for user {user_id}: {e}")
             return None
     
+    @contextmanager
+    def _content_lock(self, content_key: str):
+        """Hold the partial file of a content key, one job at a time"""
+        with self.content_locks_lock:
+            entry = self.content_locks.setdefault(content_key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self.content_locks_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self.content_locks[content_key]
+    
+    def _download_info(self, url: str, job_id: str, info: Dict[str, Any], output_template: str,
+                       audio_only: bool = False, format_id: str = None) -> Dict[str, Any]:
+        """Run a single download attempt with a pooled instance, job_id names its ingress budget share"""
+        if audio_only:
+            profile = 'audio'
+        else:
+            profile = 'video' if format_id or info.get('vcodec') != 'none' else 'raw'
+        
+        # Format selection runs again on the extracted info, no new extraction
+        options = self._fragment_options(info)
+        if format_id:
+            options['format'] = format_id
+        
+        with bandwidth_governor.job('ingress', job_id):
+            with self.ydl_pool.acquire(
+                self.get_platform(url), profile,
+                progress_hooks=[self._progress_hook, self._throttle_hook(job_id)],
+                outtmpl=output_template,
+                continuedl=True,
+                nopart=False,
+                **options
+            ) as ydl:
+                return ydl.process_ie_result(info, download=True)
+    
+    def _finished_file(self, result: Optional[Dict[str, Any]], content_key: str) -> Optional[Path]:
+        """Locate the final file of a finished download"""
+        if result:
+            for download in result.get('requested_downloads') or [result]:
+                path = download.get('filepath')
+                if path and os.path.exists(path):
+                    return Path(path)
+        
+        for path in self.jobs_dir.glob(f"{content_key}.*"):
+            if not path.name.endswith(('.part', '.ytdl', '.temp')):
+                return path
+        return None
+    
+    def is_segmented(self, info: Dict[str, Any]) -> bool:
+        """Check if media is served as HLS/DASH fragments"""
+        formats = info.get('requested_formats') or [info]
+        return any(
+            any(proto in (fmt.get('protocol') or '') for proto in ('m3u8', 'dash', 'ism', 'f4m'))
+            for fmt in formats
+        )
+    
+    def _fragment_options(self, info: Dict[str, Any]) -> Dict[str, Any]:
+        """Get per-job fragment parallelism options within the bandwidth budget"""
+        options = {}
+        
+        # Native downloads are shaped by the progress hook, external ones
+        # only understand a fixed rate limit
+        job_rate = bandwidth_governor.job_share('ingress')
+        if job_rate and Config.EXTERNAL_DOWNLOADER:
+            options['ratelimit'] = job_rate
+        
+        if not self.is_segmented(info):
+            return options
+        
+        fragments = max(Config.CONCURRENT_FRAGMENT_DOWNLOADS, 1)
+        if job_rate:
+            # More parallel streams than the budget can feed only adds overhead
+            fragments = max(1, min(fragments, job_rate // Config.MIN_FRAGMENT_RATE))
+        options['concurrent_fragment_downloads'] = fragments
+        
+        if Config.EXTERNAL_DOWNLOADER:
+            downloader = Config.EXTERNAL_DOWNLOADER
+            options['external_downloader'] = {'m3u8': downloader, 'dash': downloader}
+            if Config.EXTERNAL_DOWNLOADER_ARGS:
+                options['external_downloader_args'] = {
+                    os.path.basename(downloader): shlex.split(Config.EXTERNAL_DOWNLOADER_ARGS)
+                }
+        
+        return options
+    
+    def _throttle_hook(self, job_id: str):
+        """Create progress hook that charges received bytes to the ingress budget"""
+        received = {}
+        
+        def hook(d):
+            if d['status'] != 'downloading':
+                return
+            filename = d.get('filename')
+            downloaded = d.get('downloaded_bytes') or 0
+            delta = downloaded - received.get(filename, 0)
+            if delta > 0:
+                received[filename] = downloaded
+                bandwidth_governor.throttle('ingress', job_id, delta)
+        
+        return hook
+    
     def _progress_hook(self, d):
         """Progress hook for yt-dlp"""
         if d['status'] == 'downloading':
@@ -141,11 +497,23 @@ class DownloadService:
             except ValueError:
                 pass
     
-    async def download_async(self, url: str, user_id: int) -> Optional[str]:
+    async def download_media_async(self, url: str, user_id: int, job_id: str = None, audio_only: bool = False,
+                                   size_limit: int = None, format_id: str = None) -> Optional[Dict[str, Any]]:
+        """Download media asynchronously"""
+        try:
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(
+                self.executor, self.download_media, url, user_id, job_id, audio_only, size_limit, format_id
+            )
+        except Exception as e:
+            self.logger.error(f"Error in async download {url} for user {user_id}: {e}")
+            return None
+    
+    async def download_async(self, url: str, user_id: int, job_id: str = None) -> Optional[str]:
         """Download file asynchronously"""
         try:
             loop = asyncio.get_event_loop()
-            return await loop.run_in_executor(None, self.download_file, url, user_id)
+            return await loop.run_in_executor(self.executor, self.download_file, url, user_id, job_id)
         except Exception as e:
             self.logger.error(f"Error in async download {url} for user {user_id}: {e}")
             return None
@@ -163,10 +531,36 @@ class DownloadService:
         except Exception as e:
             self.logger.error(f"Error cleaning up temp files for user {user_id}: {e}")
     
+    def cleanup_stale_parts(self):
+        """Remove partial files that no pending job can resume"""
+        try:
+            # Failed jobs age out with their partial files
+            self.job_store.prune_failed(Config.PART_FILE_TTL)
+            active_keys = self.job_store.active_content_keys()
+            expire_before = time.time() - Config.PART_FILE_TTL * 3600
+            for file_path in self.jobs_dir.glob('*'):
+                if file_path == self.job_store.path or file_path.name.split('.')[0] in active_keys:
+                    continue
+                if file_path.stat().st_mtime < expire_before:
+                    file_path.unlink()
+                    self.logger.debug(f"Removed stale partial file: {file_path}")
+        except Exception as e:
+            self.logger.error(f"Error cleaning up partial files: {e}")
+    
+    def close(self):
+        """Release pooled extractor instances and worker threads"""
+        try:
+            self.job_store.save()
+            self.media_store.flush()
+            self.ydl_pool.close()
+            self.executor.shutdown(wait=False)
+        except Exception as e:
+            self.logger.error(f"Error closing download service: {e}")
+    
     def get_video_info(self, url: str) -> Optional[Dict[str, Any]]:
         """Get detailed video information"""
         try:
-            info = self.extract_info(url)
+            info = self.get_cached_info(url)
             if not info:
                 return None
             
@@ -191,7 +585,7 @@ class DownloadService:
     def is_audio_only(self, url: str) -> bool:
         """Check if URL is audio only"""
         try:
-            info = self.extract_info(url)
+            info = self.get_cached_info(url)
             if not info:
                 return False
             
@@ -202,7 +596,7 @@ class DownloadService:
     def get_available_formats(self, url: str) -> List[Dict[str, Any]]:
         """Get available formats for URL"""
         try:
-            info = self.extract_info(url)
+            info = self.get_cached_info(url)
             if not info:
                 return []
             
@@ -227,5 +621,5 @@ class DownloadService:
             self.logger.error(f"Error getting formats for {url}: {e}")
             return []
 
-# Global download service instance
-download_service = DownloadService()
\ No newline at end of file
+# Global download service instance, created on first use or at startup
+download_service = LazyService(DownloadService)
\ No newline at end of file
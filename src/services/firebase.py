@@ -1,10 +1,12 @@
-import firebase_admin
-from firebase_admin import credentials, firestore, initialize_app
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import json
 from config.config import Config
 from src.utils.logger import Logger
+from src.utils.lazy import LazyService
+from src.utils.request_context import count_storage_read, note_user_write, note_group_write
+from src.services.moderation import RULE_FIELDS
 
 class FirebaseService:
     """Service for handling Firebase operations"""
@@ -17,6 +19,10 @@ class FirebaseService:
     def _initialize_firebase(self):
         """Initialize Firebase connection"""
         try:
+            # The Firestore client stack is slow to import, load it only when connecting
+            import firebase_admin
+            from firebase_admin import credentials, firestore
+            
             if not firebase_admin._apps:
                 cred = credentials.Certificate(Config.FIREBASE_CREDENTIALS_PATH)
                 firebase_admin.initialize_app(cred, {
@@ -33,6 +39,7 @@ class FirebaseService:
     def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user data"""
         try:
+            count_storage_read()
             doc_ref = self.db.collection('users').document(str(user_id))
             doc = doc_ref.get()
             return doc.to_dict() if doc.exists else None
@@ -69,6 +76,7 @@ class FirebaseService:
         try:
             doc_ref = self.db.collection('users').document(str(user_id))
             doc_ref.update(updates)
+            note_user_write(user_id, updates)
             self.logger.log_user_action(user_id, "unknown", "User updated", str(updates))
             return True
         except Exception as e:
@@ -78,6 +86,7 @@ class FirebaseService:
     def get_all_users(self) -> List[Dict[str, Any]]:
         """Get all users"""
         try:
+            count_storage_read()
             users_ref = self.db.collection('users')
             docs = users_ref.stream()
             return [doc.to_dict() for doc in docs]
@@ -88,6 +97,7 @@ class FirebaseService:
     def get_users_count(self) -> int:
         """Get total users count"""
         try:
+            count_storage_read()
             users_ref = self.db.collection('users')
             return len(list(users_ref.stream()))
         except Exception as e:
@@ -98,6 +108,7 @@ class FirebaseService:
     def get_group(self, group_id: int) -> Optional[Dict[str, Any]]:
         """Get group data"""
         try:
+            count_storage_read()
             doc_ref = self.db.collection('groups').document(str(group_id))
             doc = doc_ref.get()
             return doc.to_dict() if doc.exists else None
@@ -122,7 +133,8 @@ class FirebaseService:
                     'downloads_enabled': Config.ENABLE_DOWNLOAD_IN_GROUPS,
                     'auto_lock': False,
                     'auto_lock_duration': 0,
-                    'group_locked': False
+                    'group_locked': False,
+                    'filter_whole_words': False
                 },
                 'locks': {
                     'links': False,
@@ -167,8 +179,12 @@ class FirebaseService:
     def update_group(self, group_id: int, updates: Dict[str, Any]) -> bool:
         """Update group data"""
         try:
+            if any(key.split('.')[0] in RULE_FIELDS for key in updates):
+                # Tells every instance to recompile the group's moderation rules
+                updates = {**updates, 'rules_version': time.time()}
             doc_ref = self.db.collection('groups').document(str(group_id))
             doc_ref.update(updates)
+            note_group_write(group_id, updates)
             self.logger.log_group_action(group_id, "unknown", "Group updated", str(updates))
             return True
         except Exception as e:
@@ -178,6 +194,7 @@ class FirebaseService:
     def get_all_groups(self) -> List[Dict[str, Any]]:
         """Get all groups"""
         try:
+            count_storage_read()
             groups_ref = self.db.collection('groups')
             docs = groups_ref.stream()
             return [doc.to_dict() for doc in docs]
@@ -188,6 +205,7 @@ class FirebaseService:
     def get_groups_count(self) -> int:
         """Get total groups count"""
         try:
+            count_storage_read()
             groups_ref = self.db.collection('groups')
             return len(list(groups_ref.stream()))
         except Exception as e:
@@ -201,7 +219,8 @@ class FirebaseService:
             users_count = self.get_users_count()
             groups_count = self.get_groups_count()
             
-            # Get download statistics
+            # Get download statistics, the counts above note their own reads
+            count_storage_read()
             stats_ref = self.db.collection('statistics').document('downloads')
             stats_doc = stats_ref.get()
             download_stats = stats_doc.to_dict() if stats_doc.exists else {
@@ -224,6 +243,8 @@ class FirebaseService:
     def update_download_statistics(self, success: bool = True):
         """Update download statistics"""
         try:
+            from firebase_admin import firestore
+            
             stats_ref = self.db.collection('statistics').document('downloads')
             
             if success:
@@ -240,18 +261,24 @@ class FirebaseService:
             self.logger.error(f"Error updating download statistics: {e}")
     
     # Broadcast operations
-    def create_broadcast(self, message: str, target_type: str, scheduled_time: datetime = None) -> str:
+    def create_broadcast(self, message: str, target_type: str, scheduled_time: datetime = None,
+                         progress: Dict[str, Any] = None, variants: Dict[str, str] = None,
+                         audience: Dict[str, Any] = None, sources: Dict[str, Dict[str, Any]] = None) -> str:
         """Create broadcast message"""
         try:
             broadcast_data = {
                 'message': message,
                 'target_type': target_type,  # 'users', 'users_and_groups'
+                'variants': variants or {},  # language -> message for recipients of that language
+                'audience': audience or {},  # 'languages' and 'active_days' filters
+                'sources': sources or {},  # 'default' or language -> chat and message ids to copy
                 'created_at': datetime.now(),
                 'scheduled_time': scheduled_time,
-                'status': 'pending',  # 'pending', 'sent', 'failed'
+                'status': 'pending',  # 'pending', 'running', 'paused', 'cancelled', 'sent', 'failed'
                 'recipients_count': 0,
                 'sent_count': 0,
-                'failed_count': 0
+                'failed_count': 0,
+                'progress': progress  # chat and message of the live progress card
             }
             
             doc_ref = self.db.collection('broadcasts').document()
@@ -265,6 +292,7 @@ class FirebaseService:
     def get_broadcast(self, broadcast_id: str) -> Optional[Dict[str, Any]]:
         """Get broadcast data"""
         try:
+            count_storage_read()
             doc_ref = self.db.collection('broadcasts').document(broadcast_id)
             doc = doc_ref.get()
             return doc.to_dict() if doc.exists else None
@@ -283,13 +311,127 @@ class FirebaseService:
             self.logger.error(f"Error deleting broadcast {broadcast_id}: {e}")
             return False
     
+    def update_broadcast(self, broadcast_id: str, updates: Dict[str, Any]) -> bool:
+        """Update broadcast data, e.g. a delivery checkpoint"""
+        try:
+            doc_ref = self.db.collection('broadcasts').document(broadcast_id)
+            doc_ref.update(updates)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error updating broadcast {broadcast_id}: {e}")
+            return False
+    
+    def add_broadcast_failures(self, broadcast_id: str, failures: Dict[str, List[int]]) -> bool:
+        """Log chat ids a broadcast failed for, grouped by error class"""
+        try:
+            doc_ref = self.db.collection('broadcasts').document(broadcast_id)
+            doc_ref.collection('failures').add({
+                'chat_ids': failures,
+                'created_at': datetime.now()
+            })
+            return True
+        except Exception as e:
+            self.logger.error(f"Error logging failures of broadcast {broadcast_id}: {e}")
+            return False
+    
+    def mark_unreachable(self, positions: List[Tuple[str, str]]) -> bool:
+        """Flag user and group documents whose chats can no longer receive messages"""
+        try:
+            batch = self.db.batch()
+            for collection, doc_id in positions:
+                batch.update(self.db.collection(collection).document(doc_id), {
+                    'reachable': False,
+                    'unreachable_at': datetime.now()
+                })
+            batch.commit()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error marking {len(positions)} chats unreachable: {e}")
+            return False
+    
+    def claim_broadcast(self, broadcast_id: str, owner: str, statuses: List[str],
+                        lease_seconds: int) -> Optional[Dict[str, Any]]:
+        """Take over a broadcast in a transaction so only one instance delivers it"""
+        try:
+            from firebase_admin import firestore
+            
+            count_storage_read()
+            doc_ref = self.db.collection('broadcasts').document(broadcast_id)
+            
+            @firestore.transactional
+            def claim(transaction):
+                snapshot = doc_ref.get(transaction=transaction)
+                if not snapshot.exists:
+                    return None
+                
+                data = snapshot.to_dict()
+                holder = data.get('claimed_by')
+                # Another live instance keeps renewing its lease with checkpoints
+                lease_expired = time.time() - (data.get('heartbeat_at') or 0) > lease_seconds
+                if data.get('status') not in statuses or (holder and holder != owner and not lease_expired):
+                    return None
+                
+                updates = {'claimed_by': owner, 'heartbeat_at': time.time()}
+                if data.get('status') == 'pending':
+                    updates['status'] = 'running'
+                transaction.update(doc_ref, updates)
+                return {**data, **updates, 'id': broadcast_id}
+            
+            return claim(self.db.transaction())
+        except Exception as e:
+            self.logger.error(f"Error claiming broadcast {broadcast_id}: {e}")
+            return None
+    
+    def get_broadcasts_by_status(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """Get broadcasts in any of the given statuses, with their ids"""
+        try:
+            count_storage_read()
+            query = self.db.collection('broadcasts').where('status', 'in', statuses)
+            return [{**doc.to_dict(), 'id': doc.id} for doc in query.stream()]
+        except Exception as e:
+            self.logger.error(f"Error getting broadcasts by status: {e}")
+            return []
+    
+    def get_chat_page(self, collection: str, after: Optional[str] = None, limit: int = 500,
+                      fields: Optional[List[str]] = None,
+                      filters: Optional[List[Tuple[str, str, Any]]] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Get one page of a chat collection in document id order, after a cursor id"""
+        try:
+            count_storage_read()
+            query = self.db.collection(collection)
+            for field, op, value in filters or []:
+                query = query.where(field, op, value)
+            query = query.order_by('__name__')
+            if fields:
+                query = query.select(fields)
+            if after:
+                query = query.start_after({'__name__': after})
+            return [(doc.id, doc.to_dict()) for doc in query.limit(limit).stream()]
+        except Exception as e:
+            self.logger.error(f"Error getting {collection} page after {after}: {e}")
+            raise
+    
+    def count_documents(self, collection: str, filters: Optional[List[Tuple[str, str, Any]]] = None) -> int:
+        """Count documents with an aggregation query instead of streaming them"""
+        try:
+            count_storage_read()
+            query = self.db.collection(collection)
+            for field, op, value in filters or []:
+                query = query.where(field, op, value)
+            result = query.count().get()
+            return int(result[0][0].value)
+        except Exception as e:
+            self.logger.error(f"Error counting {collection}: {e}")
+            return 0
+    
     def get_pending_broadcasts(self) -> List[Dict[str, Any]]:
         """Get pending broadcasts"""
         try:
+            count_storage_read()
             broadcasts_ref = self.db.collection('broadcasts')
             query = broadcasts_ref.where('status', '==', 'pending')
             docs = query.stream()
-            return [doc.to_dict() for doc in docs]
+            return [{**doc.to_dict(), 'id': doc.id} for doc in docs]
         except Exception as e:
             self.logger.error(f"Error getting pending broadcasts: {e}")
             return []
@@ -307,5 +449,5 @@ class FirebaseService:
             self.logger.error(f"Error getting system status: {e}")
             return {}
 
-# Global Firebase service instance
-firebase_service = FirebaseService()
\ No newline at end of file
+# Global Firebase service instance, connected on first use or at startup
+firebase_service = LazyService(FirebaseService)
\ No newline at end of file
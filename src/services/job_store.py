@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from config.config import Config
+from src.utils.logger import Logger
+
+
+class JobStore:
+    """Persistent download job state kept next to the partial files"""
+
+    def __init__(self, path: str = None):
+        self.logger = Logger("JobStore")
+        self.path = Path(path or Path(Config.JOBS_PATH) / 'jobs.json')
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.jobs: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Load jobs from disk"""
+        try:
+            if self.path.exists():
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading download jobs: {e}")
+        return {}
+
+    def save(self):
+        """Write jobs to disk atomically"""
+        with self._lock:
+            try:
+                tmp_path = self.path.with_suffix('.tmp')
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.jobs, f, ensure_ascii=False, default=str)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                self.logger.error(f"Error saving download jobs: {e}")
+
+    def create(self, url: str, user_id: int, chat_id: int, message_id: int = None,
+               audio_only: bool = False, format_id: str = None) -> str:
+        """Create pending job"""
+        job_id = uuid.uuid4().hex[:12]
+        now = datetime.now().isoformat()
+        with self._lock:
+            self.jobs[job_id] = {
+                'job_id': job_id,
+                'url': url,
+                'user_id': user_id,
+                'chat_id': chat_id,
+                'message_id': message_id,
+                'audio_only': audio_only,
+                'format_id': format_id,
+                'status': 'pending',  # 'pending', 'completed', 'failed'
+                'content_key': None,
+                'attempts': 0,
+                'created_at': now,
+                'updated_at': now
+            }
+        self.save()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id: str, **updates):
+        """Update job fields"""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if not job:
+                return
+            job.update(updates)
+            job['updated_at'] = datetime.now().isoformat()
+        self.save()
+
+    def complete(self, job_id: str):
+        """Forget finished job"""
+        with self._lock:
+            self.jobs.pop(job_id, None)
+        self.save()
+
+    def fail(self, job_id: str):
+        """Mark job as failed, its partial file is kept until PART_FILE_TTL for a manual retry"""
+        self.update(job_id, status='failed')
+
+    def prune_failed(self, max_age_hours: int) -> int:
+        """Forget failed jobs older than their partial files may be kept"""
+        expire_before = datetime.now() - timedelta(hours=max_age_hours)
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self.jobs.items()
+                if job['status'] == 'failed' and datetime.fromisoformat(job['updated_at']) < expire_before
+            ]
+            for job_id in expired:
+                del self.jobs[job_id]
+        if expired:
+            self.save()
+        return len(expired)
+
+    def get_pending(self) -> List[Dict[str, Any]]:
+        """Get jobs that did not finish before the last shutdown"""
+        with self._lock:
+            return [dict(job) for job in self.jobs.values() if job['status'] == 'pending']
+
+    def active_content_keys(self) -> set:
+        """Content keys whose partial files pending jobs will resume"""
+        with self._lock:
+            return {
+                job['content_key'] for job in self.jobs.values()
+                if job['status'] == 'pending' and job.get('content_key')
+            }
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from config.config import Config
+from src.utils.logger import Logger
+
+# Seconds between index writes caused only by access counters
+ACCESS_SAVE_INTERVAL = 60
+
+
+class MediaStore:
+    """Content-addressed local media cache with a byte budget"""
+
+    def __init__(self, root: str = None, max_bytes: int = None, policy: str = None):
+        self.logger = Logger("MediaStore")
+        self.root = Path(root or Config.MEDIA_STORE_PATH)
+        self.max_bytes = max_bytes if max_bytes is not None else Config.MEDIA_STORE_MAX_SIZE
+        self.policy = policy or Config.MEDIA_STORE_POLICY  # 'lru' or 'lfu'
+        self.index_path = self.root / 'index.json'
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+        # key -> {'file', 'size', 'last_access', 'hits'}, url -> key
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.urls: Dict[str, str] = {}
+        self.total_bytes = 0
+        # Access counters changed since the index was last written
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        self._load()
+
+    @staticmethod
+    def make_key(extractor: str, video_id: str, format_id: str) -> str:
+        """Build content address for extracted media"""
+        identity = f"{extractor}|{video_id}|{format_id}".lower()
+        return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        """Load index and drop entries whose files are gone"""
+        try:
+            if self.index_path.exists():
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entries = {
+                    key: entry for key, entry in data.get('entries', {}).items()
+                    if (self.root / entry['file']).exists()
+                }
+                self.urls = {url: key for url, key in data.get('urls', {}).items() if key in self.entries}
+                self.total_bytes = sum(entry['size'] for entry in self.entries.values())
+        except Exception as e:
+            self.logger.error(f"Error loading media store index: {e}")
+
+    def _save(self):
+        """Write index atomically (caller holds the lock)"""
+        try:
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': self.entries, 'urls': self.urls}, f)
+            os.replace(tmp_path, self.index_path)
+            self.dirty = False
+            self.saved_at = time.monotonic()
+        except Exception as e:
+            self.logger.error(f"Error saving media store index: {e}")
+
+    def lookup_url(self, url: str) -> Optional[str]:
+        """Get content key previously stored for a canonical URL"""
+        with self._lock:
+            return self.urls.get(url)
+
+    def remember_url(self, url: str, key: str):
+        """Map another canonical URL to stored content"""
+        with self._lock:
+            if key in self.entries:
+                self.urls[url] = key
+                self._save()
+
+    def get(self, key: str) -> Optional[Path]:
+        """Get stored file path and record the access"""
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key: str) -> Optional[Path]:
+        """Get stored file path and record the access (caller holds the lock)"""
+        entry = self.entries.get(key)
+        if not entry:
+            return None
+        path = self.root / entry['file']
+        if not path.exists():
+            self._remove(key)
+            self._save()
+            return None
+        entry['last_access'] = time.time()
+        entry['hits'] += 1
+        # Counters rank entries for eviction after a restart too, written in batches
+        self.dirty = True
+        if time.monotonic() - self.saved_at >= ACCESS_SAVE_INTERVAL:
+            self._save()
+        return path
+
+    def flush(self):
+        """Write access counters not saved yet"""
+        with self._lock:
+            if self.dirty:
+                self._save()
+
+    def put(self, key: str, file_path: str, url: str = None, title: str = None,
+            meta: Dict[str, Any] = None) -> Optional[Path]:
+        """Move a finished download into the store"""
+        if not self.max_bytes:
+            return None
+
+        source = Path(file_path)
+        size = source.stat().st_size
+        if size > self.max_bytes:
+            return None
+
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+
+            self._evict(size)
+            stored = self.root / key[:2] / f"{key}{source.suffix}"
+            stored.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(source), stored)
+
+            self.entries[key] = {
+                'file': str(stored.relative_to(self.root)),
+                'size': size,
+                'title': title,
+                'meta': meta or {},
+                'last_access': time.time(),
+                'hits': 0
+            }
+            self.total_bytes += size
+            if url:
+                self.urls[url] = key
+            self._save()
+            return stored
+
+    def get_meta(self, key: str) -> Dict[str, Any]:
+        """Get metadata stored with content"""
+        with self._lock:
+            return dict(self.entries.get(key, {}).get('meta') or {})
+
+    def link(self, key: str, directory: str, prefix: str, job_id: str) -> Optional[str]:
+        """Hard link stored file into a job workspace (copy across devices)"""
+        # Held until the link exists, so a concurrent eviction can't remove the file in between
+        with self._lock:
+            path = self._get(key)
+            if not path:
+                return None
+
+            # The job id keeps concurrent jobs of one user from replacing each other's files
+            title = self.entries[key].get('title') or key
+            destination = Path(directory) / f"{prefix}_{title}_{job_id}{path.suffix}"
+            try:
+                try:
+                    os.link(path, destination)
+                except OSError:
+                    shutil.copy2(path, destination)
+                return str(destination)
+            except Exception as e:
+                self.logger.error(f"Error linking {key} into {destination}: {e}")
+                return None
+
+    def _remove(self, key: str):
+        """Remove entry and its file (caller holds the lock)"""
+        entry = self.entries.pop(key, None)
+        if not entry:
+            return
+        self.total_bytes -= entry['size']
+        self.urls = {url: k for url, k in self.urls.items() if k != key}
+        try:
+            (self.root / entry['file']).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, incoming: int):
+        """Evict entries until incoming bytes fit in the budget"""
+        if self.total_bytes + incoming <= self.max_bytes:
+            return
+
+        if self.policy == 'lfu':
+            rank = lambda item: (item[1]['hits'], item[1]['last_access'])
+        else:
+            rank = lambda item: item[1]['last_access']
+
+        for key, entry in sorted(self.entries.items(), key=rank):
+            if self.total_bytes + incoming <= self.max_bytes:
+                break
+            self._remove(key)
+            self.logger.debug(f"Evicted {key} ({entry['size']} bytes)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store usage"""
+        with self._lock:
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'policy': self.policy
+            }
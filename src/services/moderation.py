@@ -0,0 +1,163 @@
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Optional, Dict, Any, FrozenSet, Set, Tuple
+
+from telegram import (
+    Message, Animation, Audio, Dice, Document, Game, Location, Poll, Sticker, Venue, Video, VideoNote, Voice
+)
+
+from config.config import Config
+from src.models.group import GroupLocks
+from src.utils.logger import Logger
+from src.utils.word_matcher import WordMatcher
+
+# One bit per lock, in GroupLocks field order
+LOCK_BITS: Dict[str, int] = {lock.name: 1 << index for index, lock in enumerate(fields(GroupLocks))}
+
+# Entity types -> bit of the lock that removes them
+ENTITY_BITS: Dict[str, int] = {
+    'url': LOCK_BITS['links'],
+    'text_link': LOCK_BITS['hyperlinks'],
+    'hashtag': LOCK_BITS['hashtags'],
+    'mention': LOCK_BITS['usernames']
+}
+
+# Attachment classes -> bit of the lock that removes them, photos come as a tuple of sizes.
+# Contacts have no lock of their own and always pass.
+ATTACHMENT_BITS: Dict[type, int] = {
+    tuple: LOCK_BITS['photos'],
+    Video: LOCK_BITS['videos'],
+    Audio: LOCK_BITS['music'],
+    Document: LOCK_BITS['files'],
+    Sticker: LOCK_BITS['stickers'],
+    Animation: LOCK_BITS['gifs'],
+    Location: LOCK_BITS['location'],
+    Venue: LOCK_BITS['location'],
+    Game: LOCK_BITS['games'],
+    Dice: LOCK_BITS['games'],
+    Voice: LOCK_BITS['voice'],
+    VideoNote: LOCK_BITS['video_msg'],
+    Poll: LOCK_BITS['polls']
+}
+
+# Group document fields the rules are compiled from
+RULE_FIELDS = ('settings', 'locks', 'lists')
+
+# Violations reported besides lock names
+VIOLATION_GROUP_LOCKED = 'group_locked'
+VIOLATION_BANNED = 'banned'
+VIOLATION_MUTED = 'muted'
+VIOLATION_FILTERED_WORD = 'filtered_word'
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """Moderation rules of a group, compiled from its settings, locks and lists"""
+    mask: int = 0
+    admins: FrozenSet[int] = frozenset()  # stored admins, used while Telegram's roster isn't loaded
+    vips: FrozenSet[int] = frozenset()
+    banned: FrozenSet[int] = frozenset()
+    muted: FrozenSet[int] = frozenset()
+    group_locked: bool = False
+    downloads_enabled: bool = True
+    words: Optional[WordMatcher] = None
+
+    def check(self, message: Message, admins: Optional[Set[int]] = None) -> Optional[str]:
+        """Get the rule a message breaks, None when it may stay"""
+        user_id = message.from_user.id if message.from_user else None
+        if user_id in (self.admins if admins is None else admins) or user_id in self.vips:
+            return None
+        if self.group_locked:
+            return VIOLATION_GROUP_LOCKED
+        if user_id in self.banned:
+            return VIOLATION_BANNED
+        if user_id in self.muted:
+            return VIOLATION_MUTED
+
+        mask = self.mask
+        if mask:
+            for entity in message.entities or message.caption_entities:
+                bit = mask & ENTITY_BITS.get(entity.type, 0)
+                if bit:
+                    return lock_name(bit)
+            if mask & LOCK_BITS['forwarded'] and message.forward_origin:
+                return 'forwarded'
+            attachment = message.effective_attachment
+            if attachment is not None:
+                bit = mask & ATTACHMENT_BITS.get(type(attachment), 0)
+                if bit:
+                    return lock_name(bit)
+
+        if self.words and message.text and self.words.search(message.text):
+            return VIOLATION_FILTERED_WORD
+        return None
+
+
+def lock_name(bit: int) -> str:
+    """Name of the lock a bit stands for"""
+    return next(name for name, lock_bit in LOCK_BITS.items() if lock_bit == bit)
+
+
+def compile_rules(group_data: Dict[str, Any]) -> RuleSet:
+    """Precompute the rules of a group document"""
+    settings = group_data.get('settings') or {}
+    locks = group_data.get('locks') or {}
+    lists = group_data.get('lists') or {}
+
+    mask = 0
+    for name, bit in LOCK_BITS.items():
+        if locks.get(name):
+            mask |= bit
+
+    words = WordMatcher(lists.get('filtered_words') or [], settings.get('filter_whole_words', False))
+    return RuleSet(
+        mask=mask,
+        admins=frozenset(lists.get('admins') or []),
+        vips=frozenset(lists.get('vip_members') or []),
+        banned=frozenset(lists.get('banned_users') or []),
+        muted=frozenset(lists.get('muted_users') or []),
+        group_locked=bool(settings.get('group_locked')),
+        downloads_enabled=settings.get('downloads_enabled', True),
+        words=words if len(words) else None
+    )
+
+
+class ModerationEngine:
+    """Compiled rule sets per group, rebuilt when the group's rules version changes"""
+
+    def __init__(self, max_groups: int = None):
+        self.logger = Logger("ModerationEngine")
+        self.max_groups = max_groups or Config.MODERATION_CACHE_SIZE
+        # group_id -> (rules version, rule set), least recently used first
+        self.rules: OrderedDict[int, Tuple[Any, RuleSet]] = OrderedDict()
+        self.compiled = 0
+
+    def get_rules(self, group_id: int, group_data: Dict[str, Any]) -> RuleSet:
+        """Get the rule set of a group, compiling it on first use or after a change"""
+        version = group_data.get('rules_version')
+        cached = self.rules.get(group_id)
+        if cached and cached[0] == version:
+            self.rules.move_to_end(group_id)
+            return cached[1]
+
+        rules = compile_rules(group_data)
+        self.compiled += 1
+        self.rules[group_id] = (version, rules)
+        self.rules.move_to_end(group_id)
+        if len(self.rules) > self.max_groups:
+            self.rules.popitem(last=False)
+        return rules
+
+    def invalidate(self, group_id: int):
+        """Drop the rule set of a group"""
+        self.rules.pop(group_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get rule cache counters"""
+        return {
+            'groups': len(self.rules),
+            'compiled': self.compiled
+        }
+
+# Global moderation engine instance
+moderation_engine = ModerationEngine()
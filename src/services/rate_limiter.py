@@ -0,0 +1,210 @@
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import timedelta
+from typing import Optional, Dict, Any, Deque, Callable, Coroutine
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from config.config import Config
+from src.utils.logger import Logger
+
+# Priority lanes, lower values are dispatched first
+LANE_INTERACTIVE = 0  # replies to the update being handled
+LANE_BULK = 1  # playlist items and resumed downloads
+LANE_BROADCAST = 2
+LANES = (LANE_INTERACTIVE, LANE_BULK, LANE_BROADCAST)
+LANE_NAMES = {LANE_INTERACTIVE: 'interactive', LANE_BULK: 'bulk', LANE_BROADCAST: 'broadcast'}
+
+# Lane of requests made by the current task when no rate_limit_args are given
+current_lane: ContextVar[int] = ContextVar('current_lane', default=LANE_INTERACTIVE)
+
+# Endpoints that count against Telegram's per-chat message limits
+CHAT_LIMITED_PREFIXES = ('send', 'copy', 'forward', 'edit')
+
+
+class TokenBucket:
+    """Token bucket kept as a theoretical arrival time (GCRA)"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1 / rate
+        self.tolerance = (max(burst, 1) - 1) * self.interval
+        self.tat = 0.0
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is free, without taking it"""
+        return max(max(self.tat, now) - self.tolerance - now, 0.0)
+
+    def reserve(self, now: float) -> float:
+        """Take the next token, return seconds to wait for it"""
+        delay = self.delay(now)
+        self.tat = max(self.tat, now) + self.interval
+        return delay
+
+    def pause(self, until: float):
+        """Hold back all tokens until the given time"""
+        self.tat = max(self.tat, until + self.tolerance)
+
+    def is_idle(self, now: float) -> bool:
+        return self.tat <= now
+
+
+class TelegramRateLimiter(BaseRateLimiter):
+    """Outbound request scheduler with global and per-chat limits, flood-wait back-off and priority lanes"""
+
+    def __init__(self, global_rate: float = None, private_rate: float = None, group_rate: float = None,
+                 burst: int = None, max_retries: int = None):
+        self.logger = Logger("RateLimiter")
+        self.global_bucket = TokenBucket(global_rate or Config.RATE_LIMIT_GLOBAL, 1)
+        self.private_rate = private_rate or Config.RATE_LIMIT_PRIVATE
+        self.group_rate = (group_rate or Config.RATE_LIMIT_GROUP) / 60
+        self.burst = burst or Config.RATE_LIMIT_BURST
+        self.max_retries = max_retries if max_retries is not None else Config.RATE_LIMIT_MAX_RETRIES
+        self.chat_buckets: Dict[Any, TokenBucket] = {}
+        self.queues: Dict[int, Deque[asyncio.Future]] = {lane: deque() for lane in LANES}
+        self.paused_until: Dict[int, float] = {lane: 0.0 for lane in LANES}
+        self.wakeup: Optional[asyncio.Event] = None
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.sent = {lane: 0 for lane in LANES}
+        self.flood_waits = 0
+        self.max_wait = 0.0
+
+    async def initialize(self):
+        """Start the dispatcher that hands out global tokens by priority"""
+        if self.dispatcher is None:
+            self.wakeup = asyncio.Event()
+            self.dispatcher = asyncio.create_task(self.dispatch())
+
+    async def shutdown(self):
+        """Stop the dispatcher and fail requests still waiting"""
+        if self.dispatcher:
+            self.dispatcher.cancel()
+            try:
+                await self.dispatcher
+            except asyncio.CancelledError:
+                pass
+            self.dispatcher = None
+        for queue in self.queues.values():
+            while queue:
+                waiter = queue.popleft()
+                if not waiter.done():
+                    waiter.cancel()
+
+    def get_chat_bucket(self, chat_id: Any) -> TokenBucket:
+        """Get the message bucket of a chat, groups and channels have the lower limit"""
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= 10000:
+                self.prune_chat_buckets()
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            bucket = TokenBucket(self.group_rate if is_group else self.private_rate, self.burst)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    def prune_chat_buckets(self):
+        """Forget chats whose buckets have refilled"""
+        now = time.monotonic()
+        for chat_id in [chat_id for chat_id, bucket in self.chat_buckets.items() if bucket.is_idle(now)]:
+            del self.chat_buckets[chat_id]
+
+    def next_lane(self, now: float) -> Optional[int]:
+        """Highest priority lane with waiting requests that isn't paused"""
+        for lane in LANES:
+            queue = self.queues[lane]
+            while queue and queue[0].done():
+                queue.popleft()
+            if queue and self.paused_until[lane] <= now:
+                return lane
+        return None
+
+    async def dispatch(self):
+        """Release waiting requests one global token at a time, highest priority first"""
+        while True:
+            now = time.monotonic()
+            lane = self.next_lane(now)
+            if lane is None:
+                # Sleep until a request arrives or a paused lane with waiters resumes
+                resumes = [self.paused_until[lane] for lane in LANES if self.queues[lane]]
+                timeout = max(min(resumes) - now, 0.0) if resumes else None
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            delay = self.global_bucket.delay(now)
+            if delay > 0:
+                # A higher priority request may arrive meanwhile, pick again afterwards
+                await asyncio.sleep(delay)
+                continue
+
+            self.global_bucket.reserve(now)
+            self.queues[lane].popleft().set_result(None)
+
+    async def acquire(self, lane: int, chat_id: Any):
+        """Wait for the chat's turn, then for a global token in the lane"""
+        started = time.monotonic()
+        if chat_id is not None:
+            delay = self.get_chat_bucket(chat_id).reserve(started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self.queues[lane].append(waiter)
+        self.wakeup.set()
+        await waiter
+        self.max_wait = max(self.max_wait, time.monotonic() - started)
+
+    def back_off(self, lane: int, chat_id: Any, retry_after: float):
+        """Pause the chat, and the lane with every lower priority one, after a flood wait"""
+        self.flood_waits += 1
+        until = time.monotonic() + retry_after
+        if chat_id is not None:
+            self.get_chat_bucket(chat_id).pause(until)
+        for other in LANES:
+            if other >= lane:
+                self.paused_until[other] = max(self.paused_until[other], until)
+        self.logger.warning(
+            f"Flood wait of {retry_after:.0f}s on {LANE_NAMES[lane]} lane (chat {chat_id})"
+        )
+
+    async def process_request(self, callback: Callable[..., Coroutine[Any, Any, Any]], args: Any,
+                              kwargs: Dict[str, Any], endpoint: str, data: Dict[str, Any],
+                              rate_limit_args: Optional[Dict[str, Any]]):
+        """Run a Bot API request once the limits allow it, retrying after flood waits"""
+        lane = (rate_limit_args or {}).get('lane', current_lane.get())
+        chat_id = data.get('chat_id') if endpoint.startswith(CHAT_LIMITED_PREFIXES) else None
+
+        attempt = 0
+        while True:
+            if self.dispatcher is None:
+                await self.initialize()
+            await self.acquire(lane, chat_id)
+            try:
+                result = await callback(*args, **kwargs)
+                self.sent[lane] += 1
+                return result
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                self.back_off(lane, chat_id, retry_after)
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get outbound request counters"""
+        return {
+            'sent': sum(self.sent.values()),
+            'broadcast_sent': self.sent[LANE_BROADCAST],
+            'queued': sum(len(queue) for queue in self.queues.values()),
+            'flood_waits': self.flood_waits,
+            'max_wait': self.max_wait
+        }
+
+# Global rate limiter instance
+rate_limiter = TelegramRateLimiter()
@@ -0,0 +1,96 @@
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+
+from config.config import Config
+from src.utils.logger import Logger
+from src.utils.retry import retry_storage
+from src.services.firebase import firebase_service
+
+# Collections paged for each target type, with the field holding the chat id
+RECIPIENT_COLLECTIONS = {
+    'users': [('users', 'user_id')],
+    'users_and_groups': [('users', 'user_id'), ('groups', 'group_id')]
+}
+
+# Position of a recipient: collection and document id
+Position = Tuple[str, str]
+
+
+@dataclass
+class Recipient:
+    """Chat a broadcast is delivered to"""
+    position: Position
+    chat_id: int
+    language: str
+
+
+class RecipientPlanner:
+    """Stream distinct, reachable chats matching a broadcast audience"""
+
+    def __init__(self):
+        self.logger = Logger("RecipientPlanner")
+        self.page_size = Config.BROADCAST_PAGE_SIZE
+
+    @staticmethod
+    def get_active_since(audience: Dict[str, Any]) -> Optional[datetime]:
+        """Oldest last activity a recipient may have, activity is stored as naive local time"""
+        days = (audience or {}).get('active_days')
+        return datetime.now() - timedelta(days=days) if days else None
+
+    @staticmethod
+    def get_language_filters(audience: Dict[str, Any]) -> List[Tuple[str, str, Any]]:
+        """Indexed equality filters of an audience"""
+        languages = (audience or {}).get('languages')
+        return [('language', 'in', languages)] if languages else []
+
+    async def count(self, target_type: str, audience: Dict[str, Any] = None) -> int:
+        """Estimate recipients with aggregation queries, duplicates and unreachable chats included"""
+        filters = self.get_language_filters(audience)
+        since = self.get_active_since(audience)
+        if since:
+            filters.append(('last_activity', '>=', since))
+
+        total = 0
+        for collection, _id_field in RECIPIENT_COLLECTIONS.get(target_type, []):
+            total += await retry_storage(firebase_service.count_documents, collection, filters)
+        return total
+
+    async def iter_recipients(self, target_type: str, audience: Dict[str, Any] = None,
+                              cursor: Dict[str, str] = None) -> AsyncIterator[Recipient]:
+        """Page matching chats in document id order from a cursor, each chat id once"""
+        collections = RECIPIENT_COLLECTIONS.get(target_type, [])
+        names = [name for name, _id_field in collections]
+        cursor = cursor or {}
+        start = names.index(cursor['collection']) if cursor.get('collection') in names else 0
+
+        # Language is filtered by the query. Activity is checked here, ordering by it would
+        # move chats that become active mid-broadcast past the cursor and reach them twice
+        filters = self.get_language_filters(audience)
+        since = self.get_active_since(audience)
+        seen = set()
+
+        for index, (collection, id_field) in enumerate(collections[start:], start):
+            after = cursor.get('after') if index == start else None
+            fields = [id_field, 'language', 'last_activity', 'reachable']
+            while True:
+                page = await retry_storage(
+                    firebase_service.get_chat_page, collection, after, self.page_size, fields, filters
+                )
+                for doc_id, data in page:
+                    chat_id = data.get(id_field) or int(doc_id)
+                    if chat_id in seen or data.get('reachable') is False:
+                        continue
+                    if since:
+                        last_activity = data.get('last_activity')
+                        if not last_activity or last_activity.replace(tzinfo=None) < since:
+                            continue
+                    seen.add(chat_id)
+                    yield Recipient((collection, doc_id), chat_id, data.get('language') or Config.DEFAULT_LANGUAGE)
+                if len(page) < self.page_size:
+                    break
+                after = page[-1][0]
+
+# Global recipient planner instance
+recipient_planner = RecipientPlanner()
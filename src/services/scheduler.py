@@ -0,0 +1,119 @@
+import asyncio
+import heapq
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+
+from telegram import Bot
+
+from config.config import Config
+from src.utils.logger import Logger
+from src.services.firebase import firebase_service
+from src.services.broadcast import broadcast_service, BroadcastJob, STATUS_PENDING
+
+
+class BroadcastScheduler:
+    """Start scheduled broadcasts when due, from one timer armed for the earliest of them"""
+
+    def __init__(self):
+        self.logger = Logger("BroadcastScheduler")
+        # (due timestamp, broadcast id), entries whose due time changed are skipped when popped
+        self.heap: List[Tuple[float, str]] = []
+        self.due: Dict[str, float] = {}
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+        self.bot: Optional[Bot] = None
+        self.on_progress: Optional[Callable[[Bot, BroadcastJob], Awaitable[None]]] = None
+        self.fired = 0
+
+    def schedule(self, broadcast_id: str, when: datetime):
+        """Arm the timer of a broadcast, replacing an earlier schedule"""
+        due = when.timestamp()
+        if self.due.get(broadcast_id) == due:
+            return
+        self.due[broadcast_id] = due
+        heapq.heappush(self.heap, (due, broadcast_id))
+        if self.wakeup:
+            self.wakeup.set()
+
+    def unschedule(self, broadcast_id: str):
+        """Disarm the timer of a broadcast"""
+        self.due.pop(broadcast_id, None)
+
+    async def load(self):
+        """Arm timers for every pending scheduled broadcast in storage"""
+        broadcasts = await asyncio.to_thread(firebase_service.get_broadcasts_by_status, [STATUS_PENDING])
+        for broadcast in broadcasts:
+            if isinstance(broadcast.get('scheduled_time'), datetime):
+                self.schedule(broadcast['id'], broadcast['scheduled_time'])
+
+    async def start(self, bot: Bot, on_progress: Callable[[Bot, BroadcastJob], Awaitable[None]] = None):
+        """Load scheduled broadcasts and start the timer"""
+        self.bot = bot
+        self.on_progress = on_progress
+        self.wakeup = asyncio.Event()
+        await self.load()
+        self.task = asyncio.create_task(self.run())
+        self.logger.info(f"Scheduler started with {len(self.due)} scheduled broadcasts")
+
+    async def run(self):
+        """Sleep until the earliest due broadcast, start it, repeat"""
+        last_load = time.monotonic()
+        while True:
+            try:
+                now = time.time()
+                while self.heap and self.heap[0][0] <= now:
+                    due, broadcast_id = heapq.heappop(self.heap)
+                    if self.due.get(broadcast_id) != due:
+                        continue
+                    del self.due[broadcast_id]
+                    await self.fire(broadcast_id)
+
+                # Reload now and then to pick up broadcasts scheduled or abandoned by other instances
+                self.wakeup.clear()
+                timeout = max(Config.SCHEDULER_RELOAD_INTERVAL - (time.monotonic() - last_load), 0)
+                if self.heap:
+                    timeout = min(timeout, max(self.heap[0][0] - time.time(), 0))
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+                if time.monotonic() - last_load >= Config.SCHEDULER_RELOAD_INTERVAL:
+                    last_load = time.monotonic()
+                    await self.load()
+                    # Take over broadcasts whose instance stopped renewing its lease
+                    await broadcast_service.resume_interrupted(self.bot, self.on_progress)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.error(f"Error in broadcast scheduler: {e}")
+                await asyncio.sleep(5)
+
+    async def fire(self, broadcast_id: str):
+        """Claim a due broadcast and start delivering it"""
+        job = await broadcast_service.claim_and_start(self.bot, broadcast_id, [STATUS_PENDING], self.on_progress)
+        if job:
+            self.fired += 1
+            self.logger.info(f"Started scheduled broadcast {broadcast_id}")
+
+    async def shutdown(self):
+        """Stop the timer, pending broadcasts stay in storage for the next start"""
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get scheduled broadcast counters"""
+        return {
+            'scheduled': len(self.due),
+            'next_due': min(self.due.values()) if self.due else None,
+            'fired': self.fired
+        }
+
+# Global broadcast scheduler instance
+broadcast_scheduler = BroadcastScheduler()
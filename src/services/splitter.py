@@ -0,0 +1,167 @@
+import asyncio
+import json
+import math
+import os
+import shutil
+from pathlib import Path
+from typing import Optional, List, Dict, Any, AsyncIterator
+
+from config.config import Config
+from src.utils.logger import Logger
+
+# Shorter trailing parts are merged into the previous one (seconds)
+MIN_PART_DURATION = 0.5
+
+
+class MediaSplitter:
+    """Split oversized media into parts that fit the Telegram upload limit"""
+
+    def __init__(self):
+        self.logger = Logger("MediaSplitter")
+        self.part_limit = Config.TELEGRAM_UPLOAD_LIMIT
+        self.mode = Config.SPLIT_MODE  # 'time' or 'volumes'
+        # Stream copy cuts on keyframes, leave room for the overshoot
+        self.safety_margin = 0.9
+
+    def needs_split(self, file_path: str) -> bool:
+        """Check if file is larger than the upload limit"""
+        return os.path.getsize(file_path) > self.part_limit
+
+    async def probe_duration(self, file_path: str) -> Optional[float]:
+        """Get media duration in seconds with ffprobe"""
+        if not shutil.which('ffprobe'):
+            return None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', file_path,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+            )
+            stdout, _ = await process.communicate()
+            return float(json.loads(stdout)['format']['duration'])
+        except Exception as e:
+            self.logger.warning(f"Could not probe duration of {file_path}: {e}")
+            return None
+
+    async def plan(self, file_path: str) -> List[Dict[str, Any]]:
+        """Plan parts as time ranges (stream copy) or byte ranges (volumes)"""
+        size = os.path.getsize(file_path)
+        duration = await self.probe_duration(file_path) if self.mode == 'time' else None
+
+        if duration:
+            part_duration = duration * (self.part_limit * self.safety_margin) / size
+            count = max(1, math.ceil(duration / part_duration))
+            # Rounding leaves a sliver past the last full part, fold it into that part
+            if count > 1 and duration - (count - 1) * part_duration < MIN_PART_DURATION:
+                count -= 1
+            return [
+                {'mode': 'time', 'index': i + 1, 'count': count, 'start': i * part_duration,
+                 'duration': duration - i * part_duration if i == count - 1 else part_duration}
+                for i in range(count)
+            ]
+
+        return self.plan_volumes(size)
+
+    def plan_volumes(self, size: int) -> List[Dict[str, Any]]:
+        """Plan byte ranges of at most the upload limit"""
+        count = (size + self.part_limit - 1) // self.part_limit
+        return [
+            {'mode': 'volumes', 'index': i + 1, 'count': count,
+             'offset': i * self.part_limit, 'length': min(self.part_limit, size - i * self.part_limit)}
+            for i in range(count)
+        ]
+
+    async def make_part(self, file_path: str, part: Dict[str, Any]) -> str:
+        """Write a single part next to the source file"""
+        source = Path(file_path)
+
+        if part['mode'] == 'time':
+            output = source.with_name(f"{source.stem}.part{part['index']:02d}{source.suffix}")
+            process = await asyncio.create_subprocess_exec(
+                'ffmpeg', '-y', '-v', 'error',
+                '-ss', f"{part['start']:.3f}", '-i', str(source), '-t', f"{part['duration']:.3f}",
+                '-map', '0', '-c', 'copy', '-avoid_negative_ts', 'make_zero', str(output),
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE
+            )
+            _, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='ignore').strip()}")
+            return str(output)
+
+        output = source.with_name(f"{source.name}.{part['index']:03d}")
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._copy_range, str(source), str(output), part['offset'], part['length'])
+        return str(output)
+
+    @staticmethod
+    def _copy_range(source: str, output: str, offset: int, length: int, chunk_size: int = 1048576):
+        """Copy a byte range without loading it into memory"""
+        with open(source, 'rb') as src, open(output, 'wb') as dst:
+            src.seek(offset)
+            remaining = length
+            while remaining > 0:
+                chunk = src.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                remaining -= len(chunk)
+
+    async def iter_parts(self, file_path: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield parts in order while the next part is prepared in the background"""
+        parts = await self.plan(file_path)
+        queue: asyncio.Queue = asyncio.Queue()
+        # One part being uploaded and one prepared, the producer waits for a deleted part to free a slot
+        slots = asyncio.Semaphore(2)
+
+        async def produce():
+            try:
+                for part in parts:
+                    await slots.acquire()
+                    path = await self.make_part(file_path, part)
+
+                    # Keyframe placement can push a time part over the limit, send that range as volumes
+                    if part['mode'] == 'time' and os.path.getsize(path) > self.part_limit:
+                        self.logger.warning(f"Part {part['index']} of {file_path} exceeds upload limit, sending volumes")
+                        try:
+                            for volume in self.plan_volumes(os.path.getsize(path)):
+                                if volume['index'] > 1:
+                                    await slots.acquire()
+                                volume_path = await self.make_part(path, volume)
+                                index = f"{part['index']}.{volume['index']}"
+                                await queue.put(dict(volume, index=index, count=part['count'], path=volume_path))
+                        finally:
+                            os.unlink(path)
+                        continue
+
+                    await queue.put(dict(part, path=path))
+                await queue.put(None)
+            except Exception as e:
+                await queue.put(e)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                try:
+                    yield item
+                finally:
+                    if os.path.exists(item['path']):
+                        os.unlink(item['path'])
+                    slots.release()
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+            # Parts prepared but never taken, e.g. after a failed upload
+            while not queue.empty():
+                item = queue.get_nowait()
+                if isinstance(item, dict) and os.path.exists(item['path']):
+                    os.unlink(item['path'])
+
+# Global media splitter instance
+media_splitter = MediaSplitter()
@@ -0,0 +1,117 @@
+import hmac
+import secrets
+from typing import Optional, Dict, Any
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from config.config import Config
+from src.utils.logger import Logger
+from src.services.firebase import firebase_service
+from src.services.downloader import download_service
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class WebhookServer:
+    """Embedded aiohttp server receiving updates from Telegram, with health and readiness probes"""
+
+    def __init__(self, application: Application, listen: str = None, port: int = None,
+                 path: str = None, secret_token: str = None):
+        self.logger = Logger("WebhookServer")
+        self.application = application
+        self.listen = listen or Config.WEBHOOK_LISTEN
+        self.port = port or Config.WEBHOOK_PORT
+        self.path = '/' + (path or Config.WEBHOOK_PATH).lstrip('/')
+        # Telegram echoes the secret in a header, so foreign posts can be rejected
+        self.secret_token = secret_token or Config.WEBHOOK_SECRET or secrets.token_urlsafe(32)
+        self.runner: Optional[web.AppRunner] = None
+        self.webhook_set = False
+        self.received = 0
+        self.rejected = 0
+        self.invalid = 0
+
+    def build_app(self) -> web.Application:
+        """Create the aiohttp application with update and probe routes"""
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get('/healthz', self.handle_health)
+        app.router.add_get('/readyz', self.handle_ready)
+        return app
+
+    async def start(self):
+        """Start listening for updates"""
+        self.runner = web.AppRunner(self.build_app(), access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.listen, self.port)
+        await site.start()
+        self.logger.info(f"Webhook server listening on {self.listen}:{self.port}{self.path}")
+
+    async def set_webhook(self, drop_pending_updates: bool = True):
+        """Point Telegram at this server"""
+        url = Config.WEBHOOK_URL.rstrip('/') + self.path
+        await self.application.bot.set_webhook(
+            url=url,
+            secret_token=self.secret_token,
+            max_connections=Config.WEBHOOK_MAX_CONNECTIONS,
+            allowed_updates=Update.ALL_TYPES,
+            drop_pending_updates=drop_pending_updates
+        )
+        self.webhook_set = True
+        self.logger.info(f"Webhook set to {url}")
+
+    async def stop(self):
+        """Stop accepting updates"""
+        self.webhook_set = False
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Queue a posted update and acknowledge it at once"""
+        token = request.headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(token.encode(), self.secret_token.encode()):
+            self.rejected += 1
+            return web.Response(status=403)
+
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot)
+        except Exception as e:
+            self.invalid += 1
+            self.logger.warning(f"Invalid update posted to webhook: {e}")
+            return web.Response(status=400)
+
+        # Handlers run from the application's queue, Telegram only waits for the queue put
+        await self.application.update_queue.put(update)
+        self.received += 1
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """Liveness probe, the event loop is answering"""
+        return web.json_response({'status': 'ok'})
+
+    async def handle_ready(self, request: web.Request) -> web.Response:
+        """Readiness probe, updates are being received and processed"""
+        checks = self.get_checks()
+        status = 200 if all(checks.values()) else 503
+        return web.json_response({'ready': status == 200, 'checks': checks}, status=status)
+
+    def get_checks(self) -> Dict[str, bool]:
+        """Components that must be up before updates can be served"""
+        return {
+            'application': self.application.running,
+            'webhook': self.webhook_set,
+            'firebase': firebase_service.is_initialized,
+            'downloader': download_service.is_initialized
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get webhook request counters"""
+        return {
+            'received': self.received,
+            'rejected': self.rejected,
+            'invalid': self.invalid,
+            'queued': self.application.update_queue.qsize()
+        }
@@ -0,0 +1,218 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Tuple
+
+from config.config import Config
+from src.utils.logger import Logger
+
+# Options shared by every extractor instance
+BASE_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'noprogress': True,
+    # Links such as watch?v=...&list=... fetch one item, playlists go through batch jobs
+    'noplaylist': True,
+    'socket_timeout': Config.YDL_SOCKET_TIMEOUT,
+    'retries': Config.YDL_RETRIES,
+    'fragment_retries': Config.YDL_RETRIES,
+    'http_chunk_size': Config.YDL_HTTP_CHUNK_SIZE,
+    'buffersize': Config.YDL_BUFFER_SIZE,
+    'writethumbnail': False,
+    'writeinfojson': False,
+    'writesubtitles': False,
+    'writeautomaticsub': False,
+}
+
+# Per-platform tuning on top of BASE_OPTIONS
+PLATFORM_OPTIONS = {
+    'youtube': {
+        # YouTube throttles long unranged requests, keep chunks small
+        'http_chunk_size': min(Config.YDL_HTTP_CHUNK_SIZE, 10485760),
+    },
+    'twitch': {
+        'hls_use_mpegts': True,
+    },
+    'instagram': {
+        'retries': max(Config.YDL_RETRIES, 5),
+    },
+    'soundcloud': {
+        'http_chunk_size': None,
+    },
+}
+
+# Best audio-only stream, preferring containers that need no conversion
+AUDIO_FORMAT_SELECTOR = 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best'
+
+# Profiles select what an instance is used for
+PROFILE_OPTIONS = {
+    'info': {
+        'skip_download': True,
+        'format': 'best',
+    },
+    'video': {
+        'format': 'best',
+        'postprocessors': [{
+            'key': 'FFmpegVideoConvertor',
+            'preferedformat': 'mp4',
+        }],
+    },
+    'raw': {
+        'format': 'best',
+    },
+    'audio': {
+        'format': AUDIO_FORMAT_SELECTOR,
+        # Stream copies when the source codec already matches
+        'postprocessors': [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': Config.AUDIO_FORMAT,
+        }],
+    },
+}
+
+_MISSING = object()
+
+
+class PooledYDL:
+    """Long-lived YoutubeDL instance with per-job progress hooks"""
+
+    def __init__(self, options: Dict[str, Any]):
+        # yt_dlp is one of the slowest imports, load it with the first instance
+        import yt_dlp
+        
+        self.ydl = yt_dlp.YoutubeDL(options)
+        self.uses = 0
+        self.hooks = []
+        self.ydl.add_progress_hook(self._dispatch_progress)
+
+    def _dispatch_progress(self, d):
+        """Forward progress to the hooks of the current job"""
+        for hook in list(self.hooks):
+            hook(d)
+
+    @contextmanager
+    def job(self, progress_hooks=None, **params):
+        """Temporarily apply per-job parameters"""
+        ydl = self.ydl
+        saved = {key: ydl.params.get(key, _MISSING) for key in params}
+        saved_selector = ydl.format_selector
+
+        try:
+            for key, value in params.items():
+                if key == 'outtmpl':
+                    value = dict(ydl.params.get('outtmpl') or {}, default=value)
+                ydl.params[key] = value
+
+            if 'format' in params:
+                ydl.format_selector = ydl.build_format_selector(params['format'])
+
+            self.hooks = list(progress_hooks or [])
+            yield ydl
+        finally:
+            self.hooks = []
+            ydl.format_selector = saved_selector
+            for key, value in saved.items():
+                if value is _MISSING:
+                    ydl.params.pop(key, None)
+                else:
+                    ydl.params[key] = value
+            self.uses += 1
+
+    def close(self):
+        """Close sessions and save cookies"""
+        try:
+            self.ydl.close()
+        except Exception:
+            pass
+
+
+class YDLPool:
+    """Lazily created per-platform pools of YoutubeDL instances"""
+
+    def __init__(self, max_size: int = None, recycle_after: int = None):
+        self.logger = Logger("YDLPool")
+        self.max_size = max_size or Config.MAX_CONCURRENT_DOWNLOADS
+        self.recycle_after = recycle_after or Config.YDL_RECYCLE_AFTER
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str], queue.LifoQueue] = {}
+        self._created: Dict[Tuple[str, str], int] = {}
+
+    def build_options(self, platform: Optional[str], profile: str) -> Dict[str, Any]:
+        """Build options for a platform profile"""
+        options = dict(BASE_OPTIONS)
+        options.update(PLATFORM_OPTIONS.get(platform, {}))
+        options.update(PROFILE_OPTIONS[profile])
+        return {key: value for key, value in options.items() if value is not None}
+
+    def _checkout(self, key: Tuple[str, str]) -> PooledYDL:
+        """Take an idle instance or create a new one"""
+        with self._lock:
+            idle = self._idle.setdefault(key, queue.LifoQueue())
+            try:
+                return idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            if self._created.get(key, 0) < self.max_size:
+                self._created[key] = self._created.get(key, 0) + 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                self.logger.debug(f"Creating YoutubeDL instance for {key}")
+                return PooledYDL(self.build_options(*key))
+            except Exception:
+                with self._lock:
+                    self._created[key] -= 1
+                raise
+
+        # Pool exhausted, wait for another worker to release an instance
+        return idle.get(timeout=Config.DOWNLOAD_TIMEOUT)
+
+    def _release(self, key: Tuple[str, str], instance: PooledYDL):
+        """Return instance to the pool or recycle it"""
+        if instance.uses >= self.recycle_after:
+            instance.close()
+            with self._lock:
+                self._created[key] -= 1
+            self.logger.debug(f"Recycled YoutubeDL instance for {key}")
+            return
+
+        self._idle[key].put(instance)
+
+    @contextmanager
+    def acquire(self, platform: Optional[str], profile: str = 'info', progress_hooks=None, **params):
+        """Borrow an instance for a single job"""
+        key = (platform or 'generic', profile)
+        instance = self._checkout(key)
+
+        try:
+            with instance.job(progress_hooks=progress_hooks, **params) as ydl:
+                yield ydl
+        finally:
+            self._release(key, instance)
+
+    def close(self):
+        """Close all idle instances"""
+        with self._lock:
+            for key, idle in self._idle.items():
+                while True:
+                    try:
+                        instance = idle.get_nowait()
+                    except queue.Empty:
+                        break
+                    instance.close()
+                    self._created[key] -= 1
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get pool statistics"""
+        with self._lock:
+            return {
+                f"{platform}:{profile}": {
+                    'created': self._created.get((platform, profile), 0),
+                    'idle': idle.qsize()
+                }
+                for (platform, profile), idle in self._idle.items()
+            }
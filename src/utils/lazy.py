@@ -0,0 +1,36 @@
+import threading
+from typing import Any, Callable
+
+
+class LazyService:
+    """Module-level service proxy that constructs the service on first use"""
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_lock', threading.Lock())
+
+    def resolve(self) -> Any:
+        """Construct the service once, concurrent callers wait for the first"""
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._factory()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._instance is not None
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.resolve(), name, value)
+
+    def __repr__(self) -> str:
+        state = 'initialized' if self.is_initialized else 'pending'
+        return f"<LazyService {getattr(self._factory, '__name__', self._factory)} ({state})>"
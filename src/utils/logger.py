@@ -23,7 +23,9 @@ class Logger:
         self.logger.addHandler(console_handler)
         
         # File handler
-        log_file = Path(Config.LOGS_PATH) / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
+        log_dir = Path(Config.LOGS_PATH)
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_file = log_dir / f"{name}_{datetime.now().strftime('%Y%m%d')}.log"
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setFormatter(formatter)
         self.logger.addHandler(file_handler)
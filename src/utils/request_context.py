@@ -0,0 +1,47 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any
+
+
+@dataclass
+class RequestContext:
+    """User, group and language of one update, resolved once for all handlers"""
+    user_id: Optional[int] = None
+    chat_id: Optional[int] = None
+    chat_type: Optional[str] = None
+    user_data: Optional[Dict[str, Any]] = None
+    group_data: Optional[Dict[str, Any]] = None
+    language: str = 'en'
+    storage_reads: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def is_group(self) -> bool:
+        return self.chat_type in ('group', 'supergroup')
+
+
+# Request of the update being processed by the current task
+current_request: ContextVar[Optional[RequestContext]] = ContextVar('current_request', default=None)
+
+
+def count_storage_read():
+    """Charge a storage read to the current request"""
+    request = current_request.get()
+    if request:
+        request.storage_reads += 1
+
+
+def note_user_write(user_id: int, updates: Dict[str, Any]):
+    """Keep the current request's user data in step with a write"""
+    request = current_request.get()
+    if request and request.user_id == user_id and request.user_data is not None:
+        request.user_data.update(updates)
+        request.language = request.user_data.get('language', 'en')
+
+
+def note_group_write(group_id: int, updates: Dict[str, Any]):
+    """Keep the current request's group data in step with a write"""
+    request = current_request.get()
+    if request and request.chat_id == group_id and request.group_data is not None:
+        request.group_data.update(updates)
@@ -0,0 +1,26 @@
+import asyncio
+from typing import Any, Callable
+
+from config.config import Config
+from src.utils.logger import Logger
+
+logger = Logger("StorageRetry")
+
+
+async def retry_storage(func: Callable[..., Any], *args) -> Any:
+    """Run a blocking storage call in a worker thread, retrying errors and False results with backoff"""
+    name = getattr(func, '__name__', 'storage call')
+    delay = Config.STORAGE_RETRY_DELAY
+    for attempt in range(1, Config.STORAGE_RETRIES + 1):
+        try:
+            result = await asyncio.to_thread(func, *args)
+            if result is not False:
+                return result
+            error: Exception = RuntimeError(f"{name} reported a failure")
+        except Exception as e:
+            error = e
+        if attempt == Config.STORAGE_RETRIES:
+            raise error
+        logger.warning(f"{name} failed (attempt {attempt}), retrying in {delay:.0f}s: {error}")
+        await asyncio.sleep(delay)
+        delay *= 2
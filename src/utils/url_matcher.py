@@ -0,0 +1,118 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Host prefixes that point at the same site as the bare domain
+HOST_ALIASES = ('www.', 'm.', 'mobile.', 'music.', 'mbasic.')
+
+# Query parameters that only carry tracking information
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'igsh', 'si', 'feature',
+    'ref', 'ref_src', 'ref_url', 's', 't_id', 'utm_id', 'mibextid', 'share_id',
+    'is_from_webapp', 'sender_device', 'web_id'
+}
+TRACKING_PREFIXES = ('utm_',)
+
+# Paths (of canonical URLs) that point at a playlist or channel rather than one item
+PLAYLIST_PATHS = {
+    'youtube': re.compile(r'^/(playlist|channel/[^/]+|c/[^/]+|user/[^/]+|@[^/]+)(/(videos|shorts|streams))?$'),
+    'soundcloud': re.compile(r'^/[^/]+/(sets/[^/]+|tracks|albums)$'),
+    'vimeo': re.compile(r'^/(channels|album|showcase)/[^/]+$'),
+    'dailymotion': re.compile(r'^/playlist/[^/]+$'),
+    'twitch': re.compile(r'^/[^/]+/(videos|clips)$'),
+    'tiktok': re.compile(r'^/@[^/]+$'),
+}
+
+
+class URLMatcher:
+    """Precompiled host-suffix matcher for supported platforms"""
+
+    def __init__(self, platform_domains: Dict[str, List[str]]):
+        # Reversed host labels -> platform id, e.g. ('com', 'youtube') -> 'youtube'
+        self._suffixes: Dict[Tuple[str, ...], str] = {}
+        self._max_labels = 0
+
+        for platform, domains in platform_domains.items():
+            for domain in domains:
+                labels = tuple(reversed(domain.lower().strip('.').split('.')))
+                self._suffixes[labels] = platform
+                self._max_labels = max(self._max_labels, len(labels))
+
+    def match_host(self, host: str) -> Optional[str]:
+        """Get platform id for a host name"""
+        labels = host.lower().rstrip('.').split('.')
+        labels.reverse()
+
+        # Longest suffix wins, so 'music.youtube.com' can be routed separately
+        for length in range(min(len(labels), self._max_labels), 0, -1):
+            platform = self._suffixes.get(tuple(labels[:length]))
+            if platform:
+                return platform
+        return None
+
+    def match(self, url: str) -> Optional[str]:
+        """Get platform id for a URL"""
+        host = self._host(url)
+        return self.match_host(host) if host else None
+
+    def is_playlist(self, url: str) -> bool:
+        """Check if canonical URL points at a playlist or channel"""
+        pattern = PLAYLIST_PATHS.get(self.match(url))
+        if not pattern:
+            return False
+        try:
+            return bool(pattern.match(urlsplit(self._with_scheme(url)).path.rstrip('/')))
+        except ValueError:
+            return False
+
+    def canonicalize(self, url: str) -> str:
+        """Normalise URL so that equivalent links map to the same string"""
+        try:
+            parts = urlsplit(self._with_scheme(url.strip()))
+        except ValueError:
+            return url
+
+        host = (parts.hostname or '').lower()
+        for alias in HOST_ALIASES:
+            if host.startswith(alias) and self.match_host(host[len(alias):]):
+                host = host[len(alias):]
+                break
+
+        path = parts.path.rstrip('/') or '/'
+        query = [
+            (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PREFIXES)
+        ]
+
+        # Short links and alternative YouTube paths resolve to the watch page
+        if host == 'youtu.be' and path != '/':
+            query.append(('v', path.lstrip('/')))
+            host, path = 'youtube.com', '/watch'
+        elif host == 'youtube.com' and path.startswith(('/shorts/', '/embed/', '/live/')):
+            query.append(('v', path.split('/')[2]))
+            path = '/watch'
+        elif host == 'x.com':
+            host = 'twitter.com'
+
+        return urlunsplit(('https', host, path, urlencode(sorted(query)), ''))
+
+    @staticmethod
+    def _host(url: str) -> str:
+        """Extract host name without a full URL parse"""
+        start = url.find('://')
+        start = start + 3 if start != -1 else 0
+        end = len(url)
+        for separator in '/?#':
+            index = url.find(separator, start, end)
+            if index != -1:
+                end = index
+        host = url[start:end]
+        host = host[host.rfind('@') + 1:]
+        if host.startswith('['):
+            return ''
+        return host.split(':', 1)[0]
+
+    @staticmethod
+    def _with_scheme(url: str) -> str:
+        """Add scheme to bare links such as 'youtu.be/abc'"""
+        return url if '://' in url else f'https://{url}'
@@ -0,0 +1,139 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple, Iterable
+
+# Arabic letter forms folded into the Persian ones, digits into ASCII
+LETTER_FOLDS = {
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی', 'ك': 'ک', 'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا', 'ؤ': 'و'
+}
+LETTER_FOLDS.update({chr(0x0660 + digit): str(digit) for digit in range(10)})
+LETTER_FOLDS.update({chr(0x06F0 + digit): str(digit) for digit in range(10)})
+
+# Characters that don't change a word: tatweel, harakat, superscript alef, zero-width joiners
+IGNORED_CHARS = ['\u0640', '\u0670', '\u00ad', '\u200b', '\u200c', '\u200d', '\u2060', '\ufeff']
+IGNORED_CHARS += [chr(code) for code in range(0x064B, 0x0660)]
+
+# str.translate with a dict is slow on non-Latin text, so only the folded characters are replaced
+FOLD_PATTERN = re.compile('[' + re.escape(''.join(LETTER_FOLDS) + ''.join(IGNORED_CHARS)) + ']')
+
+# Marks a word end that may continue with any letters in whole word mode, e.g. 'spam*'
+WILDCARD = '*'
+
+# Lists up to this size are scanned word by word, str.find beats the automaton loop there
+LINEAR_SCAN_LIMIT = 16
+
+
+def fold_char(match: re.Match) -> str:
+    return LETTER_FOLDS.get(match.group(), '')
+
+
+def normalize_text(text: str) -> str:
+    """Fold compatibility forms, Arabic letter variants, diacritics and case"""
+    if text.isascii():
+        return text.lower()
+    return FOLD_PATTERN.sub(fold_char, unicodedata.normalize('NFKC', text)).casefold()
+
+
+def is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class WordMatcher:
+    """Aho-Corasick automaton over normalised words, scanning a text once whatever the word count"""
+
+    def __init__(self, words: Iterable[str], whole_words: bool = False):
+        self.whole_words = whole_words
+        # (original word, length, may start mid-word, may end mid-word) per pattern
+        self._patterns: List[Tuple[str, int, bool, bool]] = []
+        self._literals: List[str] = []
+        # Trie transitions, failure links and the patterns ending at each node, failures included
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+        seen = set()
+        for word in words:
+            key = normalize_text(word.strip())
+            literal = key.strip(WILDCARD)
+            if not literal or key in seen:
+                continue
+            seen.add(key)
+            self._add(literal, len(self._patterns))
+            self._literals.append(literal)
+            self._patterns.append((word, len(literal), key.startswith(WILDCARD), key.endswith(WILDCARD)))
+        self._link()
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def _add(self, literal: str, pattern: int):
+        node = 0
+        for char in literal:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            node = next_node
+        self._out[node] += (pattern,)
+
+    def _link(self):
+        """Set failure links breadth first, so a node's fallback is linked before the node"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] += self._out[self._fail[child]]
+                queue.append(child)
+
+    def _accepts(self, text: str, pattern: int, end: int) -> bool:
+        """Check the word boundaries of a pattern ending before text[end]"""
+        _word, length, open_start, open_end = self._patterns[pattern]
+        if not self.whole_words:
+            return True
+        start = end - length
+        if not open_start and start > 0 and is_word_char(text[start - 1]):
+            return False
+        if not open_end and end < len(text) and is_word_char(text[end]):
+            return False
+        return True
+
+    def search(self, text: str) -> Optional[str]:
+        """Get the first filtered word found in a text, None when it is clean"""
+        if not self._patterns or not text:
+            return None
+
+        text = normalize_text(text)
+        if len(self._patterns) <= LINEAR_SCAN_LIMIT:
+            return self._search_linear(text)
+
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for index, char in enumerate(text):
+            next_node = goto[node].get(char)
+            while next_node is None and node:
+                node = fail[node]
+                next_node = goto[node].get(char)
+            node = next_node or 0
+            if out[node]:
+                for pattern in out[node]:
+                    if self._accepts(text, pattern, index + 1):
+                        return self._patterns[pattern][0]
+        return None
+
+    def _search_linear(self, text: str) -> Optional[str]:
+        """Find each word in a normalised text on its own"""
+        for pattern, literal in enumerate(self._literals):
+            start = text.find(literal)
+            while start >= 0:
+                if self._accepts(text, pattern, start + len(literal)):
+                    return self._patterns[pattern][0]
+                start = text.find(literal, start + 1)
+        return None